@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db.models import Count, Q
 from django.utils.html import format_html
 
+from apps.core.thumbnails import thumbnail_info
+
 from .models import AdCreative, AdImpression, AdSlot, AdvertiserLead
 
 
@@ -45,9 +48,14 @@ class AdSlotAdmin(admin.ModelAdmin):
     def dimensions(self, obj):
         return f"{obj.width}\u00d7{obj.height}px"
 
-    @admin.display(description="Active Creatives")
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            active_creatives=Count("creatives", filter=Q(creatives__is_active=True)),
+        )
+
+    @admin.display(description="Active Creatives", ordering="active_creatives")
     def active_creatives_count(self, obj):
-        count = obj.creatives.filter(is_active=True).count()
+        count = obj.active_creatives
         colour = "green" if count > 0 else "#999"
         return format_html('<span style="color:{}">{}</span>', colour, count)
 
@@ -68,6 +76,7 @@ class AdCreativeAdmin(admin.ModelAdmin):
         "click_count",
     )
     list_filter = ("provider", "creative_type", "is_active", "slot")
+    list_select_related = ("slot", "stats")
     search_fields = ("name", "slot__name")
     list_editable = ("priority", "is_active")
     date_hierarchy = "start_datetime"
@@ -88,9 +97,11 @@ class AdCreativeAdmin(admin.ModelAdmin):
     @admin.display(description="Preview")
     def preview_thumbnail(self, obj):
         if obj.image:
+            # The "thumbnail" alias is generated when the creative is saved
+            thumb = thumbnail_info(obj.image, "thumbnail")
             return format_html(
                 '<img src="{}" style="width:80px;height:60px;object-fit:cover;border-radius:3px">',
-                obj.image.url,
+                thumb.url if thumb else obj.image.url,
             )
         if obj.creative_type == "html":
             return format_html('<span style="color:#666">HTML</span>')
@@ -100,19 +111,24 @@ class AdCreativeAdmin(admin.ModelAdmin):
     def date_range(self, obj):
         return f"{obj.start_datetime:%d/%m/%Y} \u2192 {obj.end_datetime:%d/%m/%Y}"
 
-    @admin.display(description="Impressions")
+    # Totals come from the AdCreativeStats rollup, never from counting events
+    @admin.display(description="Impressions", ordering="stats__impressions")
     def impression_count(self, obj):
-        return obj.events.filter(event_type="impression").count()
+        stats = getattr(obj, "stats", None)
+        return stats.impressions if stats else 0
 
-    @admin.display(description="Clicks")
+    @admin.display(description="Clicks", ordering="stats__clicks")
     def click_count(self, obj):
-        return obj.events.filter(event_type="click").count()
+        stats = getattr(obj, "stats", None)
+        return stats.clicks if stats else 0
 
 
 @admin.register(AdImpression)
 class AdImpressionAdmin(admin.ModelAdmin):
     list_display = ("creative", "event_type", "timestamp", "ip_address")
     list_filter = ("event_type", "timestamp")
+    # AdCreative.__str__ shows its slot
+    list_select_related = ("creative__slot",)
     search_fields = ("creative__name", "ip_address")
     date_hierarchy = "timestamp"
     readonly_fields = ("creative", "event_type", "timestamp", "user_agent", "ip_address", "referrer")
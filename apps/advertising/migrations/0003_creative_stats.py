@@ -0,0 +1,46 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_stats(apps, schema_editor):
+    AdImpression = apps.get_model("advertising", "AdImpression")
+    AdCreativeStats = apps.get_model("advertising", "AdCreativeStats")
+    totals = (
+        AdImpression.objects.values("creative_id")
+        .annotate(
+            impressions=Count("pk", filter=Q(event_type="impression")),
+            clicks=Count("pk", filter=Q(event_type="click")),
+        )
+        .order_by()
+    )
+    AdCreativeStats.objects.bulk_create(
+        (AdCreativeStats(**row) for row in totals.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertising', '0002_advertiserlead'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdCreativeStats',
+            fields=[
+                ('creative', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='advertising.adcreative')),
+                ('impressions', models.PositiveBigIntegerField(default=0)),
+                ('clicks', models.PositiveBigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ad Creative Stats',
+                'verbose_name_plural': 'Ad Creative Stats',
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,12 @@ import logging
 
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.utils import timezone
 
+from apps.core.page_cache import invalidate_tags
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,6 +58,10 @@ class AdSlot(models.Model):
     def __str__(self):
         return f"{self.display_name} ({self.name})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_tags(f"adslot:{self.name}")
+
     def get_eligible_creatives(self):
         """Return active creatives within their scheduled date range."""
         now = timezone.now()
@@ -162,6 +169,7 @@ class AdCreative(models.Model):
         for i in range(3):
             bucket = int(now.timestamp() // 300) - i
             cache.delete(f"ad_slot:{self.slot.name}:{bucket}")
+        invalidate_tags(f"adslot:{self.slot.name}")
 
 
 class AdImpression(models.Model):
@@ -199,6 +207,45 @@ class AdImpression(models.Model):
         return f"{self.event_type} — {self.creative.name} — {self.timestamp:%Y-%m-%d %H:%M}"
 
 
+class AdCreativeStats(models.Model):
+    """Running impression/click totals per creative.
+
+    Incremented alongside every AdImpression so reporting (the admin
+    changelist) never has to count the raw event table.
+    """
+
+    creative = models.OneToOneField(
+        AdCreative,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    impressions = models.PositiveBigIntegerField(default=0)
+    clicks = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ad Creative Stats"
+        verbose_name_plural = "Ad Creative Stats"
+
+    def __str__(self):
+        return f"{self.creative_id}: {self.impressions} impressions, {self.clicks} clicks"
+
+    @classmethod
+    def record(cls, creative_id, event_type):
+        """Add one event to the creative's totals, creating its row if needed."""
+        field = "clicks" if event_type == "click" else "impressions"
+        increment = {field: F(field) + 1, "updated": timezone.now()}
+        if cls.objects.filter(creative_id=creative_id).update(**increment):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(creative_id=creative_id, **{field: 1})
+        except IntegrityError:
+            # Created by a concurrent request in the meantime
+            cls.objects.filter(creative_id=creative_id).update(**increment)
+
+
 class AdvertiserLead(models.Model):
     """Structured enquiry from a prospective advertiser."""
 
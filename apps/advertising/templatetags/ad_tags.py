@@ -5,6 +5,8 @@ from django.core.cache import cache
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
+from apps.core.page_cache import add_tags
+
 from ..models import AdSlot
 from ..resolvers import SlotResolver
 
@@ -22,6 +24,10 @@ def ad_slot(context, slot_name):
     Returns rendered HTML from the resolved creative's provider renderer.
     On any error, returns empty string — never breaks the page.
     """
+    request = context.get("request")
+    if request is not None:
+        add_tags(request, f"adslot:{slot_name}")
+
     try:
         now = timezone.now()
         bucket = int(now.timestamp() // 300)
@@ -36,7 +42,6 @@ def ad_slot(context, slot_name):
         except AdSlot.DoesNotExist:
             return ""
 
-        request = context.get("request")
         resolver = SlotResolver(slot, request)
         html = resolver.resolve_and_render()
 
@@ -6,7 +6,7 @@ from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 
 from .forms import AdvertiserLeadForm
-from .models import AdCreative, AdImpression
+from .models import AdCreative, AdCreativeStats, AdImpression
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,7 @@ def track_impression(request):
         ip_address=request.META.get("REMOTE_ADDR"),
         referrer=request.META.get("HTTP_REFERER", "")[:200],
     )
+    AdCreativeStats.record(creative.pk, event_type)
     return JsonResponse({"status": "ok"})
 
 
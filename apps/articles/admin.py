@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.contrib import admin
+from django.db.models import Count, Q
 from django.utils import timezone
 from django.utils.html import format_html
 
+from .invalidation import invalidate_articles
 from .models import Article, Author, SlugRedirect, Town
+from .search import full_text_enabled, search_query
 
 
 @admin.register(Town)
@@ -13,9 +17,14 @@ class TownAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     prepopulated_fields = {"slug": ("name",)}
 
+    def get_queryset(self, request):
+        # Published counts from the town timeline, in the changelist query
+        return super().get_queryset(request).annotate(published_count=Count("timeline"))
+
     def article_count(self, obj):
-        return obj.articles.filter(status="published").count()
+        return obj.published_count
     article_count.short_description = "Articles"
+    article_count.admin_order_field = "published_count"
 
 
 @admin.register(Author)
@@ -38,9 +47,15 @@ class AuthorAdmin(admin.ModelAdmin):
     search_fields = ("name", "bio")
     prepopulated_fields = {"slug": ("name",)}
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            published_count=Count("articles", filter=Q(articles__status="published")),
+        )
+
     def article_count(self, obj):
-        return obj.articles.filter(status="published").count()
+        return obj.published_count
     article_count.short_description = "Published"
+    article_count.admin_order_field = "published_count"
 
 
 class SlugRedirectInline(admin.TabularInline):
@@ -92,6 +107,7 @@ class ArticleAdmin(admin.ModelAdmin):
         "published_at", "is_featured", "homepage_secondary", "section_lead", "sort_order", "section_priority", "updated",
     )
     list_filter = ("status", "category", "is_featured", "homepage_secondary", "section_lead", "author", "is_sponsored")
+    list_select_related = ("author",)
     list_editable = ("status", "is_featured", "homepage_secondary", "section_lead", "sort_order", "section_priority")
     search_fields = ("title", "deck", "body_markdown")
     prepopulated_fields = {"slug": ("title",)}
@@ -102,6 +118,12 @@ class ArticleAdmin(admin.ModelAdmin):
 
     actions = ["publish_now", "archive", "mark_draft"]
 
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of ILIKE scans over whole bodies."""
+        if search_term and getattr(settings, "ADMIN_FULLTEXT_SEARCH", True) and full_text_enabled():
+            return queryset.filter(search_vector=search_query(search_term)), False
+        return super().get_search_results(request, queryset, search_term)
+
     def body_html_preview(self, obj):
         if obj.body_html:
             return format_html('<div style="max-width:700px;font-family:serif;line-height:1.6">{}</div>', obj.body_html)
@@ -115,19 +137,31 @@ class ArticleAdmin(admin.ModelAdmin):
         return "Save first to generate preview link"
     preview_link.short_description = "Preview"
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Town tags are saved after the article itself
+        invalidate_articles([form.instance.pk])
+
     @admin.action(description="Publish selected articles now")
     def publish_now(self, request, queryset):
-        updated = queryset.update(status="published", published_at=timezone.now())
+        pks = list(queryset.values_list("pk", flat=True))
+        now = timezone.now()
+        updated = queryset.update(status="published", published_at=now, updated=now)
+        invalidate_articles(pks)
         self.message_user(request, f"{updated} article(s) published.")
 
     @admin.action(description="Archive selected articles")
     def archive(self, request, queryset):
-        updated = queryset.update(status="archived")
+        pks = list(queryset.values_list("pk", flat=True))
+        updated = queryset.update(status="archived", updated=timezone.now())
+        invalidate_articles(pks)
         self.message_user(request, f"{updated} article(s) archived.")
 
     @admin.action(description="Revert to draft")
     def mark_draft(self, request, queryset):
-        updated = queryset.update(status="draft")
+        pks = list(queryset.values_list("pk", flat=True))
+        updated = queryset.update(status="draft", updated=timezone.now())
+        invalidate_articles(pks)
         self.message_user(request, f"{updated} article(s) reverted to draft.")
 
     class Media:
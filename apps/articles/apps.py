@@ -5,3 +5,15 @@ class ArticlesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.articles"
     verbose_name = "Articles"
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed
+
+        from apps.core.thumbnails import thumbnails_generated
+
+        from .models import Article
+        from .placeholders import image_thumbnailed
+        from .timeline import towns_changed
+
+        m2m_changed.connect(towns_changed, sender=Article.towns.through)
+        thumbnails_generated.connect(image_thumbnailed, sender=Article)
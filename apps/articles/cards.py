@@ -0,0 +1,96 @@
+"""
+Card projection — the lightweight shape of an article on listing pages.
+
+Listing templates (_article_card.html, _featured_card.html, _most_read.html)
+only need a title, deck, image, byline and link. Loading full Article rows
+for them drags body_markdown and body_html across the wire and into worker
+memory for every card.
+
+cards(queryset) turns any Article queryset into one that selects only the
+columns in CARD_FIELDS (author name/role via a join, no select_related) and
+yields compact Card objects. The result is still a queryset, so it can be
+filtered, excluded, sliced and paginated as before.
+"""
+
+from django.db.models.query import BaseIterable, ValuesListIterable
+from django.urls import reverse
+
+from .models import CATEGORY_CHOICES, Article, format_byline, format_time_label
+
+CARD_FIELDS = (
+    "pk",
+    "title",
+    "slug",
+    "deck",
+    "category",
+    "published_at",
+    "main_image",
+    "hero_image",
+    "hero_alt",
+    "image_width",
+    "image_height",
+    "image_placeholder",
+    "is_sponsored",
+    "feature_frame",
+    "byline_override",
+    "author_id",
+    "author__name",
+    "author__role_title",
+)
+
+CATEGORY_LABELS = dict(CATEGORY_CHOICES)
+
+
+class Card:
+    """Read-only article summary with the attributes card templates use."""
+
+    __slots__ = CARD_FIELDS[:-2] + ("author_name", "author_role_title")
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"<Card {self.pk}: {self.title[:40]}>"
+
+    def get_absolute_url(self):
+        return reverse("articles:detail", kwargs={"slug": self.slug})
+
+    def get_category_display(self):
+        return CATEGORY_LABELS.get(self.category, self.category)
+
+    @property
+    def time_label(self):
+        return format_time_label(self.published_at)
+
+    @property
+    def byline_display(self):
+        if self.byline_override:
+            return self.byline_override
+        if self.author_name:
+            return format_byline(self.author_name, self.author_role_title)
+        return ""
+
+    @property
+    def display_image(self):
+        """main_image first, then hero_image — as a FieldFile for {% thumbnail %}."""
+        field_name = "main_image" if self.main_image else "hero_image"
+        name = getattr(self, field_name)
+        if not name:
+            return None
+        field = Article._meta.get_field(field_name)
+        # easy_thumbnails resolves aliases from the instance's model class
+        return field.attr_class(Article(pk=self.pk), field, name)
+
+
+class CardIterable(BaseIterable):
+    def __iter__(self):
+        rows = ValuesListIterable(self.queryset, self.chunked_fetch, self.chunk_size)
+        return (Card(*row) for row in rows)
+
+
+def cards(queryset):
+    """Project an Article queryset onto CARD_FIELDS, yielding Card objects."""
+    clone = queryset.values_list(*CARD_FIELDS)
+    clone._iterable_class = CardIterable
+    return clone
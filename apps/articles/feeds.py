@@ -0,0 +1,141 @@
+"""
+RSS and Atom feeds — the whole site, each section, town and author.
+
+Items are Cards (apps.articles.cards), so a feed reads the listing columns
+only, never article bodies. Each feed registers the same page-cache tag as
+the page it mirrors ("home", "section:news", "town:4", "author:3"), and
+every view is wrapped in cache_anonymous_page: a feed is rebuilt only after
+a publish or edit bumps its tag, and a poller sending If-None-Match or
+If-Modified-Since gets a 304 from the cache entry with no queries.
+"""
+
+from django.contrib.syndication.views import Feed
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from apps.core.models import SiteSettings
+from apps.core.page_cache import add_tags, cache_anonymous_page
+
+from .cards import cards
+from .models import CATEGORY_CHOICES, VALID_SECTIONS, Article, Author, Town, TownTimeline
+
+FEED_SIZE = 20
+
+
+class ArticleFeed(Feed):
+    """Newest published articles, newest first."""
+
+    def get_object(self, request, *args, **kwargs):
+        add_tags(request, "home")
+        return None
+
+    def articles(self, obj):
+        return Article.objects.filter(status="published")
+
+    def items(self, obj):
+        published = self.articles(obj).filter(published_at__isnull=False)
+        return cards(published.order_by("-published_at", "-pk"))[:FEED_SIZE]
+
+    def title(self, obj):
+        return SiteSettings.load().site_name
+
+    def description(self, obj):
+        return SiteSettings.load().tagline
+
+    def link(self, obj):
+        return reverse("core:home")
+
+    def item_title(self, card):
+        return card.title
+
+    def item_description(self, card):
+        return card.deck
+
+    def item_pubdate(self, card):
+        return card.published_at
+
+    def item_author_name(self, card):
+        return card.byline_display or None
+
+    def item_categories(self, card):
+        return [card.get_category_display()]
+
+
+class SectionFeed(ArticleFeed):
+    def get_object(self, request, section):
+        if section not in VALID_SECTIONS:
+            raise Http404
+        add_tags(request, f"section:{section}")
+        return section
+
+    def articles(self, section):
+        return Article.objects.filter(category=section, status="published")
+
+    def title(self, section):
+        return f"{dict(CATEGORY_CHOICES)[section]} — {SiteSettings.load().site_name}"
+
+    def link(self, section):
+        return reverse("section_page", kwargs={"section": section})
+
+
+class TownFeed(ArticleFeed):
+    def get_object(self, request, slug):
+        town = get_object_or_404(Town, slug=slug)
+        add_tags(request, f"town:{town.pk}")
+        return town
+
+    def articles(self, town):
+        # The town timeline's newest rows, not a join through Article.towns
+        newest = (
+            TownTimeline.objects.filter(town=town)
+            .order_by("-published_at", "-article_id")
+            .values("article_id")[:FEED_SIZE]
+        )
+        return Article.objects.filter(pk__in=newest)
+
+    def title(self, town):
+        return f"{town.name} — {SiteSettings.load().site_name}"
+
+    def description(self, town):
+        return town.description or f"Local news from {town.name}, {town.get_council_area_display()}."
+
+    def link(self, town):
+        return town.get_absolute_url()
+
+
+class AuthorFeed(ArticleFeed):
+    def get_object(self, request, slug):
+        author = get_object_or_404(Author, slug=slug)
+        add_tags(request, f"author:{author.pk}")
+        return author
+
+    def articles(self, author):
+        return Article.objects.filter(author=author, status="published")
+
+    def title(self, author):
+        return f"{author.name} — {SiteSettings.load().site_name}"
+
+    def description(self, author):
+        return f"Stories by {author.name}."
+
+    def link(self, author):
+        return author.get_absolute_url()
+
+
+def _atom(feed_class):
+    return type(f"Atom{feed_class.__name__}", (feed_class,), {
+        "feed_type": Atom1Feed,
+        "subtitle": feed_class.description,
+    })
+
+
+site_rss = cache_anonymous_page(ArticleFeed())
+site_atom = cache_anonymous_page(_atom(ArticleFeed)())
+section_rss = cache_anonymous_page(SectionFeed())
+section_atom = cache_anonymous_page(_atom(SectionFeed)())
+town_rss = cache_anonymous_page(TownFeed())
+town_atom = cache_anonymous_page(_atom(TownFeed)())
+author_rss = cache_anonymous_page(AuthorFeed())
+author_atom = cache_anonymous_page(_atom(AuthorFeed)())
@@ -0,0 +1,125 @@
+"""
+Section and town fronts — lead, secondary band and first grid page.
+
+A front used to take four or five queries: the lead, the secondaries, a
+COUNT and the grid page, each re-filtering the last with exclude(pk__in=…).
+build_front() fetches every row the front can show in one query and
+partitions it in Python:
+
+  - lead + secondaries are the top FRONT_SIZE rows by the front's curated
+    ordering (section_lead / section_priority for sections, newest first
+    for towns);
+  - the grid is the newest GRID_PAGE_SIZE rows not already on the front,
+    plus one row to know whether an older page exists.
+
+For sections the two orderings differ, so the query takes the top of each
+ordering (two LIMITed index scans) and ranks that handful of rows both ways
+with ROW_NUMBER(). The assembled front is memoised under the section/town
+page-cache tag for FRONT_CACHE_TIMEOUT, so repeated renders (and every
+cursor page, which reuses the front and runs only its keyset query) skip
+it entirely.
+"""
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from apps.core.page_cache import get_or_set_tagged
+
+from .cards import CARD_FIELDS, Card
+from .pagination import KeysetPage, KeysetPaginator, encode_cursor
+
+FRONT_SIZE = 4  # lead + three secondaries
+GRID_PAGE_SIZE = 12
+FRONT_CACHE_TIMEOUT = 60  # seconds
+# Rows a newest-first front can show: the front, the first grid page and
+# one more to know whether an older page exists
+FRONT_WINDOW = FRONT_SIZE + GRID_PAGE_SIZE + 1
+
+# Same ordering as KeysetPaginator, so the first grid page lines up with
+# the cursor pages after it
+TIMELINE_ORDERING = ("-published_at", "-pk")
+
+
+class Front:
+    """The rows a front shows above and in its first grid page."""
+
+    def __init__(self, lead, secondaries, grid, next_cursor):
+        self.lead = lead
+        self.secondaries = secondaries
+        self.grid = grid
+        self.next_cursor = next_cursor
+
+    @property
+    def pks(self):
+        return [card.pk for card in (self.lead, *self.secondaries) if card]
+
+
+def _fetch(queryset, lead_ordering):
+    """Candidate rows as (Card, lead_rank, time_rank), in one query."""
+    queryset = queryset.filter(published_at__isnull=False)
+    if lead_ordering is None:
+        rows = queryset.order_by(*TIMELINE_ORDERING).values_list(*CARD_FIELDS)[:FRONT_WINDOW]
+        return [(Card(*row), rank, rank) for rank, row in enumerate(rows, 1)]
+
+    # Two LIMITed index scans pick the candidates; the window functions
+    # then rank only those few rows.
+    by_lead = queryset.order_by(*lead_ordering, F("pk").desc()).values("pk")[:FRONT_SIZE]
+    by_time = queryset.order_by(*TIMELINE_ORDERING).values("pk")[:FRONT_WINDOW]
+    rows = (
+        queryset.filter(Q(pk__in=by_lead) | Q(pk__in=by_time))
+        .annotate(
+            lead_rank=Window(RowNumber(), order_by=[*lead_ordering, F("pk").desc()]),
+            time_rank=Window(RowNumber(), order_by=TIMELINE_ORDERING),
+        )
+        .order_by()
+        .values_list(*CARD_FIELDS, "lead_rank", "time_rank")
+    )
+    return [(Card(*row[:-2]), row[-2], row[-1]) for row in rows]
+
+
+def build_front(queryset, lead_ordering=None):
+    """Resolve a front from a published-article queryset.
+
+    ``lead_ordering`` ranks candidates for the lead and secondary band; by
+    default they are simply the newest stories.
+    """
+    rows = _fetch(queryset, lead_ordering)
+    if not rows:
+        return Front(None, [], [], None)
+
+    by_lead = sorted(rows, key=lambda r: r[1])[:FRONT_SIZE]
+    front_pks = {card.pk for card, _, _ in by_lead}
+    lead, *secondaries = [card for card, _, _ in by_lead]
+
+    grid = [
+        card
+        for card, _, _ in sorted(rows, key=lambda r: r[2])
+        if card.pk not in front_pks
+    ]
+    next_cursor = None
+    if len(grid) > GRID_PAGE_SIZE:
+        grid = grid[:GRID_PAGE_SIZE]
+        next_cursor = encode_cursor(grid[-1].published_at, grid[-1].pk)
+    return Front(lead, secondaries, grid, next_cursor)
+
+
+def get_front(cache_tag, queryset, lead_ordering=None):
+    """build_front(), memoised until ``cache_tag`` is invalidated."""
+    return get_or_set_tagged(
+        f"front:{cache_tag}",
+        [cache_tag],
+        lambda: build_front(queryset, lead_ordering),
+        FRONT_CACHE_TIMEOUT,
+    )
+
+
+def front_grid_page(front, queryset, count_key, before=None, after=None, paginator_class=KeysetPaginator):
+    """The grid below ``front``: its memoised first page, or a keyset page."""
+    paginator = paginator_class(
+        queryset.exclude(**{f"{paginator_class.pk_field}__in": front.pks}),
+        GRID_PAGE_SIZE,
+        count_key=count_key,
+    )
+    if before or after:
+        return paginator.get_page(before=before, after=after)
+    return KeysetPage(front.grid, paginator, next_cursor=front.next_cursor)
@@ -0,0 +1,101 @@
+"""
+Image sources for generate_hero_images.
+
+A source turns an article slug into image bytes. Each slug always maps to
+the same image, so re-running the command (or resuming it) is idempotent:
+
+  HTTPSource      — a URL template, "{seed}", "{width}" and "{height}"
+                    filled in per article; Lorem Picsum by default, or a
+                    local HTTP stand-in
+  DirectorySource — the files of a local directory, picked by seed
+
+image_source() builds one from the command's --source value. fetch()
+raises only FetchError; ``retryable`` says whether trying again could help
+(timeouts, connection errors, truncated responses, 429 and 5xx responses).
+"""
+
+import hashlib
+import http.client
+import socket
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+WIDTH, HEIGHT = 1200, 675  # 16:9
+PICSUM_URL = "https://picsum.photos/seed/{seed}/{width}/{height}"
+USER_AGENT = "LoudounProud/1.0"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+class FetchError(Exception):
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def slug_hash(slug):
+    return hashlib.md5(slug.encode(), usedforsecurity=False).hexdigest()[:8]
+
+
+def seed_for(slug):
+    """Stable per-article seed, so the same article always gets the same image."""
+    return int(slug_hash(slug), 16) % 1000
+
+
+class HTTPSource:
+    def __init__(self, url_template=PICSUM_URL, timeout=30, width=WIDTH, height=HEIGHT):
+        self.url_template = url_template
+        self.timeout = timeout
+        self.width = width
+        self.height = height
+
+    def __str__(self):
+        return self.url_template
+
+    def url_for(self, slug):
+        return self.url_template.format(seed=seed_for(slug), width=self.width, height=self.height)
+
+    def fetch(self, slug):
+        try:
+            url = self.url_for(slug)
+        except (KeyError, IndexError, ValueError) as exc:
+            raise FetchError(f"bad URL template {self.url_template!r}: {exc!r}") from exc
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as exc:
+            raise FetchError(f"HTTP {exc.code}", retryable=exc.code == 429 or exc.code >= 500) from exc
+        except (urllib.error.URLError, socket.timeout, ConnectionError) as exc:
+            raise FetchError(str(getattr(exc, "reason", exc)), retryable=True) from exc
+        except (http.client.HTTPException, OSError) as exc:
+            # IncompleteRead, RemoteDisconnected, TLS errors …
+            raise FetchError(repr(exc), retryable=True) from exc
+
+
+class DirectorySource:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not self.files:
+            raise ValueError(f"No images in {self.path}")
+
+    def __str__(self):
+        return str(self.path)
+
+    def fetch(self, slug):
+        try:
+            return self.files[seed_for(slug) % len(self.files)].read_bytes()
+        except OSError as exc:
+            raise FetchError(str(exc)) from exc
+
+
+def image_source(spec, timeout=30):
+    """Source for --source: "picsum", an http(s) URL template or a directory."""
+    if spec == "picsum":
+        return HTTPSource(PICSUM_URL, timeout=timeout)
+    if spec.startswith(("http://", "https://")):
+        return HTTPSource(spec, timeout=timeout)
+    if Path(spec).is_dir():
+        return DirectorySource(spec)
+    raise ValueError(f"Unknown image source {spec!r}: use 'picsum', an http(s) URL template or a directory")
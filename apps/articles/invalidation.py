@@ -0,0 +1,65 @@
+"""
+Cache invalidation for article changes.
+
+Every path that changes what readers see — Article.save, admin bulk actions,
+scheduled publishing — funnels through invalidate_articles() so the set of
+caches purged for an article is defined in one place.
+"""
+
+from apps.core.page_cache import invalidate_tags
+
+# Article sitemaps cover fixed pk ranges (apps.core.sitemaps), each cached
+# until an article in its range changes
+SITEMAP_CHUNK_SIZE = 5000
+
+
+def sitemap_tag(pk):
+    """Page cache tag of the article sitemap listing article ``pk``."""
+    return f"sitemap:{pk // SITEMAP_CHUNK_SIZE}"
+
+
+def article_tags(pks):
+    """Page cache tags for the pages that list or show these articles.
+
+    Two queries: one for the articles' section/author, one for their towns.
+    """
+    from .models import Article
+
+    pks = list(pks)
+    if not pks:
+        return set()
+
+    tags = {"home"}
+    rows = Article.objects.filter(pk__in=pks).values_list("pk", "category", "author_id")
+    for pk, category, author_id in rows:
+        tags.add(f"article:{pk}")
+        tags.add(f"section:{category}")
+        tags.add(sitemap_tag(pk))
+        if author_id:
+            tags.add(f"author:{author_id}")
+
+    town_ids = (
+        Article.towns.through.objects.filter(article_id__in=pks)
+        .values_list("town_id", flat=True)
+        .distinct()
+    )
+    tags.update(f"town:{town_id}" for town_id in town_ids)
+    return tags
+
+
+def invalidate_articles(pks, extra_tags=()):
+    """Purge cached pages showing any of the given articles.
+
+    Callers change status in bulk, so the slug map is rebuilt, the
+    articles' town timelines are rewritten and their related stories are
+    queued for a refresh too.
+    """
+    from .redirects import invalidate_slug_map
+    from .related import queue_related
+    from .timeline import sync_timeline
+
+    pks = list(pks)
+    sync_timeline(pks)
+    queue_related(pks)
+    invalidate_tags(*article_tags(pks), *extra_tags)
+    invalidate_slug_map()
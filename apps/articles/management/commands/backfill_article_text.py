@@ -0,0 +1,70 @@
+"""Back-fill body_hash and the plain-text fields for articles saved before they existed."""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.articles.models import Article
+from apps.articles.rendering import meta_description_for, rendered_fields
+from apps.articles.search import update_search_vectors
+from apps.core.page_cache import invalidate_tags
+
+# body_hash doubles as the "back-filled" marker: meta_description can stay
+# legitimately empty (no deck, no body), body_hash never does once rendered
+UPDATE_FIELDS = [
+    "updated",
+    "body_html",
+    "body_hash",
+    "plain_text",
+    "word_count",
+    "reading_time",
+    "meta_description",
+]
+
+
+class Command(BaseCommand):
+    help = "Compute the stored plain-text fields for articles saved before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every article, not just those never back-filled",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Articles per bulk_update (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        queryset = Article.objects.order_by("pk")
+        if not options["all"]:
+            queryset = queryset.filter(body_hash="")
+
+        done, last_pk = 0, 0
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk).values_list("pk", "deck", "body_markdown")[:batch_size]
+            )
+            if not rows:
+                break
+            now = timezone.now()
+            articles = []
+            for pk, deck, body_markdown in rows:
+                fields = rendered_fields(body_markdown)
+                articles.append(Article(
+                    pk=pk,
+                    updated=now,
+                    meta_description=meta_description_for(deck, fields["plain_text"]),
+                    **fields,
+                ))
+            Article.objects.bulk_update(articles, UPDATE_FIELDS)
+            update_search_vectors([pk for pk, _, _ in rows])
+            invalidate_tags(*(f"article:{pk}" for pk, _, _ in rows))
+            done += len(rows)
+            last_pk = rows[-1][0]
+            self.stdout.write(f"  {done} articles…")
+
+        self.stdout.write(self.style.SUCCESS(f"Back-filled text fields for {done} articles."))
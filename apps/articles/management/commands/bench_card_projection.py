@@ -0,0 +1,97 @@
+"""Compare full Article querysets against the card projection on listing shapes."""
+
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.articles.cards import cards
+from apps.articles.models import Article
+
+
+def _payload_bytes(queryset):
+    """Approximate bytes fetched from the database for a queryset's rows."""
+    sql, params = queryset.query.sql_with_params()
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            for value in row:
+                if value is None:
+                    continue
+                if isinstance(value, (bytes, memoryview)):
+                    total += len(value)
+                else:
+                    total += len(str(value).encode())
+    return total
+
+
+def _rss_kb():
+    """Resident set size in KB (Linux only; 0 elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+    import resource
+
+    return pages * resource.getpagesize() // 1024
+
+
+def _materialise(queryset):
+    tracemalloc.start()
+    rss_before = _rss_kb()
+    started = time.perf_counter()
+    rows = list(queryset)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_delta = _rss_kb() - rss_before
+    return rows, elapsed, retained, peak, rss_delta
+
+
+class Command(BaseCommand):
+    help = "Benchmark bytes fetched and memory for full Article rows vs. the card projection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=500,
+            help="Rows per listing query (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        published = Article.objects.filter(status="published")
+        shapes = {
+            "home grid": published.order_by("-published_at"),
+            "section": published.filter(category="news").order_by(
+                "-section_lead", "-section_priority", "-published_at"
+            ),
+            "most read": published.filter(exclude_from_most_read=False).order_by("-published_at"),
+        }
+
+        self.stdout.write(
+            f"{'shape':<12} {'variant':<8} {'rows':>6} {'fetched':>12} "
+            f"{'heap peak':>12} {'retained':>12} {'rss delta':>10} {'time':>9}"
+        )
+        for label, queryset in shapes.items():
+            variants = {
+                "full": queryset.select_related("author")[:limit],
+                "cards": cards(queryset)[:limit],
+            }
+            results = {}
+            for variant, qs in variants.items():
+                fetched = _payload_bytes(qs)
+                rows, elapsed, retained, peak, rss_delta = _materialise(qs)
+                results[variant] = fetched
+                self.stdout.write(
+                    f"{label:<12} {variant:<8} {len(rows):>6} {fetched:>11,}B "
+                    f"{peak:>11,}B {retained:>11,}B {rss_delta:>8,}KB {elapsed * 1000:>7.1f}ms"
+                )
+                del rows
+            if results["full"]:
+                saving = 100 * (1 - results["cards"] / results["full"])
+                self.stdout.write(self.style.SUCCESS(f"{label:<12} cards fetch {saving:.0f}% fewer bytes"))
@@ -0,0 +1,75 @@
+"""Compare admin-style ILIKE search against the full-text index."""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from apps.articles.cards import cards
+from apps.articles.models import Article
+from apps.articles.search import full_text_enabled, search_articles, search_query
+
+DEFAULT_QUERIES = ["council", "kilmarnock football", "planning application", "festival music", "zzzz"]
+
+
+def _timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+def _explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = "Benchmark ILIKE search against the tsvector/GIN search (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "queries",
+            nargs="*",
+            default=DEFAULT_QUERIES,
+            help="Search terms to time (default: a small built-in set)",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query (median reported)")
+        parser.add_argument("--explain", action="store_true", help="Print EXPLAIN ANALYZE for each plan")
+
+    def handle(self, *args, **options):
+        if not full_text_enabled():
+            raise CommandError("Full-text search needs PostgreSQL.")
+
+        total = Article.objects.count()
+        self.stdout.write(f"{total:,} articles")
+        published = Article.objects.filter(status="published")
+
+        self.stdout.write(f"{'query':<24} {'variant':<8} {'matches':>8} {'count':>10} {'page 1':>10}")
+        for terms in options["queries"]:
+            variants = {
+                "ilike": published.filter(
+                    Q(title__icontains=terms) | Q(deck__icontains=terms) | Q(body_markdown__icontains=terms)
+                ).order_by("-published_at"),
+                "fts": search_articles(published, terms),
+            }
+            for variant, queryset in variants.items():
+                matches, count_ms = _timed(queryset.count, options["repeat"])
+                page = cards(queryset)[:20]
+                _, page_ms = _timed(lambda: list(page), options["repeat"])
+                self.stdout.write(
+                    f"{terms[:24]:<24} {variant:<8} {matches:>8,} {count_ms:>8.1f}ms {page_ms:>8.1f}ms"
+                )
+                if options["explain"]:
+                    self.stdout.write(_explain(page))
+
+        admin_qs = Article.objects.filter(search_vector=search_query(DEFAULT_QUERIES[0]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Admin changelist uses the GIN index: {'Bitmap Index Scan' in _explain(admin_qs)}"
+        ))
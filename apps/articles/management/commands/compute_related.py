@@ -0,0 +1,110 @@
+"""Precompute each published article's related stories (see apps.articles.related)."""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.articles.models import Article
+from apps.articles.related import (
+    BLOCK_SIZE,
+    TOP_K,
+    build_corpus,
+    corpus_path,
+    dequeue_related,
+    load_corpus,
+    queued_related,
+    rebuild_related,
+    save_corpus,
+    update_related,
+)
+
+
+class Command(BaseCommand):
+    help = "Score articles by shared towns, category and TF-IDF text similarity and store the top neighbours."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--article",
+            type=int,
+            action="append",
+            default=[],
+            help="Only refresh this article and the ones it affects (repeatable)",
+        )
+        parser.add_argument(
+            "--since",
+            type=int,
+            metavar="MINUTES",
+            help="Only refresh articles updated in the last MINUTES and the ones they affect",
+        )
+        parser.add_argument(
+            "--queued",
+            action="store_true",
+            help="Only refresh the articles queued by saves and publishing since the last run (for cron)",
+        )
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=TOP_K,
+            help=f"Neighbours stored per article (default: {TOP_K})",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=BLOCK_SIZE,
+            help=f"Articles scored per matrix block (default: {BLOCK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        top_k = max(1, options["top_k"])
+        block_size = max(1, options["block_size"])
+
+        started = time.perf_counter()
+        incremental = options["article"] or options["since"] is not None or options["queued"]
+        corpus = load_corpus() if incremental else None
+        if corpus is not None:
+            self.stdout.write(
+                f"Loaded {len(corpus)} articles from {corpus_path()} in {time.perf_counter() - started:.1f}s"
+            )
+        else:
+            if incremental:
+                self.stdout.write(self.style.WARNING(f"No saved corpus at {corpus_path()}; vectorising the archive."))
+            corpus = build_corpus()
+            if corpus is not None:
+                self.stdout.write(
+                    f"Vectorised {len(corpus)} articles ({corpus.text.shape[1]} terms, "
+                    f"{corpus.towns.shape[1]} towns) in {time.perf_counter() - started:.1f}s"
+                )
+
+        if incremental:
+            now = timezone.now()
+            pks = set(options["article"])
+            if options["since"] is not None:
+                cutoff = now - timedelta(minutes=options["since"])
+                pks.update(Article.objects.filter(updated__gte=cutoff).values_list("pk", flat=True))
+            if options["queued"]:
+                queued = queued_related(now)
+                pks.update(queued)
+
+            refreshed = update_related(pks, top_k, block_size, corpus=corpus)
+            if corpus is not None:
+                save_corpus(corpus)
+            if options["queued"]:
+                dequeue_related(queued, now)
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed neighbours for {len(refreshed)} articles ({len(pks)} changed) "
+                f"in {time.perf_counter() - started:.1f}s."
+            ))
+            return
+
+        def progress(done, total):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {done}/{total} ({100 * done // total}%) — {done / elapsed:,.0f} articles/s")
+
+        total, changed = rebuild_related(top_k, block_size, corpus=corpus, progress=progress)
+        if corpus is not None:
+            save_corpus(corpus)
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored neighbours for {total} articles ({changed} changed) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,237 @@
+"""
+Pre-render the public archive to static HTML.
+
+Writes every published article, the homepage, each section front and the
+first page of every town and author page under STATIC_EXPORT_ROOT, as
+<path>/index.html, plus the sitemaps, robots.txt and manifest.json. Any web
+server or object store can then serve the archive while Django handles only
+the dynamic endpoints (api/track-view/, ads/track/, subscribe/ …).
+
+Runs are incremental. manifest.json records each page's content stamp: the
+article's `updated`, or for a listing page a digest of the (pk, updated)
+pairs of every article it lists, so a listing's stamp moves whenever an
+article joins or leaves it, not only when its newest one changes. Only
+pages whose stamp moved are rendered again, and pages whose article is no
+longer published are removed. --all re-renders everything, e.g. after a
+template change.
+
+Pages are rendered through the full request stack by worker processes.
+CSRF tokens are stripped, since a token baked into a static file would be
+shared by every reader; subscribe/ is csrf_exempt so exported signup forms
+still work.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from apps.articles.models import VALID_SECTIONS, Article, Author, Town
+from apps.core.sitemaps import article_chunks
+
+CSRF_INPUT_RE = re.compile(rb'<input type="hidden" name="csrfmiddlewaretoken" value="[^"]*">')
+ALWAYS_RENDER = (
+    "/sitemap.xml",
+    "/sitemap-static.xml",
+    "/sitemap-sections.xml",
+    "/sitemap-towns.xml",
+    "/sitemap-news.xml",
+    "/robots.txt",
+)
+
+
+def _output_file(root, path):
+    if path.endswith("/"):
+        return Path(root) / path.lstrip("/") / "index.html"
+    return Path(root) / path.lstrip("/")
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def render_pages(root, host, paths):
+    """Render ``paths`` into ``root``; return [(path, sha256, bytes, error), ...]."""
+    from django.test import Client
+
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    results = []
+    for path in paths:
+        response = client.get(path)
+        if response.status_code != 200:
+            results.append((path, None, 0, f"HTTP {response.status_code}"))
+            continue
+        content = CSRF_INPUT_RE.sub(b"", response.content)
+        target = _output_file(root, path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+        results.append((path, hashlib.sha256(content).hexdigest(), len(content), None))
+    return results
+
+
+def _stamp(value):
+    return value.isoformat() if value else None
+
+
+class Command(BaseCommand):
+    help = "Render published articles and listing pages to static HTML with a manifest."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=str(settings.STATIC_EXPORT_ROOT),
+            help="Output directory (default: STATIC_EXPORT_ROOT)",
+        )
+        parser.add_argument(
+            "--host",
+            default=next((h for h in settings.ALLOWED_HOSTS if not h.startswith(".") and h != "*"), "localhost"),
+            help="Host to render pages for (absolute URLs, canonical links)",
+        )
+        parser.add_argument("--all", action="store_true", help="Ignore the manifest and render every page")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Render processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50,
+            help="Pages per worker task (default: 50)",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options["output"])
+        root.mkdir(parents=True, exist_ok=True)
+        manifest_path = root / "manifest.json"
+        previous = {}
+        if manifest_path.exists() and not options["all"]:
+            previous = json.loads(manifest_path.read_text()).get("pages", {})
+
+        stamps = self._page_stamps()
+        todo = [
+            path
+            for path, stamp in stamps.items()
+            if path in ALWAYS_RENDER
+            or previous.get(path, {}).get("stamp") != stamp
+            or not _output_file(root, path).exists()
+        ]
+        removed = [path for path in previous if path not in stamps]
+
+        self.stdout.write(
+            f"{len(stamps)} pages: {len(todo)} to render, {len(stamps) - len(todo)} unchanged, "
+            f"{len(removed)} to remove"
+        )
+
+        pages = {path: entry for path, entry in previous.items() if path in stamps}
+        started = time.perf_counter()
+        failures = self._render(root, options, todo, stamps, pages, started)
+
+        for path in removed:
+            _output_file(root, path).unlink(missing_ok=True)
+
+        manifest = {
+            "generated": timezone.now().isoformat(),
+            "host": options["host"],
+            "pages": dict(sorted(pages.items())),
+        }
+        tmp = manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp, manifest_path)
+
+        elapsed = time.perf_counter() - started
+        message = f"Rendered {len(todo) - failures} pages in {elapsed:.1f}s → {root}"
+        if failures:
+            self.stdout.write(self.style.WARNING(f"{message} ({failures} failed)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def _page_stamps(self):
+        """{path: content stamp} for every page to export.
+
+        One pass over the published articles, in pk order, feeds each
+        listing's digest.
+        """
+        published = Article.objects.filter(status="published")
+        towns_of = defaultdict(list)
+        links = Article.towns.through.objects.filter(article__status="published").values_list("article_id", "town_id")
+        for article_id, town_id in links.iterator():
+            towns_of[article_id].append(town_id)
+
+        stamps = {}
+        listings = defaultdict(hashlib.sha256)
+        rows = published.order_by("pk").values_list("pk", "slug", "updated", "category", "author_id")
+        for pk, slug, updated, category, author_id in rows.iterator():
+            stamps[f"/article/{slug}/"] = _stamp(updated)
+            entry = f"{pk}:{_stamp(updated)};".encode()
+            for key in ("/", f"section:{category}", f"author:{author_id}", *(f"town:{t}" for t in towns_of[pk])):
+                listings[key].update(entry)
+
+        def listing(key):
+            return (listings[key] if key in listings else hashlib.sha256()).hexdigest()
+
+        stamps["/"] = listing("/")
+        for section in VALID_SECTIONS:
+            stamps[f"/{section}/"] = listing(f"section:{section}")
+        for pk, slug in Town.objects.values_list("pk", "slug"):
+            stamps[f"/towns/{slug}/"] = listing(f"town:{pk}")
+        authors = [int(key.split(":")[1]) for key in listings if key.startswith("author:") and key != "author:None"]
+        for pk, slug in Author.objects.filter(pk__in=authors).values_list("pk", "slug"):
+            stamps[f"/authors/{slug}/"] = listing(f"author:{pk}")
+
+        for chunk, lastmod in article_chunks():
+            stamps[f"/sitemap-articles-{chunk}.xml"] = _stamp(lastmod)
+
+        for path in ALWAYS_RENDER:
+            stamps[path] = stamps["/"]
+        return stamps
+
+    def _render(self, root, options, todo, stamps, pages, started):
+        chunk_size = max(1, options["chunk_size"])
+        chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+        workers = max(1, min(options["workers"], len(chunks) or 1))
+
+        # Forked workers must not inherit the parent's database connections
+        connections.close_all()
+        if workers == 1:
+            results = (render_pages(root, options["host"], chunk) for chunk in chunks)
+            return self._collect(results, stamps, pages, len(todo), started)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(render_pages, [root] * len(chunks), [options["host"]] * len(chunks), chunks)
+            return self._collect(results, stamps, pages, len(todo), started)
+
+    def _collect(self, results, stamps, pages, total, started):
+        done = failures = 0
+        rendered_at = timezone.now().isoformat()
+        for chunk in results:
+            for path, digest, size, error in chunk:
+                done += 1
+                if error:
+                    failures += 1
+                    pages.pop(path, None)
+                    self.stderr.write(f"  {path}: {error}")
+                    continue
+                pages[path] = {
+                    "file": str(_output_file("", path)),
+                    "sha256": digest,
+                    "bytes": size,
+                    "stamp": stamps[path],
+                    "rendered": rendered_at,
+                }
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {done}/{total} — {done / elapsed:,.0f} pages/s")
+        return failures
@@ -0,0 +1,77 @@
+"""Publish scheduled articles on time, sleeping until the next one is due.
+
+The publisher is a process of its own, so its cache purges only reach the
+web workers through a shared cache: it refuses to start while
+PAGE_CACHE_ALIAS points at a per-process backend such as LocMemCache.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.articles.publishing import next_due_at, publish_due_articles
+from apps.core.page_cache import is_shared
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run the scheduled-article publisher (or a single pass with --once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Publish whatever is due now and exit (for cron)",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=15,
+            help="Longest sleep in seconds before re-reading the schedule, so "
+                 "newly scheduled or rescheduled articles are noticed (default: 15)",
+        )
+
+    def handle(self, *args, **options):
+        if not is_shared():
+            raise CommandError(
+                f"PAGE_CACHE_ALIAS ({getattr(settings, 'PAGE_CACHE_ALIAS', 'default')!r}) is a "
+                "per-process cache, so web workers would never see this publisher's "
+                "invalidations. Point it at a shared backend such as redis."
+            )
+
+        if options["once"]:
+            self._publish()
+            return
+
+        poll = max(0.1, options["poll"])
+        self.stdout.write("Scheduled publisher running — Ctrl+C to stop.")
+        try:
+            while True:
+                delay = poll
+                try:
+                    self._publish()
+                    due = next_due_at()
+                    if due is not None:
+                        delay = min(poll, max(0.0, (due - timezone.now()).total_seconds()))
+                except Exception:
+                    # A lost connection or a failed purge must not stop the publisher;
+                    # the next pass retries whatever is still due.
+                    logger.exception("Scheduled publishing pass failed")
+                    self.stderr.write(self.style.ERROR("Publishing pass failed; retrying."))
+                close_old_connections()
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
+
+    def _publish(self):
+        pks = publish_due_articles()
+        if pks:
+            self.stdout.write(self.style.SUCCESS(
+                f"{timezone.now():%Y-%m-%d %H:%M:%S} published {len(pks)} article(s): "
+                + ", ".join(map(str, pks))
+            ))
@@ -0,0 +1,123 @@
+"""Re-render article bodies whose stored body_html is stale, across a process pool."""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from apps.articles.models import Article
+from apps.articles.rendering import body_hash, meta_description_for, render_batch
+from apps.articles.search import update_search_vectors
+from apps.core.page_cache import invalidate_tags
+
+# `updated` too: bulk_update skips auto_now, and export_static re-exports
+# article pages by it
+UPDATE_FIELDS = [
+    "updated",
+    "body_html",
+    "body_hash",
+    "plain_text",
+    "word_count",
+    "reading_time",
+    "meta_description",
+]
+
+
+class Command(BaseCommand):
+    help = "Re-render body_html for articles whose body or Markdown renderer has changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every article, not just stale ones",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Render processes (default: CPU count; 1 renders in-process)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Articles per render task and per bulk_update (default: 200)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        workers = max(1, options["workers"])
+
+        total = Article.objects.count()
+        self.stdout.write(f"Checking {total} articles with {workers} worker(s)…")
+        batches = self._stale_batches(batch_size, options["all"])
+        started = time.perf_counter()
+        if workers == 1:
+            self._write_all(((render_batch(batch), scanned) for batch, scanned in batches), total, started)
+            return
+
+        # Forked workers must not inherit the parent's database connection:
+        # close it, and fork them all (the first submit does) before the
+        # scan opens another
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pool.submit(int).result()
+            self._write_all(self._render_in_pool(pool, batches, 2 * workers), total, started)
+
+    def _stale_batches(self, batch_size, rerender_all):
+        """Yield (batch, articles scanned so far); a batch lists (pk, body_markdown) needing a render."""
+        rows = Article.objects.order_by("pk").values_list("pk", "body_markdown", "body_hash")
+        batch = []
+        scanned = 0
+        for pk, body, stored_hash in rows.iterator(chunk_size=2000):
+            scanned += 1
+            if rerender_all or body_hash(body) != stored_hash:
+                batch.append((pk, body))
+                if len(batch) == batch_size:
+                    yield batch, scanned
+                    batch = []
+        if batch:
+            yield batch, scanned
+
+    def _render_in_pool(self, pool, batches, in_flight):
+        """Yield (rendered, scanned) in order, with at most ``in_flight`` batches queued in the pool."""
+        pending = deque()
+        for batch, scanned in batches:
+            pending.append((pool.submit(render_batch, batch), scanned))
+            if len(pending) >= in_flight:
+                future, scanned = pending.popleft()
+                yield future.result(), scanned
+        while pending:
+            future, scanned = pending.popleft()
+            yield future.result(), scanned
+
+    def _write_all(self, results, total, started):
+        done = 0
+        for rendered, scanned in results:
+            decks = dict(Article.objects.filter(pk__in=[pk for pk, _ in rendered]).values_list("pk", "deck"))
+            now = timezone.now()
+            articles = []
+            for pk, fields in rendered:
+                article = Article(pk=pk, updated=now, **fields)
+                article.meta_description = meta_description_for(decks.get(pk), fields["plain_text"])
+                articles.append(article)
+            Article.objects.bulk_update(articles, UPDATE_FIELDS)
+            update_search_vectors([pk for pk, _ in rendered])
+            invalidate_tags(*(f"article:{pk}" for pk, _ in rendered))
+            done += len(rendered)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  {done} re-rendered, {scanned}/{total} checked ({100 * scanned // total}%) "
+                f"— {done / elapsed:,.0f} articles/s"
+            )
+
+        if not done:
+            self.stdout.write(self.style.SUCCESS("All article bodies are up to date."))
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Re-rendered {done} articles in {elapsed:.1f}s."))
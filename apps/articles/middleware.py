@@ -1,13 +1,18 @@
-from django.utils import timezone
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 
 
 class PublishScheduledMiddleware:
     """Auto-publish scheduled articles when their publish time arrives.
 
     Uses Django's default cache to throttle checks to at most once per 60 seconds.
+    Disabled with PUBLISH_IN_REQUEST = False once `manage.py publish_scheduled`
+    runs as its own process.
     """
 
     def __init__(self, get_response):
+        if not getattr(settings, "PUBLISH_IN_REQUEST", True):
+            raise MiddlewareNotUsed
         self.get_response = get_response
 
     def __call__(self, request):
@@ -15,11 +20,8 @@ class PublishScheduledMiddleware:
 
         if not cache.get("_publish_check"):
             cache.set("_publish_check", True, timeout=60)
-            from apps.articles.models import Article
+            from apps.articles.publishing import publish_due_articles
 
-            Article.objects.filter(
-                status="scheduled",
-                published_at__lte=timezone.now(),
-            ).update(status="published")
+            publish_due_articles()
 
         return self.get_response(request)
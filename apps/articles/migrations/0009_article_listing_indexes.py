@@ -0,0 +1,41 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0008_add_main_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_featured', True), ('status', 'published')), fields=['sort_order', '-created'], name='article_home_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('homepage_secondary', True), ('status', 'published')), fields=['-secondary_priority', '-published_at'], name='article_home_secondary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at', '-id'], name='article_pub_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-section_lead', '-section_priority', '-published_at'], name='article_section_front_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-published_at', '-id'], name='article_section_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['author', '-published_at', '-id'], name='article_author_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'scheduled')), fields=['published_at'], name='article_scheduled_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_article_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='body_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Digest of the body and renderer that produced body_html', max_length=64),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_article_body_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='meta_description',
+            field=models.CharField(blank=True, editable=False, max_length=160),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # The same expression (and SEARCH_CONFIG) as apps.articles.search, so the
+    # backfilled vectors match the queries
+    from apps.articles.search import search_vector
+
+    Article = apps.get_model("articles", "Article")
+    Article.objects.update(search_vector=search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0011_article_text_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
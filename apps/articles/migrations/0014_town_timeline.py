@@ -0,0 +1,44 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_timeline(apps, schema_editor):
+    Article = apps.get_model("articles", "Article")
+    TownTimeline = apps.get_model("articles", "TownTimeline")
+    links = Article.towns.through.objects.filter(
+        article__status="published", article__published_at__isnull=False
+    ).values_list("town_id", "article_id", "article__published_at", "town__council_area")
+    TownTimeline.objects.bulk_create(
+        (
+            TownTimeline(town_id=town_id, article_id=article_id, published_at=published_at, council_area=area)
+            for town_id, article_id, published_at, area in links.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0013_related_article'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TownTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_at', models.DateTimeField()),
+                ('council_area', models.CharField(choices=[('east_ayrshire', 'East Ayrshire'), ('north_ayrshire', 'North Ayrshire'), ('south_ayrshire', 'South Ayrshire')], max_length=20)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='town_timeline', to='articles.article')),
+                ('town', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='articles.town')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['town', '-published_at', '-article'], name='town_timeline_idx')],
+                'constraints': [models.UniqueConstraint(fields=('town', 'article'), name='town_timeline_unique')],
+            },
+        ),
+        migrations.RunPython(populate_timeline, migrations.RunPython.noop),
+    ]
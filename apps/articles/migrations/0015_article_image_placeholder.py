@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0014_town_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred data: URI shown while the image loads'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.11 on 2026-10-18 09:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0015_article_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedQueue',
+            fields=[
+                ('article_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,9 +1,23 @@
-import markdown
-from django.db import models
+import re
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Length
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import slugify
 
+from apps.core.page_cache import invalidate_tags
+
+from .invalidation import article_tags, invalidate_articles, sitemap_tag
+from .placeholders import display_image_changed
+from .redirects import invalidate_slug_map
+from .related import queue_related
+from .rendering import body_hash, meta_description_for, rendered_fields
+from .search import update_search_vectors
+from .timeline import sync_timeline
+
 
 STATUS_CHOICES = [
     ("draft", "Draft"),
@@ -37,6 +51,32 @@ SECTION_DESCRIPTIONS = {
 }
 
 
+def format_time_label(published_at):
+    """Relative publish time for cards: 'Just now', '3 hours ago', '12 Feb 2026'."""
+    if not published_at:
+        return ""
+    now = timezone.now()
+    diff = now - published_at
+    if diff.days == 0:
+        hours = diff.seconds // 3600
+        if hours < 1:
+            return "Just now"
+        if hours == 1:
+            return "1 hour ago"
+        return f"{hours} hours ago"
+    if diff.days == 1:
+        return "Yesterday"
+    if diff.days < 7:
+        return f"{diff.days} days ago"
+    return published_at.strftime("%-d %b %Y")
+
+
+def format_byline(name, role_title):
+    if role_title:
+        return f"{name}, {role_title}"
+    return name
+
+
 class Author(models.Model):
     name = models.CharField(max_length=200, verbose_name="Display name")
     slug = models.SlugField(unique=True)
@@ -61,6 +101,10 @@ class Author(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_tags(f"author:{self.pk}")
+
     def get_absolute_url(self):
         return reverse("author_detail", kwargs={"slug": self.slug})
 
@@ -85,21 +129,48 @@ class Town(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        TownTimeline.objects.filter(town=self).exclude(council_area=self.council_area).update(
+            council_area=self.council_area
+        )
+        # Town names appear in the nav on every page
+        invalidate_tags("towns", f"town:{self.pk}")
+
     def get_absolute_url(self):
         return reverse("town_page", kwargs={"slug": self.slug})
 
 
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+
 class Article(models.Model):
     title = models.CharField(max_length=300)
     slug = models.SlugField(max_length=300, unique=True)
     deck = models.CharField(max_length=500, blank=True, help_text="Standfirst / summary shown below the headline")
     body_markdown = models.TextField(blank=True, verbose_name="Body (Markdown)")
     body_html = models.TextField(editable=False, blank=True)
+    body_hash = models.CharField(
+        max_length=64, editable=False, blank=True,
+        help_text="Digest of the body and renderer that produced body_html",
+    )
+    plain_text = models.TextField(editable=False, blank=True)
+    meta_description = models.CharField(max_length=160, editable=False, blank=True)
+    word_count = models.PositiveIntegerField(editable=False, default=0)
+    reading_time = models.PositiveSmallIntegerField(editable=False, default=0, help_text="Minutes")
+    search_vector = SearchVectorField(null=True, editable=False)
 
     main_image = models.ImageField(upload_to="articles/", blank=True, help_text="Primary article image — used on cards and at the top of the article page")
     hero_image = models.ImageField(upload_to="articles/", blank=True)
     hero_caption = models.CharField(max_length=200, blank=True)
     hero_alt = models.CharField(max_length=200, blank=True)
+    # Of display_image, filled in off the request path (apps.articles.placeholders)
+    image_width = models.PositiveIntegerField(editable=False, null=True)
+    image_height = models.PositiveIntegerField(editable=False, null=True)
+    image_placeholder = models.TextField(
+        editable=False, blank=True,
+        help_text="Tiny blurred data: URI shown while the image loads",
+    )
 
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="news")
     author = models.ForeignKey(
@@ -143,78 +214,170 @@ class Article(models.Model):
         ordering = ["sort_order", "-created"]
         verbose_name = "Article"
         verbose_name_plural = "Articles"
+        # One index per public listing query shape, partial on the status
+        # each query filters by. apps/articles/test_query_plans.py checks
+        # the planner keeps using them.
+        indexes = [
+            # Homepage lead: is_featured, default ordering
+            models.Index(
+                fields=["sort_order", "-created"],
+                condition=models.Q(status="published", is_featured=True),
+                name="article_home_featured_idx",
+            ),
+            # Homepage secondary band
+            models.Index(
+                fields=["-secondary_priority", "-published_at"],
+                condition=models.Q(status="published", homepage_secondary=True),
+                name="article_home_secondary_idx",
+            ),
+            # Homepage grid, town pages, sitemap — keyset on (published_at, pk)
+            models.Index(
+                fields=["-published_at", "-id"],
+                condition=models.Q(status="published"),
+                name="article_pub_timeline_idx",
+            ),
+            # Section lead and secondary band
+            models.Index(
+                fields=["category", "-section_lead", "-section_priority", "-published_at"],
+                condition=models.Q(status="published"),
+                name="article_section_front_idx",
+            ),
+            # Section grid — keyset on (published_at, pk)
+            models.Index(
+                fields=["category", "-published_at", "-id"],
+                condition=models.Q(status="published"),
+                name="article_section_time_idx",
+            ),
+            # Author page grid — keyset on (published_at, pk)
+            models.Index(
+                fields=["author", "-published_at", "-id"],
+                condition=models.Q(status="published"),
+                name="article_author_time_idx",
+            ),
+            # Scheduled publishing: next due article
+            models.Index(
+                fields=["published_at"],
+                condition=models.Q(status="scheduled"),
+                name="article_scheduled_idx",
+            ),
+            # Full-text search (apps.articles.search)
+            GinIndex(fields=["search_vector"], name="article_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
         # Auto-generate slug from title on first save
-        if not self.slug:
-            base_slug = slugify(self.title)[:290]
-            slug = base_slug
-            n = 1
-            while Article.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{n}"
-                n += 1
-            self.slug = slug
+        auto_slug = not self.slug
+        if auto_slug:
+            self.slug = self._free_slug()
+
+        previous = None
+        if self.pk:
+            previous = (
+                Article.objects.filter(pk=self.pk)
+                .values("slug", "status", "published_at", "title", "deck", "body_hash", "main_image", "hero_image")
+                .first()
+            )
 
         # Track slug changes on published articles for redirects
-        if self.pk and self.status == "published":
-            try:
-                old = Article.objects.get(pk=self.pk)
-                if old.slug and old.slug != self.slug:
-                    SlugRedirect.objects.get_or_create(
-                        old_slug=old.slug,
-                        defaults={"article": self},
-                    )
-            except Article.DoesNotExist:
-                pass
-
-        # Render markdown → HTML
-        if self.body_markdown:
-            self.body_html = markdown.markdown(
-                self.body_markdown,
-                extensions=["extra", "smarty", "toc"],
-            )
-        else:
-            self.body_html = ""
+        if previous and self.status == "published":
+            old_slug = previous["slug"]
+            if old_slug and old_slug != self.slug:
+                SlugRedirect.objects.get_or_create(
+                    old_slug=old_slug,
+                    defaults={"article": self},
+                )
+
+        # Render markdown → HTML (and its plain-text fields), unless
+        # body_html is already this body's
+        if body_hash(self.body_markdown) != self.body_hash:
+            for field, value in rendered_fields(self.body_markdown).items():
+                setattr(self, field, value)
+        self.meta_description = meta_description_for(self.deck, self.plain_text)
 
         # Auto-set published_at when publishing
         if self.status == "published" and not self.published_at:
             self.published_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        # Pages listing the article under its previous section/author/towns
+        previous_tags = article_tags([self.pk]) if self.pk else set()
+
+        if auto_slug:
+            self._save_with_slug_retry(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        invalidate_tags(*previous_tags, *self.cache_tags(), sitemap_tag(self.pk))
+        # Published, unpublished or renamed while published
+        was_published = previous is not None and previous["status"] == "published"
+        moved = previous is None or (previous["slug"], previous["status"]) != (self.slug, self.status)
+        if (self.status == "published" or was_published) and moved:
+            invalidate_slug_map()
+
+        # New articles have no towns yet; m2m_changed fills their timeline
+        listed = ("status", "published_at")
+        if previous and any(previous[f] != getattr(self, f) for f in listed):
+            sync_timeline([self.pk])
+
+        searchable = ("title", "deck", "body_hash")
+        if previous is None or any(previous[f] != getattr(self, f) for f in searchable):
+            update_search_vectors([self.pk])
+
+        if self.status == "published" or was_published:
+            queue_related([self.pk])
+
+        if previous and (previous["main_image"] or previous["hero_image"]) != (self.display_image.name or ""):
+            display_image_changed(self)
+
+    def _free_slug(self):
+        """First free slug for the title: "title", then "title-1", "title-2", …
+
+        One query: of the existing slugs shaped "<base>" or "<base>-<n>", the
+        longest-then-greatest is the one with the highest n.
+        """
+        base = slugify(self.title)[:290]
+        highest = (
+            Article.objects.filter(slug__startswith=base, slug__regex=rf"^{re.escape(base)}(-[0-9]+)?$")
+            .exclude(pk=self.pk)
+            .order_by(Length("slug").desc(), "-slug")
+            .values_list("slug", flat=True)
+            .first()
+        )
+        if highest is None:
+            return base
+        suffix = highest[len(base) + 1:]
+        return f"{base}-{int(suffix) + 1 if suffix else 1}"
+
+    def _save_with_slug_retry(self, *args, **kwargs):
+        """Save, re-allocating the slug if a concurrent save took it first."""
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                last = attempt == SLUG_ALLOCATION_ATTEMPTS - 1
+                if last or not Article.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
+                    raise
+                self.slug = self._free_slug()
+
+    def delete(self, *args, **kwargs):
+        invalidate_articles([self.pk])
+        return super().delete(*args, **kwargs)
+
+    def cache_tags(self):
+        """Page cache tags for this article's own pages (towns excluded)."""
+        tags = ["home", f"article:{self.pk}", f"section:{self.category}"]
+        if self.author_id:
+            tags.append(f"author:{self.author_id}")
+        return tags
 
     def get_absolute_url(self):
         return reverse("articles:detail", kwargs={"slug": self.slug})
 
     @property
     def time_label(self):
-        if not self.published_at:
-            return ""
-        now = timezone.now()
-        diff = now - self.published_at
-        if diff.days == 0:
-            hours = diff.seconds // 3600
-            if hours < 1:
-                return "Just now"
-            if hours == 1:
-                return "1 hour ago"
-            return f"{hours} hours ago"
-        if diff.days == 1:
-            return "Yesterday"
-        if diff.days < 7:
-            return f"{diff.days} days ago"
-        return self.published_at.strftime("%-d %b %Y")
-
-    @property
-    def meta_description(self):
-        if self.deck:
-            return self.deck[:160]
-        # Strip HTML and take first 160 chars of body
-        from django.utils.html import strip_tags
-        plain = strip_tags(self.body_html)
-        return plain[:160] if plain else ""
+        return format_time_label(self.published_at)
 
     @property
     def byline_display(self):
@@ -222,10 +385,7 @@ class Article(models.Model):
         if self.byline_override:
             return self.byline_override
         if self.author:
-            name = self.author.name
-            if self.author.role_title:
-                return f"{name}, {self.author.role_title}"
-            return name
+            return format_byline(self.author.name, self.author.role_title)
         return ""
 
     @property
@@ -257,6 +417,63 @@ class Article(models.Model):
         return self.get_absolute_url()
 
 
+class RelatedArticle(models.Model):
+    """A precomputed "related stories" neighbour (see apps.articles.related)."""
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="related_links")
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="related_from")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["article", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["article", "rank"], name="related_article_rank_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} → {self.related_id} ({self.score:.3f})"
+
+
+class RelatedQueue(models.Model):
+    """An article whose related stories need refreshing (see apps.articles.related).
+
+    Keyed by the bare pk rather than a foreign key, so deleted articles can
+    be queued too.
+    """
+
+    article_id = models.BigIntegerField(primary_key=True)
+    queued_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.article_id} @ {self.queued_at:%Y-%m-%d %H:%M}"
+
+
+class TownTimeline(models.Model):
+    """One row per (town, published article), kept by apps.articles.timeline.
+
+    Town pages, per-town counts and council-area totals read this table
+    alone instead of joining articles through Article.towns.
+    """
+
+    # town_timeline_idx leads with town, so the FK needs no index of its own
+    town = models.ForeignKey(Town, on_delete=models.CASCADE, related_name="timeline", db_index=False)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="town_timeline")
+    published_at = models.DateTimeField()
+    council_area = models.CharField(max_length=20, choices=COUNCIL_AREA_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["town", "article"], name="town_timeline_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["town", "-published_at", "-article"], name="town_timeline_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.town_id}: {self.article_id} @ {self.published_at:%Y-%m-%d %H:%M}"
+
+
 class SlugRedirect(models.Model):
     old_slug = models.SlugField(max_length=300, unique=True)
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="slug_redirects")
@@ -268,3 +485,11 @@ class SlugRedirect(models.Model):
 
     def __str__(self):
         return f"{self.old_slug} → {self.article.slug}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_slug_map()
+
+    def delete(self, *args, **kwargs):
+        invalidate_slug_map()
+        return super().delete(*args, **kwargs)
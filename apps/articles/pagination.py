@@ -0,0 +1,161 @@
+"""
+Keyset (cursor) pagination over (published_at, pk).
+
+A cursor is an opaque, URL-safe token encoding the sort key of a row. Pages
+are addressed relative to a cursor — ?before=<cursor> for older stories,
+?after=<cursor> for newer ones. Each page is a single indexed range scan
+with no COUNT(*) and no OFFSET, so page 400 costs the same as page 1.
+
+The total number of rows is optional and approximate: when a count_key is
+given, the COUNT runs at most once per APPROXIMATE_COUNT_TTL and is shared
+by every page and every reader.
+"""
+
+import base64
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+APPROXIMATE_COUNT_TTL = 600  # seconds
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(published_at, pk):
+    """Pack a (published_at, pk) sort key into a URL-safe token."""
+    micros = (published_at - EPOCH) // MICROSECOND
+    raw = f"{micros}.{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Unpack a token from encode_cursor(). Raises InvalidCursor on garbage."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        micros, pk = base64.urlsafe_b64decode(padded.encode()).decode().split(".")
+        return EPOCH + int(micros) * MICROSECOND, int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError, OverflowError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage(Sequence):
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<KeysetPage ({len(self)} items)>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        """Older stories exist (link with ?before=next_cursor)."""
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        """Newer stories exist (link with ?after=previous_cursor)."""
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def approximate_total(self):
+        return self.paginator.approximate_count()
+
+
+class KeysetPaginator:
+    """Paginate a queryset newest-first on (published_at, pk).
+
+    Rows without a published_at are never returned — they have no position
+    in the timeline. Subclasses paging a table other than articles set
+    ``pk_field`` to its article column and turn rows into cards in
+    ``hydrate()``.
+    """
+
+    pk_field = "pk"
+
+    def __init__(self, queryset, per_page, count_key=None):
+        self.queryset = queryset.filter(published_at__isnull=False)
+        self.per_page = per_page
+        self.count_key = count_key
+
+    def approximate_count(self):
+        """Cached row count, or None when no count_key was given."""
+        if not self.count_key:
+            return None
+        return cache.get_or_set(
+            f"keyset_count:{self.count_key}",
+            self.queryset.count,
+            APPROXIMATE_COUNT_TTL,
+        )
+
+    def hydrate(self, rows):
+        """The objects a page shows for ``rows``."""
+        return rows
+
+    def _row_cursor(self, row):
+        return encode_cursor(row.published_at, getattr(row, self.pk_field))
+
+    def get_page(self, before=None, after=None):
+        """Return the page older than ``before`` or newer than ``after``.
+
+        With neither (or an invalid cursor) the newest page is returned.
+        """
+        if after:
+            try:
+                return self._page_after(*decode_cursor(after))
+            except InvalidCursor:
+                pass
+        if before:
+            try:
+                return self._page_before(*decode_cursor(before))
+            except InvalidCursor:
+                pass
+        return self._page_before(None, None)
+
+    def _page_before(self, published_at, pk):
+        queryset = self.queryset
+        if published_at is not None:
+            queryset = queryset.filter(
+                Q(published_at__lt=published_at)
+                | Q(published_at=published_at, **{f"{self.pk_field}__lt": pk})
+            )
+        rows = list(queryset.order_by("-published_at", f"-{self.pk_field}")[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = self._row_cursor(rows[-1])
+        # Arriving via a cursor means the row it points at is newer
+        previous_cursor = self._row_cursor(rows[0]) if rows and published_at is not None else None
+        return KeysetPage(self.hydrate(rows), self, next_cursor, previous_cursor)
+
+    def _page_after(self, published_at, pk):
+        queryset = self.queryset.filter(
+            Q(published_at__gt=published_at)
+            | Q(published_at=published_at, **{f"{self.pk_field}__gt": pk})
+        )
+        rows = list(queryset.order_by("published_at", self.pk_field)[: self.per_page + 1])
+        previous_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            previous_cursor = self._row_cursor(rows[-1])
+        rows.reverse()
+        if not rows:
+            return self._page_before(None, None)
+        # Arriving via a cursor means the row it points at is older
+        next_cursor = self._row_cursor(rows[-1])
+        return KeysetPage(self.hydrate(rows), self, next_cursor, previous_cursor)
@@ -0,0 +1,74 @@
+"""
+Blur placeholders — display_image's size and a tiny inline preview.
+
+Cards and the article hero render the placeholder as the image's
+background, so a lazy image occupies its box with a blurred preview of
+itself instead of a blank one, at no extra request. The values are stored
+on the article (image_width, image_height, image_placeholder) and travel
+with every Card.
+
+They are computed once per image on the thumbnail pool: when an image's
+thumbnails have been generated (apps.core.thumbnails.thumbnails_generated)
+and it is the article's display_image, image_placeholder() reads the file
+and the article's pages are invalidated. `manage.py generate_thumbnails`
+fills in the archive the same way.
+"""
+
+import logging
+
+from django.db import transaction
+
+from apps.core.page_cache import invalidate_tags
+from apps.core.thumbnails import aliases_for, image_placeholder, submit
+
+from .invalidation import article_tags
+
+logger = logging.getLogger(__name__)
+
+
+def store_placeholder(article_pk):
+    """Recompute the placeholder fields of ``article_pk`` from its current display_image."""
+    from .models import Article
+
+    article = Article.objects.filter(pk=article_pk).only("main_image", "hero_image").first()
+    if article is None:
+        return
+    image = article.display_image
+    width = height = None
+    placeholder = ""
+    if image:
+        try:
+            width, height, placeholder = image_placeholder(image)
+        except OSError:
+            logger.warning("Could not read %s for a placeholder", image.name, exc_info=True)
+    Article.objects.filter(pk=article_pk).update(
+        image_width=width, image_height=height, image_placeholder=placeholder
+    )
+    invalidate_tags(*article_tags([article_pk]))
+
+
+def image_thumbnailed(sender, fieldfile, **kwargs):
+    """thumbnails_generated receiver: refresh the placeholder when the file is the display_image."""
+    from .models import Article
+
+    current = Article.objects.filter(pk=fieldfile.instance.pk).values_list("main_image", "hero_image").first()
+    if current and fieldfile.name == (current[0] or current[1]):
+        store_placeholder(fieldfile.instance.pk)
+
+
+def display_image_changed(article):
+    """Called by Article.save when a different file became display_image.
+
+    A newly uploaded file reaches thumbnails_generated through the eager
+    thumbnail pipeline. Otherwise (main_image cleared, or set to a file
+    already in storage) the display image is queued here.
+    """
+    image = article.display_image
+    uploaded = getattr(article, "_uncommitted_filefields", ())
+    if image and image.field.name in uploaded:
+        return
+    if not image:
+        transaction.on_commit(lambda: store_placeholder(article.pk))
+        return
+    aliases = aliases_for(type(article), image.field.name)
+    transaction.on_commit(lambda: submit(image, aliases))
@@ -0,0 +1,41 @@
+"""
+Scheduled publishing.
+
+An article with status "scheduled" goes live at its published_at. Both
+publishers — the `publish_scheduled` command (the precise one: it sleeps
+until the next due article) and the optional PublishScheduledMiddleware —
+call publish_due_articles(), so the status flip and the cache purge are the
+same whichever runs.
+"""
+
+from django.utils import timezone
+
+from .invalidation import invalidate_articles
+
+
+def publish_due_articles(now=None):
+    """Publish every scheduled article due by ``now``; return their pks."""
+    from .models import Article
+
+    now = now or timezone.now()
+    pks = list(
+        Article.objects.filter(status="scheduled", published_at__lte=now).values_list("pk", flat=True)
+    )
+    if pks:
+        # Re-check status so an article unscheduled meanwhile stays put.
+        # .update() skips auto_now; sitemaps and exports read `updated`.
+        Article.objects.filter(pk__in=pks, status="scheduled").update(status="published", updated=now)
+        invalidate_articles(pks)
+    return pks
+
+
+def next_due_at():
+    """published_at of the next scheduled article, or None."""
+    from .models import Article
+
+    return (
+        Article.objects.filter(status="scheduled", published_at__isnull=False)
+        .order_by("published_at")
+        .values_list("published_at", flat=True)
+        .first()
+    )
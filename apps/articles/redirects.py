@@ -0,0 +1,146 @@
+"""
+In-process slug map for article URLs.
+
+Every miss on /article/<slug>/ used to cost three queries — the article, the
+SlugRedirect, then get_object_or_404 — and most misses are scanners and dead
+links. resolve_slug() answers from two structures built from the database
+once per change and kept in each worker:
+
+  - redirects: old slug → the slug the article is published under now.
+    Built from SlugRedirect → Article, so however many times an article was
+    renamed, every old slug is one hop from the current one.
+  - known: a Bloom filter over every published slug and every redirecting
+    old slug. A slug it rejects didn't exist when the map was built, so the
+    404 costs no query at all; a slug it accepts is looked up as usual
+    (about 1% of bogus slugs get that far).
+
+The structures are versioned by the "slugs" page-cache tag. Anything that
+changes the set of published slugs (publishing, unpublishing, renaming,
+deleting, editing SlugRedirect rows) invalidates the tag. The next request
+in each worker notices the new version and loads the rebuilt map from the
+cache. Only one process rebuilds it at a time; requests that arrive while
+it does, and any during a cache outage, get UNKNOWN and the view falls
+back to the database.
+
+The Bloom filter's "certainly missing" is only trusted when the page cache
+is shared (page_cache.is_shared()). With a per-process cache, a story
+published by another worker or by `publish_scheduled` never bumps this
+worker's tag, so a rejected slug still gets its one indexed lookup.
+"""
+
+import hashlib
+import logging
+import math
+import time
+
+from django.db import transaction
+
+from apps.core.page_cache import get_or_set_tagged, get_tag_version, invalidate_tags, is_shared
+
+logger = logging.getLogger(__name__)
+
+SLUGS_TAG = "slugs"
+# Upper bound on staleness should an invalidation ever be lost
+SLUG_MAP_TIMEOUT = 300
+# Longest a rebuild may hold the lock, should its process die mid-build
+SLUG_MAP_LOCK_TIMEOUT = 60
+FALSE_POSITIVE_RATE = 0.01
+
+MISSING = "missing"
+UNKNOWN = "unknown"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(value))
+
+
+class SlugMap:
+    def __init__(self, redirects, known):
+        self.redirects = redirects
+        self.known = known
+
+
+def build_slug_map():
+    """Two queries: published slugs, and redirects to published articles."""
+    from .models import Article, SlugRedirect
+
+    published = set(Article.objects.filter(status="published").values_list("slug", flat=True))
+    redirects = {
+        old: current
+        for old, current in SlugRedirect.objects.filter(article__status="published")
+        .values_list("old_slug", "article__slug")
+        .iterator()
+        # A live article now using an old slug wins over the redirect
+        if old not in published and old != current
+    }
+    known = BloomFilter(len(published) + len(redirects))
+    for slug in published:
+        known.add(slug)
+    for slug in redirects:
+        known.add(slug)
+    return SlugMap(redirects, known)
+
+
+_local = {"version": None, "map": None, "loaded": 0.0}
+
+
+def _slug_map():
+    version = get_tag_version(SLUGS_TAG)
+    if version is None:
+        return None
+    now = time.monotonic()
+    if _local["version"] != version or now - _local["loaded"] > SLUG_MAP_TIMEOUT:
+        slug_map = get_or_set_tagged(
+            "slugmap", [SLUGS_TAG], build_slug_map, SLUG_MAP_TIMEOUT, lock_timeout=SLUG_MAP_LOCK_TIMEOUT
+        )
+        if slug_map is None:
+            return None  # another process is rebuilding it
+        _local["map"] = slug_map
+        _local["version"] = version
+        _local["loaded"] = now
+    return _local["map"]
+
+
+def resolve_slug(slug):
+    """MISSING, UNKNOWN, or the slug an old slug now redirects to."""
+    try:
+        slug_map = _slug_map()
+    except Exception:
+        logger.exception("Slug map unavailable")
+        return UNKNOWN
+    if slug_map is None:
+        return UNKNOWN
+    if slug in slug_map.redirects:
+        return slug_map.redirects[slug]
+    if slug not in slug_map.known and is_shared():
+        return MISSING
+    return UNKNOWN
+
+
+def invalidate_slug_map():
+    """Rebuild the map now and again once the current transaction commits.
+
+    A worker rebuilding mid-transaction can't see the new slug yet, so the
+    second invalidation makes sure it isn't 404ed until the next change.
+    """
+    invalidate_tags(SLUGS_TAG)
+    transaction.on_commit(lambda: invalidate_tags(SLUGS_TAG))
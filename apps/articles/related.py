@@ -0,0 +1,431 @@
+"""
+Related stories, precomputed offline.
+
+Every published article is scored against every other one as
+
+    TEXT_WEIGHT     * cosine(TF-IDF of title + deck + plain_text)
+  + TOWN_WEIGHT     * cosine(the articles' town sets)
+  + CATEGORY_WEIGHT * (same category)
+
+and its TOP_K best neighbours are stored as RelatedArticle rows, so the
+detail page reads them with one indexed lookup. The maths is sparse-matrix
+throughout: both cosine terms are products of L2-normalised CSR matrices,
+evaluated BLOCK_SIZE rows at a time so memory stays bounded by
+BLOCK_SIZE × archive size.
+
+rebuild_related() recomputes every article (the `compute_related` command,
+run nightly). update_related(pks) is the incremental path for a handful of
+changed articles: it rescores them, then only the other articles whose
+neighbour list they were in, or whose weakest neighbour they now beat.
+Scores are symmetric, so the changed rows alone say who those are.
+
+The incremental path never reads the whole archive. Each run pickles its
+Corpus — the fitted vocabulary and IDF, the vectors, and every article's
+weakest stored score — to RELATED_CORPUS_PATH, and the next run re-reads and
+re-vectorises just the changed articles against it. Terms first seen since
+the last full build are ignored until the next one refits.
+
+Article.save and invalidate_articles() queue the articles they touch;
+`compute_related --queued`, run from cron, refreshes the queue.
+"""
+
+import logging
+import os
+import pickle
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from scipy import sparse
+
+from apps.core.page_cache import invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 4
+BLOCK_SIZE = 256
+TEXT_WEIGHT = 0.6
+TOWN_WEIGHT = 0.3
+CATEGORY_WEIGHT = 0.1
+
+# Terms in fewer documents than this say nothing about similarity; terms in
+# more than MAX_DF_RATIO of them are boilerplate.
+MIN_DF = 2
+MAX_DF_RATIO = 0.5
+
+TOKEN_RE = re.compile(r"[a-z][a-z'’]+[a-z]")
+STOPWORDS = frozenset("""
+    about after again also against all and any are around back been before being between both but
+    can could did does doing down during each few for from further had has have having her here hers
+    him his how into its just more most much not now off once only other our out over own said same
+    says she should since some such than that the their them then there these they this those though
+    through too under until very was way were what when where which while who whom why will with
+    would year years you your
+""".split())
+
+
+# Bumped whenever Corpus changes shape, so older pickles are refitted
+CORPUS_VERSION = 1
+
+
+class Corpus:
+    """The published archive as row-aligned sparse matrices.
+
+    Keeps what it was fitted with (vocabulary, IDF, town columns, category
+    codes) so refresh() can vectorise more articles the same way.
+    """
+
+    def __init__(self, pks, text, towns, categories, vocabulary, idf, town_cols, category_codes):
+        self.version = CORPUS_VERSION
+        self.pks = pks
+        self.text = text
+        self.towns = towns
+        self.categories = categories
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.town_cols = town_cols
+        self.category_codes = category_codes
+        # Each row's weakest stored neighbour score, 0 while its list isn't
+        # full; None until a rebuild or update_related() fills it in
+        self.weakest = None
+        self._index()
+
+    def _index(self):
+        self.rows = {pk: row for row, pk in enumerate(self.pks.tolist())}
+        self.text_t = self.text.T.tocsr()
+        self.towns_t = self.towns.T.tocsr()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for derived in ("rows", "text_t", "towns_t"):
+            del state[derived]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._index()
+
+    def __len__(self):
+        return len(self.pks)
+
+    def scores(self, rows):
+        """Dense (len(rows) × n) similarity block, self-matches at -inf."""
+        rows = np.asarray(rows)
+        block = (
+            TEXT_WEIGHT * (self.text[rows] @ self.text_t)
+            + TOWN_WEIGHT * (self.towns[rows] @ self.towns_t)
+        ).toarray()
+        block += CATEGORY_WEIGHT * (self.categories[rows, None] == self.categories[None, :])
+        block[np.arange(len(rows)), rows] = -np.inf
+        return block
+
+    def refresh(self, pks):
+        """Re-read the articles ``pks``: replace their rows, dropping unpublished ones."""
+        from .models import Article
+
+        published = Article.objects.filter(pk__in=list(pks), status="published").order_by("pk")
+        rows = published.values_list("pk", "category", "title", "deck", "plain_text")
+        new_pks, categories, tf = _term_frequencies(rows, self.vocabulary, grow=False)
+        text = _l2_normalise(tf @ sparse.diags(self.idf)).tocsr()
+        links = Article.towns.through.objects.filter(article_id__in=new_pks).values_list("article_id", "town_id")
+        towns = _town_matrix(new_pks, links, self.town_cols)
+        width = towns.shape[1]
+
+        keep = np.flatnonzero(~np.isin(self.pks, list(pks)))
+        self.pks = np.concatenate([self.pks[keep], np.asarray(new_pks, dtype=np.int64)])
+        self.text = sparse.vstack([self.text[keep], text], format="csr")
+        self.towns = sparse.vstack([_widen(self.towns[keep], width), towns], format="csr")
+        codes = [self.category_codes.setdefault(category, len(self.category_codes)) for category in categories]
+        self.categories = np.concatenate([self.categories[keep], np.asarray(codes, dtype=self.categories.dtype)])
+        if self.weakest is not None:
+            self.weakest = np.concatenate([self.weakest[keep], np.zeros(len(new_pks), dtype=np.float32)])
+        self._index()
+        return self
+
+    def remember(self, neighbours, top_k):
+        """Record the weakest score of each freshly stored neighbour list."""
+        k = min(top_k, len(self) - 1)
+        for pk, related in neighbours.items():
+            self.weakest[self.rows[pk]] = related[-1][1] if len(related) >= k else 0
+
+
+def _tokens(*parts):
+    text = " ".join(part for part in parts if part).lower()
+    return Counter(token for token in TOKEN_RE.findall(text) if token not in STOPWORDS)
+
+
+def _l2_normalise(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+def _term_frequencies(rows, vocabulary, grow):
+    """(pks, categories, sublinear TF matrix) for (pk, category, title, deck, plain_text) rows.
+
+    With ``grow`` unseen terms are added to ``vocabulary``; otherwise dropped.
+    """
+    pks, categories = [], []
+    indptr, indices, counts = [0], [], []
+    for pk, category, title, deck, plain_text in rows:
+        for token, count in _tokens(title, deck, plain_text).items():
+            col = vocabulary.setdefault(token, len(vocabulary)) if grow else vocabulary.get(token)
+            if col is not None:
+                indices.append(col)
+                counts.append(count)
+        indptr.append(len(indices))
+        pks.append(pk)
+        categories.append(category)
+    tf = sparse.csr_matrix(
+        (1 + np.log(np.asarray(counts, dtype=np.float32)), np.asarray(indices, dtype=np.int32), indptr),
+        shape=(len(pks), len(vocabulary)),
+    )
+    return pks, categories, tf
+
+
+def _town_matrix(pks, links, town_cols):
+    """L2-normalised article × town matrix; towns new to ``town_cols`` get a column."""
+    pk_rows = {pk: row for row, pk in enumerate(pks)}
+    pairs = [(pk_rows[a], town_cols.setdefault(t, len(town_cols))) for a, t in links.iterator() if a in pk_rows]
+    towns = sparse.csr_matrix(
+        (
+            np.ones(len(pairs), dtype=np.float32),
+            ([row for row, _ in pairs], [col for _, col in pairs]),
+        ),
+        shape=(len(pks), max(1, len(town_cols))),
+    )
+    return _l2_normalise(towns).tocsr()
+
+
+def _widen(matrix, width):
+    """``matrix`` with extra empty columns up to ``width``."""
+    return sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], width))
+
+
+def build_corpus():
+    """Vectorise every published article; None if there are fewer than two."""
+    from .models import Article
+
+    published = Article.objects.filter(status="published").order_by("pk")
+    rows = published.values_list("pk", "category", "title", "deck", "plain_text")
+    vocabulary = {}
+    pks, categories, tf = _term_frequencies(rows.iterator(chunk_size=2000), vocabulary, grow=True)
+    if len(pks) < 2:
+        return None
+
+    # Smoothed inverse document frequency. Terms outside the useful band
+    # never score, so they are left out of the fitted vocabulary.
+    n = len(pks)
+    df = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    kept = np.flatnonzero((df >= MIN_DF) & (df <= MAX_DF_RATIO * n))
+    terms = list(vocabulary)
+    vocabulary = {terms[col]: new for new, col in enumerate(kept.tolist())}
+    idf = idf[kept]
+    text = _l2_normalise(tf[:, kept] @ sparse.diags(idf)).tocsr()
+    text.eliminate_zeros()
+
+    town_cols = {}
+    links = Article.towns.through.objects.filter(article_id__in=published.values("pk"))
+    towns = _town_matrix(pks, links.values_list("article_id", "town_id"), town_cols)
+
+    category_codes = {}
+    codes = np.asarray([category_codes.setdefault(category, len(category_codes)) for category in categories])
+    return Corpus(np.asarray(pks, dtype=np.int64), text, towns, codes, vocabulary, idf, town_cols, category_codes)
+
+
+def corpus_path():
+    return Path(getattr(settings, "RELATED_CORPUS_PATH", Path(settings.BASE_DIR) / "var" / "related_corpus.pickle"))
+
+
+def save_corpus(corpus, path=None):
+    """Pickle ``corpus`` for the next incremental run, replacing the old file atomically."""
+    path = Path(path or corpus_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "wb") as f:
+        pickle.dump(corpus, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial, path)
+
+
+def load_corpus(path=None):
+    """The corpus the last run saved, or None if there isn't a usable one."""
+    path = Path(path or corpus_path())
+    try:
+        with open(path, "rb") as f:
+            corpus = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception("Ignoring unreadable related-stories corpus %s", path)
+        return None
+    if not isinstance(corpus, Corpus) or getattr(corpus, "version", None) != CORPUS_VERSION:
+        return None
+    return corpus
+
+
+def top_neighbours(corpus, rows, top_k=TOP_K, scores=None):
+    """{pk: [(related_pk, score), ...] best first} for corpus ``rows``."""
+    if scores is None:
+        scores = corpus.scores(rows)
+    k = min(top_k, len(corpus) - 1)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+    neighbours = {}
+    for row, cols, values in zip(rows, best, best_scores):
+        neighbours[int(corpus.pks[row])] = [
+            (int(corpus.pks[col]), float(score)) for col, score in zip(cols, values) if score > 0
+        ]
+    return neighbours
+
+
+def store_neighbours(neighbours):
+    """Replace the stored neighbours of each article in ``neighbours``.
+
+    Returns the pks whose list actually changed; only their pages are purged.
+    """
+    from .models import RelatedArticle
+
+    current = {}
+    stored = RelatedArticle.objects.filter(article_id__in=list(neighbours)).order_by("article", "rank")
+    for article_id, related_id in stored.values_list("article_id", "related_id"):
+        current.setdefault(article_id, []).append(related_id)
+    changed = [
+        pk for pk, related in neighbours.items()
+        if current.get(pk, []) != [related_pk for related_pk, _ in related]
+    ]
+
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=list(neighbours)).delete()
+        RelatedArticle.objects.bulk_create([
+            RelatedArticle(article_id=pk, related_id=related_pk, rank=rank, score=score)
+            for pk, related in neighbours.items()
+            for rank, (related_pk, score) in enumerate(related)
+        ])
+    invalidate_tags(*(f"article:{pk}" for pk in changed))
+    return changed
+
+
+def rebuild_related(top_k=TOP_K, block_size=BLOCK_SIZE, corpus=None, progress=None):
+    """Recompute neighbours for the whole archive; return (articles, changed)."""
+    from .models import RelatedArticle, RelatedQueue
+
+    started = timezone.now()
+    RelatedArticle.objects.exclude(article__status="published").delete()
+    corpus = corpus or build_corpus()
+    if corpus is None:
+        RelatedArticle.objects.all().delete()
+        RelatedQueue.objects.filter(queued_at__lte=started).delete()
+        return 0, 0
+
+    corpus.weakest = np.zeros(len(corpus), dtype=np.float32)
+    changed = 0
+    for start in range(0, len(corpus), block_size):
+        rows = range(start, min(start + block_size, len(corpus)))
+        neighbours = top_neighbours(corpus, rows, top_k)
+        changed += len(store_neighbours(neighbours))
+        corpus.remember(neighbours, top_k)
+        if progress:
+            progress(rows.stop, len(corpus))
+    # Everything queued before the rebuild began is covered by it
+    RelatedQueue.objects.filter(queued_at__lte=started).delete()
+    return len(corpus), changed
+
+
+def _stored_weakest(corpus, top_k):
+    """Corpus.weakest read back from RelatedArticle, for a corpus built from scratch."""
+    from .models import RelatedArticle
+
+    weakest = np.zeros(len(corpus), dtype=np.float32)
+    full = (
+        RelatedArticle.objects.values("article_id")
+        .annotate(weakest=Min("score"), count=Count("pk"))
+        .filter(count__gte=min(top_k, len(corpus) - 1))
+        .values_list("article_id", "weakest")
+    )
+    for article_id, score in full.iterator():
+        row = corpus.rows.get(article_id)
+        if row is not None:
+            weakest[row] = score
+    return weakest
+
+
+def update_related(pks, top_k=TOP_K, block_size=BLOCK_SIZE, corpus=None):
+    """Refresh neighbours after the articles ``pks`` changed; return the pks rescored.
+
+    ``corpus`` — normally the one load_corpus() returns — is refreshed in
+    place for ``pks`` only. Without one the whole archive is vectorised.
+    """
+    from .models import RelatedArticle
+
+    pks = set(pks)
+    if not pks:
+        return set()
+    corpus = build_corpus() if corpus is None else corpus.refresh(pks)
+    if corpus is None or len(corpus) < 2:
+        RelatedArticle.objects.all().delete()
+        return set()
+    corpus_rows = corpus.rows
+    live = [corpus_rows[pk] for pk in sorted(pks) if pk in corpus_rows]
+
+    # Articles no longer published have no neighbours and are nobody's
+    RelatedArticle.objects.filter(article_id__in=[pk for pk in pks if pk not in corpus_rows]).delete()
+
+    # Anyone currently listing a changed article must be rescored...
+    affected = set(RelatedArticle.objects.filter(related_id__in=pks).values_list("article_id", flat=True))
+    if corpus.weakest is None:
+        corpus.weakest = _stored_weakest(corpus, top_k)
+
+    neighbours = {}
+    for start in range(0, len(live), block_size):
+        rows = live[start:start + block_size]
+        scores = corpus.scores(rows)
+        neighbours.update(top_neighbours(corpus, rows, top_k, scores=scores))
+        # ...and so must anyone a changed article now outranks. Scores are
+        # symmetric, so column j of the changed rows is j's score for them.
+        beaten = np.nonzero((scores > corpus.weakest[None, :]) & (scores > 0))[1]
+        affected.update(corpus.pks[np.unique(beaten)].tolist())
+
+    affected = [corpus_rows[pk] for pk in affected - pks if pk in corpus_rows]
+    for start in range(0, len(affected), block_size):
+        neighbours.update(top_neighbours(corpus, affected[start:start + block_size], top_k))
+    if neighbours:
+        store_neighbours(neighbours)
+        corpus.remember(neighbours, top_k)
+    return set(neighbours)
+
+
+def queue_related(pks):
+    """Queue articles for the next `compute_related --queued` run."""
+    from .models import RelatedQueue
+
+    now = timezone.now()
+    RelatedQueue.objects.bulk_create(
+        [RelatedQueue(article_id=pk, queued_at=now) for pk in set(pks)],
+        update_conflicts=True,
+        unique_fields=["article_id"],
+        update_fields=["queued_at"],
+    )
+
+
+def queued_related(before):
+    """pks queued at or before ``before``."""
+    from .models import RelatedQueue
+
+    return set(RelatedQueue.objects.filter(queued_at__lte=before).values_list("article_id", flat=True))
+
+
+def dequeue_related(pks, before):
+    """Drop the queue entries a run handled; articles queued again since stay queued."""
+    from .models import RelatedQueue
+
+    RelatedQueue.objects.filter(article_id__in=list(pks), queued_at__lte=before).delete()
@@ -0,0 +1,72 @@
+"""
+Markdown → HTML rendering for article bodies.
+
+body_html is derived data: it depends only on body_markdown and the renderer
+(the Markdown version and MARKDOWN_EXTENSIONS). body_hash() digests all
+three, and Article stores the digest of the body_html it holds — so a save
+that doesn't touch the body skips rendering, and after an upgrade or an
+extension change every stored hash is stale and `manage.py
+rerender_articles` knows exactly what to redo.
+
+The plain-text fields derived from the HTML (plain_text, word_count,
+reading_time, meta_description) are computed here too, once per render,
+so the detail page never strips or counts text per request.
+
+Nothing here needs Django settings, so process-pool workers can use it
+without setting Django up.
+"""
+
+import hashlib
+import html
+import math
+
+import markdown
+from django.utils.html import strip_tags
+
+MARKDOWN_EXTENSIONS = ["extra", "smarty", "toc"]
+
+WORDS_PER_MINUTE = 200
+META_DESCRIPTION_LENGTH = 160
+
+RENDERER_SIGNATURE = f"markdown={markdown.__version__};extensions={','.join(MARKDOWN_EXTENSIONS)}"
+
+
+def body_hash(body_markdown):
+    """Digest of a body and the renderer that would turn it into HTML."""
+    digest = hashlib.sha256(RENDERER_SIGNATURE.encode())
+    digest.update(b"\0")
+    digest.update((body_markdown or "").encode())
+    return digest.hexdigest()
+
+
+def render_markdown(body_markdown):
+    if not body_markdown:
+        return ""
+    return markdown.markdown(body_markdown, extensions=MARKDOWN_EXTENSIONS)
+
+
+def text_fields(body_html):
+    """plain_text, word_count and reading_time (minutes) for rendered HTML."""
+    plain_text = " ".join(html.unescape(strip_tags(body_html)).split())
+    word_count = len(plain_text.split())
+    return {
+        "plain_text": plain_text,
+        "word_count": word_count,
+        "reading_time": math.ceil(word_count / WORDS_PER_MINUTE),
+    }
+
+
+def meta_description_for(deck, plain_text):
+    """The deck if there is one, else the opening of the body."""
+    return (deck or plain_text)[:META_DESCRIPTION_LENGTH]
+
+
+def rendered_fields(body_markdown):
+    """Every field derived from a body: body_html, body_hash and text_fields()."""
+    body_html = render_markdown(body_markdown)
+    return {"body_html": body_html, "body_hash": body_hash(body_markdown), **text_fields(body_html)}
+
+
+def render_batch(rows):
+    """Render [(pk, body_markdown), ...] → [(pk, rendered_fields()), ...]."""
+    return [(pk, rendered_fields(body)) for pk, body in rows]
@@ -0,0 +1,59 @@
+"""
+Full-text search over articles.
+
+Article.search_vector stores a weighted tsvector — title (A) > deck (B) >
+body text (C) — backed by a GIN index. Article.save refreshes it when any
+of those change, and the bulk paths (rerender_articles,
+backfill_article_text) refresh their batches. Queries use websearch syntax
+("quoted phrases", -exclusions, or) and are ranked with ts_rank.
+
+PostgreSQL only. Elsewhere (the SQLite test runs) the vector is left empty
+and search_articles() falls back to a title/deck substring match, newest
+first.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+
+
+def _config():
+    return getattr(settings, "SEARCH_CONFIG", "english")
+
+
+def search_vector():
+    config = _config()
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("deck", weight="B", config=config)
+        + SearchVector("plain_text", weight="C", config=config)
+    )
+
+
+def full_text_enabled():
+    return connection.vendor == "postgresql"
+
+
+def update_search_vectors(pks):
+    """Recompute search_vector for the given articles in one UPDATE."""
+    from .models import Article
+
+    if pks and full_text_enabled():
+        Article.objects.filter(pk__in=list(pks)).update(search_vector=search_vector())
+
+
+def search_query(terms):
+    return SearchQuery(terms, search_type="websearch", config=_config())
+
+
+def search_articles(queryset, terms):
+    """``queryset`` narrowed to matches for ``terms``, best match first."""
+    if full_text_enabled():
+        query = search_query(terms)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-published_at")
+        )
+    return queryset.filter(Q(title__icontains=terms) | Q(deck__icontains=terms)).order_by("-published_at")
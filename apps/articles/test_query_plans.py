@@ -0,0 +1,165 @@
+"""
+Query-plan regression suite for the public listing views.
+
+Seeds ARTICLE_COUNT (20,000) articles, ANALYZEs, then requests each public view and
+EXPLAINs every query it ran against the article tables. A sequential scan
+on any of them means a listing query no longer matches an index in
+Article.Meta.indexes — usually because its filter or ordering changed.
+
+PostgreSQL only: the planner decisions being guarded are PostgreSQL's.
+"""
+
+import json
+import random
+import unittest
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import CATEGORY_CHOICES, Article, Author, Town
+from .pagination import encode_cursor
+from .timeline import sync_timeline
+
+ARTICLE_COUNT = 20_000
+AUTHOR_COUNT = 40
+CHECKED_TABLES = {"articles_article", "articles_article_towns", "articles_towntimeline"}
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "query plans are PostgreSQL-specific")
+class ListingQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(5)
+        now = timezone.now()
+        categories = [key for key, _ in CATEGORY_CHOICES]
+
+        authors = Author.objects.bulk_create(
+            Author(name=f"Author {i}", slug=f"author-{i}") for i in range(AUTHOR_COUNT)
+        )
+        cls.author = authors[0]
+        cls.town = Town.objects.order_by("pk").first() or Town.objects.create(
+            name="Kilmarnock", slug="kilmarnock", council_area="east_ayrshire"
+        )
+        towns = list(Town.objects.all())
+
+        statuses = ["published"] * 17 + ["draft", "scheduled", "archived"]
+        articles = Article.objects.bulk_create(
+            Article(
+                title=f"Story {i}",
+                slug=f"story-{i}",
+                deck="A short standfirst for the card.",
+                body_markdown="Body text. " * 50,
+                body_html="<p>" + "Body text. " * 50 + "</p>",
+                category=rng.choice(categories),
+                author=rng.choice(authors),
+                status=rng.choice(statuses),
+                published_at=now - timedelta(minutes=i * 7),
+                is_featured=i % 500 == 0,
+                homepage_secondary=i % 300 == 0,
+                section_lead=i % 700 == 0,
+                section_priority=rng.randint(0, 3),
+            )
+            for i in range(ARTICLE_COUNT)
+        )
+        Through = Article.towns.through
+        Through.objects.bulk_create(
+            Through(article_id=a.pk, town_id=t.pk)
+            for a in articles
+            for t in rng.sample(towns, k=min(2, len(towns)))
+        )
+        # bulk_create bypasses m2m_changed
+        sync_timeline([a.pk for a in articles])
+        cls.deep = articles[ARTICLE_COUNT * 3 // 4]
+        cls.detail = next(a for a in articles if a.status == "published")
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+
+    def assertNoSequentialScans(self, url, params=None, status_codes=(200, 301, 302)):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertIn(response.status_code, status_codes, url)
+
+        checked = 0
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            if not any(f'"{table}"' in sql for table in CHECKED_TABLES):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql)
+                raw = cursor.fetchone()[0]
+            plan = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+            for node in _plan_nodes(plan):
+                if node["Node Type"] == "Seq Scan":
+                    self.assertNotIn(
+                        node.get("Relation Name"),
+                        CHECKED_TABLES,
+                        f"Sequential scan on {node.get('Relation Name')} for {url}:\n{sql}\n"
+                        f"{json.dumps(plan, indent=2)}",
+                    )
+            checked += 1
+        self.assertTrue(checked, f"No article queries captured for {url}")
+
+    def _deep_cursor(self):
+        return {"before": encode_cursor(self.deep.published_at, self.deep.pk)}
+
+    def test_home(self):
+        self.assertNoSequentialScans("/")
+
+    def test_home_fragment_deep(self):
+        self.assertNoSequentialScans("/api/latest/", self._deep_cursor())
+
+    def test_section_fronts(self):
+        for key, _ in CATEGORY_CHOICES:
+            with self.subTest(section=key):
+                self.assertNoSequentialScans(f"/{key}/")
+                self.assertNoSequentialScans(f"/{key}/", self._deep_cursor())
+
+    def test_town_page(self):
+        url = self.town.get_absolute_url()
+        self.assertNoSequentialScans(url)
+        self.assertNoSequentialScans(url, self._deep_cursor())
+
+    def test_author_page(self):
+        url = self.author.get_absolute_url()
+        self.assertNoSequentialScans(url)
+        self.assertNoSequentialScans(url, self._deep_cursor())
+
+    def test_article_sitemap_chunk(self):
+        self.assertNoSequentialScans("/sitemap-articles-1.xml")
+        self.assertNoSequentialScans("/sitemap-news.xml")
+
+    def test_article_detail(self):
+        self.assertNoSequentialScans(self.detail.get_absolute_url())
+        # The test cache is per-process, so a miss is still checked in the database
+        self.assertNoSequentialScans("/article/no-such-story/", status_codes=(404,))
+
+    def test_scheduled_publish_check(self):
+        due = (
+            Article.objects.filter(status="scheduled", published_at__lte=timezone.now())
+            .values_list("pk", flat=True)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            list(due)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + ctx.captured_queries[0]["sql"])
+            raw = cursor.fetchone()[0]
+        plan = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+        scans = [n for n in _plan_nodes(plan) if n["Node Type"] == "Seq Scan"]
+        self.assertEqual(scans, [])
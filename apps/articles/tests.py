@@ -0,0 +1,861 @@
+import pickle
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .cards import Card, cards
+from .fronts import GRID_PAGE_SIZE, build_front, get_front
+from .models import Article, Author, Town, TownTimeline
+from .pagination import KeysetPaginator, decode_cursor, encode_cursor
+from .rendering import body_hash
+
+
+class CardProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Jo Reporter", slug="jo", role_title="Editor")
+        cls.article = Article.objects.create(
+            title="Council budget agreed",
+            deck="Spending plans approved.",
+            body_markdown="A long body " * 500,
+            category="news",
+            author=cls.author,
+            status="published",
+            published_at=timezone.now(),
+            main_image="articles/budget.jpg",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_yield_compact_objects(self):
+        card = cards(Article.objects.filter(pk=self.article.pk)).get()
+        self.assertIsInstance(card, Card)
+        self.assertFalse(hasattr(card, "__dict__"))
+        self.assertEqual(card.byline_display, "Jo Reporter, Editor")
+        self.assertEqual(card.get_category_display(), "News")
+        self.assertEqual(card.get_absolute_url(), self.article.get_absolute_url())
+        self.assertEqual(card.display_image.name, "articles/budget.jpg")
+        self.assertEqual(pickle.loads(pickle.dumps(card)).title, card.title)
+
+    def test_listing_pages_do_not_fetch_bodies(self):
+        for url in ("/", "/news/", self.author.get_absolute_url()):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            article_sql = [q["sql"] for q in ctx.captured_queries if '"articles_article"' in q["sql"]]
+            self.assertTrue(article_sql, url)
+            for sql in article_sql:
+                self.assertNotIn("body_html", sql, url)
+                self.assertNotIn("body_markdown", sql, url)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now().replace(microsecond=0)
+        cls.articles = [
+            Article.objects.create(
+                title=f"News {i}",
+                category="news",
+                status="published",
+                # Pairs share a timestamp so the pk tie-break is exercised
+                published_at=now - timedelta(hours=i // 2),
+            )
+            for i in range(30)
+        ]
+        cls.newest_first = sorted(cls.articles, key=lambda a: (a.published_at, a.pk), reverse=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_round_trip(self):
+        article = self.articles[3]
+        self.assertEqual(
+            decode_cursor(encode_cursor(article.published_at, article.pk)),
+            (article.published_at, article.pk),
+        )
+
+    def test_walk_forwards_and_back(self):
+        paginator = KeysetPaginator(cards(Article.objects.all()), 7)
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(before=cursor)
+            pages.append([c.pk for c in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        walked = [pk for page in pages for pk in page]
+        self.assertEqual(walked, [a.pk for a in self.newest_first])
+
+        back = paginator.get_page(after=paginator.get_page(before=cursor).previous_cursor)
+        self.assertEqual([c.pk for c in back], pages[-2])
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        shallow = self.newest_first[16]
+        self.client.get("/news/")
+        cache.clear()
+        with CaptureQueriesContext(connection) as first_ctx:
+            first = self.client.get("/news/", {"before": encode_cursor(shallow.published_at, shallow.pk)})
+        self.assertEqual(first.status_code, 200)
+        last = self.newest_first[-3]
+        cache.clear()
+        with CaptureQueriesContext(connection) as deep_ctx:
+            deep = self.client.get("/news/", {"before": encode_cursor(last.published_at, last.pk)})
+        self.assertEqual(len(deep.context["articles"]), 2)
+        self.assertEqual(len(deep_ctx), len(first_ctx))
+        for query in deep_ctx.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"])
+
+    def test_legacy_page_numbers_redirect(self):
+        response = self.client.get("/news/", {"page": 400})
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], "/news/")
+
+
+class FrontTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.town = Town.objects.create(name="Testtown", slug="testtown", council_area="south_ayrshire")
+        cls.articles = [
+            Article.objects.create(
+                title=f"Sport {i}",
+                category="sport",
+                status="published",
+                published_at=now - timedelta(hours=i),
+            )
+            for i in range(25)
+        ]
+        for article in cls.articles:
+            article.towns.add(cls.town)
+        # Curated stories sit deep in the timeline but lead the front
+        cls.lead = cls.articles[20]
+        cls.lead.section_lead = True
+        cls.lead.save()
+        cls.priority = cls.articles[18]
+        cls.priority.section_priority = 5
+        cls.priority.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_section_front_is_one_query(self):
+        from .views import SECTION_LEAD_ORDERING
+
+        published = Article.objects.filter(category="sport", status="published")
+        with self.assertNumQueries(1):
+            front = build_front(published, SECTION_LEAD_ORDERING)
+
+        self.assertEqual(front.lead.pk, self.lead.pk)
+        self.assertEqual(
+            [c.pk for c in front.secondaries],
+            [self.priority.pk, self.articles[0].pk, self.articles[1].pk],
+        )
+        expected_grid = [a.pk for a in self.articles if a.pk not in front.pks][:GRID_PAGE_SIZE]
+        self.assertEqual([c.pk for c in front.grid], expected_grid)
+        self.assertIsNotNone(front.next_cursor)
+
+    def test_town_front_is_newest_first(self):
+        with self.assertNumQueries(1):
+            front = build_front(Article.objects.filter(towns=self.town, status="published"))
+        self.assertEqual(front.lead.pk, self.articles[0].pk)
+        self.assertEqual([c.pk for c in front.grid][0], self.articles[4].pk)
+
+    def test_front_is_memoised_until_its_section_changes(self):
+        from .views import SECTION_LEAD_ORDERING
+
+        published = Article.objects.filter(category="sport", status="published")
+        get_front("section:sport", published, SECTION_LEAD_ORDERING)
+        with self.assertNumQueries(0):
+            get_front("section:sport", published, SECTION_LEAD_ORDERING)
+
+        self.articles[3].section_lead = True
+        self.articles[3].save()
+        front = get_front("section:sport", published, SECTION_LEAD_ORDERING)
+        self.assertEqual(front.lead.pk, self.articles[3].pk)
+
+    def test_pages_continue_after_the_front(self):
+        first = self.client.get("/sport/").context["articles"]
+        second = self.client.get("/sport/", {"before": first.next_cursor}).context["articles"]
+        front = self.client.get("/sport/").context
+        shown = [front["lead"].pk] + [c.pk for c in front["secondaries"]]
+        shown += [c.pk for c in first] + [c.pk for c in second]
+        self.assertCountEqual(shown, [a.pk for a in self.articles])
+
+    def test_town_pages_read_the_timeline(self):
+        first = self.client.get("/towns/testtown/").context
+        self.assertEqual(first["lead"].pk, self.articles[0].pk)
+        second = self.client.get("/towns/testtown/", {"before": first["articles"].next_cursor}).context
+        shown = [first["lead"].pk] + [c.pk for c in first["secondaries"]]
+        shown += [c.pk for c in first["articles"]] + [c.pk for c in second["articles"]]
+        self.assertEqual(shown, [a.pk for a in self.articles])
+        self.assertEqual(second["articles"].approximate_total, len(self.articles) - len(first["secondaries"]) - 1)
+
+
+class TownTimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = Town.objects.create(name="Testtown", slug="testtown", council_area="south_ayrshire")
+        cls.article = Article.objects.create(title="Gala day", status="published")
+
+    def _timeline(self):
+        return list(TownTimeline.objects.values_list("town_id", "article_id", "council_area"))
+
+    def test_town_changes_update_the_timeline(self):
+        self.article.towns.add(self.town)
+        self.assertEqual(self._timeline(), [(self.town.pk, self.article.pk, "south_ayrshire")])
+        self.article.towns.remove(self.town)
+        self.assertEqual(self._timeline(), [])
+        self.town.articles.add(self.article)
+        self.assertEqual(len(self._timeline()), 1)
+        self.town.articles.clear()
+        self.assertEqual(self._timeline(), [])
+
+    def test_status_changes_update_the_timeline(self):
+        from .invalidation import invalidate_articles
+
+        self.article.towns.add(self.town)
+        self.article.status = "draft"
+        self.article.save()
+        self.assertEqual(self._timeline(), [])
+
+        # Bulk paths (admin actions, scheduled publishing) go through invalidate_articles
+        Article.objects.filter(pk=self.article.pk).update(status="published")
+        invalidate_articles([self.article.pk])
+        self.assertEqual(len(self._timeline()), 1)
+
+    def test_council_area_follows_the_town(self):
+        from .timeline import council_area_counts
+
+        self.article.towns.add(self.town)
+        self.town.council_area = "east_ayrshire"
+        self.town.save()
+        self.assertEqual(council_area_counts(), {"east_ayrshire": 1})
+
+
+class BodyRenderingTests(TestCase):
+    def test_save_skips_render_when_body_unchanged(self):
+        article = Article.objects.create(title="Gala day", body_markdown="*Sunny* day")
+        self.assertEqual(article.body_html, "<p><em>Sunny</em> day</p>")
+
+        with mock.patch("apps.articles.models.rendered_fields", return_value={}) as render:
+            article.title = "Gala day returns"
+            article.save()
+            render.assert_not_called()
+
+            article.body_markdown = "**Rain**"
+            article.save()
+            render.assert_called_once_with("**Rain**")
+
+    def test_rerender_command_updates_stale_bodies_only(self):
+        fresh = Article.objects.create(title="Fresh", body_markdown="Fresh body")
+        stale = Article.objects.create(title="Stale", body_markdown="Stale _body_")
+        Article.objects.filter(pk=stale.pk).update(body_html="old", body_hash="")
+        stamped = stale.updated
+
+        out = StringIO()
+        call_command("rerender_articles", workers=1, stdout=out)
+        self.assertIn("Re-rendered 1 articles", out.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual(stale.body_html, "<p>Stale <em>body</em></p>")
+        self.assertEqual(stale.body_hash, body_hash(stale.body_markdown))
+        self.assertGreater(stale.updated, stamped)  # so export_static re-exports it
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.body_html, "<p>Fresh body</p>")
+
+        out = StringIO()
+        call_command("rerender_articles", workers=1, stdout=out)
+        self.assertIn("up to date", out.getvalue())
+
+    def test_text_fields_are_stored_on_save(self):
+        body = "Para one with *five* words.\n\n" + "word " * 395
+        article = Article.objects.create(title="Long read", body_markdown=body, status="published")
+        self.assertEqual(article.word_count, 400)
+        self.assertEqual(article.reading_time, 2)
+        self.assertTrue(article.plain_text.startswith("Para one with five words. word"))
+        self.assertEqual(article.meta_description, article.plain_text[:160])
+
+        article.deck = "A standfirst."
+        article.save()
+        self.assertEqual(article.meta_description, "A standfirst.")
+
+        response = self.client.get(article.get_absolute_url())
+        self.assertContains(response, '"wordCount": 400')
+        self.assertContains(response, "2 min read")
+
+    def test_backfill_command_fills_missing_text_fields(self):
+        article = Article.objects.create(title="Old", body_markdown="Three little words")
+        empty = Article.objects.create(title="Empty")
+        Article.objects.filter(pk__in=[article.pk, empty.pk]).update(
+            body_hash="", plain_text="", word_count=0, reading_time=0, meta_description=""
+        )
+        out = StringIO()
+        call_command("backfill_article_text", stdout=out)
+        self.assertIn("for 2 articles", out.getvalue())
+        article.refresh_from_db()
+        self.assertEqual(
+            (article.word_count, article.reading_time, article.meta_description),
+            (3, 1, "Three little words"),
+        )
+        self.assertEqual(article.body_hash, body_hash(article.body_markdown))
+
+        # An article with nothing to describe stays empty but is not re-selected
+        out = StringIO()
+        call_command("backfill_article_text", stdout=out)
+        self.assertIn("for 0 articles", out.getvalue())
+
+
+class ScheduledPublishingTests(TestCase):
+    def test_publish_scheduled_once_publishes_due_articles(self):
+        now = timezone.now()
+        due = Article.objects.create(title="Due", status="scheduled", published_at=now - timedelta(seconds=1))
+        later = Article.objects.create(title="Later", status="scheduled", published_at=now + timedelta(hours=1))
+
+        out = StringIO()
+        with mock.patch("apps.articles.management.commands.publish_scheduled.is_shared", return_value=True):
+            call_command("publish_scheduled", once=True, stdout=out)
+        self.assertIn("published 1 article", out.getvalue())
+        due.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(due.status, "published")
+        self.assertEqual(later.status, "scheduled")
+
+        from .publishing import next_due_at
+
+        self.assertEqual(next_due_at(), later.published_at)
+
+    def test_publisher_refuses_a_per_process_page_cache(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command("publish_scheduled", once=True, stdout=StringIO())
+
+    def test_publisher_loop_survives_a_failed_pass(self):
+        from .management.commands import publish_scheduled
+
+        command = publish_scheduled.Command(stdout=StringIO(), stderr=StringIO())
+        passes = mock.Mock(side_effect=[RuntimeError("connection lost"), None, KeyboardInterrupt])
+        with (
+            mock.patch.object(publish_scheduled, "is_shared", return_value=True),
+            mock.patch.object(command, "_publish", passes),
+            mock.patch.object(publish_scheduled.time, "sleep"),
+            self.assertLogs(publish_scheduled.logger, "ERROR"),
+        ):
+            command.handle(once=False, poll=0.1)
+        self.assertEqual(passes.call_count, 3)
+
+    def test_middleware_can_be_disabled(self):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        from .middleware import PublishScheduledMiddleware
+
+        with self.settings(PUBLISH_IN_REQUEST=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                PublishScheduledMiddleware(lambda request: None)
+
+
+class SlugAllocationTests(TestCase):
+    def test_repeated_titles_get_numbered_slugs_in_one_query(self):
+        for _ in range(5):
+            Article.objects.create(title="Council meeting update")
+        Article.objects.create(title="Council meeting update extra")
+
+        with CaptureQueriesContext(connection) as ctx:
+            article = Article.objects.create(title="Council meeting update")
+        self.assertEqual(article.slug, "council-meeting-update-5")
+        slug_queries = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and "council-meeting-update" in q["sql"]
+        ]
+        self.assertEqual(len(slug_queries), 1)
+
+    def test_suffix_ordering_is_numeric(self):
+        Article.objects.create(title="Gala", slug="gala")
+        Article.objects.create(title="Gala", slug="gala-9")
+        Article.objects.create(title="Gala", slug="gala-10")
+        self.assertEqual(Article.objects.create(title="Gala").slug, "gala-11")
+
+    def test_slug_taken_concurrently_is_reallocated(self):
+        article = Article(title="Storm warning")
+        original = Article._free_slug
+
+        def stale_then_fresh(instance):
+            # First call misses a row inserted by a "concurrent" save
+            if not Article.objects.filter(slug="storm-warning").exists():
+                Article.objects.create(title="Other", slug="storm-warning")
+                return "storm-warning"
+            return original(instance)
+
+        with mock.patch.object(Article, "_free_slug", stale_then_fresh):
+            article.save()
+        self.assertEqual(article.slug, "storm-warning-1")
+
+
+class SlugMapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(title="Harbour reopens", status="published")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unknown_slug_is_404_without_queries(self):
+        with mock.patch("apps.articles.redirects.is_shared", return_value=True):
+            self.client.get(self.article.get_absolute_url())  # warm the map
+            with self.assertNumQueries(0):
+                response = self.client.get("/article/wp-login-php/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_per_process_cache_checks_the_database_before_404(self):
+        self.client.get(self.article.get_absolute_url())  # warm the map
+        # Published by another process: this worker's tag never moves
+        other = Article.objects.create(title="Published elsewhere", status="draft")
+        Article.objects.filter(pk=other.pk).update(status="published", published_at=timezone.now())
+        self.assertEqual(self.client.get(other.get_absolute_url()).status_code, 200)
+
+    def test_only_one_process_rebuilds_the_map(self):
+        from .redirects import UNKNOWN, resolve_slug
+
+        cache.add("slugmap:lock", 1)
+        with mock.patch("apps.articles.redirects.build_slug_map") as build:
+            self.assertEqual(resolve_slug("wp-login-php"), UNKNOWN)
+        build.assert_not_called()
+
+    def test_renamed_twice_redirects_in_one_hop(self):
+        first_slug = self.article.slug
+        self.article.slug = "harbour-reopens-after-repairs"
+        self.article.save()
+        second_slug = self.article.slug
+        self.article.slug = "harbour-reopens-to-boats"
+        self.article.save()
+
+        self.client.get(self.article.get_absolute_url())
+        for old in (first_slug, second_slug):
+            with self.assertNumQueries(0):
+                response = self.client.get(f"/article/{old}/")
+            self.assertRedirects(response, "/article/harbour-reopens-to-boats/", status_code=301)
+
+    def test_new_article_is_visible_immediately(self):
+        self.client.get("/article/nothing-here/")
+        article = Article.objects.create(title="Late breaking", status="published")
+        self.assertEqual(self.client.get(article.get_absolute_url()).status_code, 200)
+
+        Article.objects.filter(pk=article.pk).update(status="archived")
+        from .invalidation import invalidate_articles
+
+        invalidate_articles([article.pk])
+        self.assertEqual(self.client.get(article.get_absolute_url()).status_code, 404)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        from .redirects import BloomFilter
+
+        bloom = BloomFilter(5000)
+        slugs = [f"story-{i}" for i in range(5000)]
+        for slug in slugs:
+            bloom.add(slug)
+        self.assertTrue(all(slug in bloom for slug in slugs))
+        false_positives = sum(f"bogus-{i}" in bloom for i in range(5000))
+        self.assertLess(false_positives, 150)
+
+
+class StaticExportTests(TestCase):
+    def test_export_is_incremental(self):
+        import json
+        import tempfile
+        from pathlib import Path
+
+        article = Article.objects.create(title="Pier repairs", status="published")
+        with tempfile.TemporaryDirectory() as root:
+            options = {"output": root, "host": "testserver", "workers": 1, "stdout": StringIO()}
+            call_command("export_static", **options)
+            page = Path(root, "article", article.slug, "index.html")
+            self.assertIn(b"Pier repairs", page.read_bytes())
+            self.assertNotIn(b"csrfmiddlewaretoken", Path(root, "index.html").read_bytes())
+            manifest = json.loads(Path(root, "manifest.json").read_text())
+            self.assertEqual(manifest["pages"][f"/article/{article.slug}/"]["stamp"], article.updated.isoformat())
+
+            out = StringIO()
+            call_command("export_static", **{**options, "stdout": out})
+            self.assertIn("6 to render", out.getvalue())  # the five unchunked sitemaps and robots.txt only
+
+            article.status = "archived"
+            article.save()
+            call_command("export_static", **options)
+            self.assertFalse(page.exists())
+
+    def test_listings_drop_articles_removed_without_touching_updated(self):
+        import tempfile
+        from pathlib import Path
+
+        from .invalidation import invalidate_articles
+
+        older = Article.objects.create(title="Older pier story", status="published")
+        Article.objects.create(title="Newer pier story", status="published")
+        with tempfile.TemporaryDirectory() as root:
+            options = {"output": root, "host": "testserver", "workers": 1, "stdout": StringIO()}
+            call_command("export_static", **options)
+            homepage = Path(root, "index.html")
+            self.assertIn(f"/article/{older.slug}/".encode(), homepage.read_bytes())
+
+            # The admin "archive" action updates status in bulk; `updated` doesn't move.
+            Article.objects.filter(pk=older.pk).update(status="archived")
+            invalidate_articles([older.pk])
+            call_command("export_static", **options)
+            self.assertNotIn(f"/article/{older.slug}/".encode(), homepage.read_bytes())
+
+    def test_exported_signup_form_can_be_posted(self):
+        import re
+        import tempfile
+        from pathlib import Path
+
+        from django.core.cache import cache
+        from django.test import Client
+
+        from apps.newsletter.models import NewsletterPlacement, Subscriber
+
+        NewsletterPlacement.objects.create(key="article_footer", title="Get the briefing")
+        cache.delete("newsletter_placement:article_footer")
+        article = Article.objects.create(title="Pier repairs", status="published")
+        with tempfile.TemporaryDirectory() as root:
+            call_command("export_static", output=root, host="testserver", workers=1, stdout=StringIO())
+            html = Path(root, "article", article.slug, "index.html").read_text()
+
+        form = re.search(r'<form[^>]*action="([^"]+)"[^>]*>(.*?)</form>', html, re.S)
+        self.assertIsNotNone(form)
+        fields = dict(re.findall(r'<input[^>]*name="([^"]+)"[^>]*value="([^"]*)"', form.group(2)))
+        fields.update(email="reader@example.com")
+        response = Client(enforce_csrf_checks=True).post(
+            form.group(1), fields, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Subscriber.objects.filter(email="reader@example.com").exists())
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.match = Article.objects.create(
+            title="Harbour festival returns", deck="Boats and music", status="published"
+        )
+        Article.objects.create(title="Harbour festival draft", status="draft")
+        Article.objects.create(title="Council budget", status="published")
+
+    def test_search_page_lists_published_matches(self):
+        response = self.client.get("/search/", {"q": "festival"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c.pk for c in response.context["results"]], [self.match.pk])
+        self.assertContains(response, "Harbour festival returns")
+
+    def test_empty_query_shows_form_only(self):
+        response = self.client.get("/search/")
+        self.assertIsNone(response.context["results"])
+        self.assertContains(response, 'name="q"')
+
+
+class RelatedArticleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = Town.objects.create(name="Testtown", slug="testtown", council_area="south_ayrshire")
+
+        def make(title, body, category="news", town=None):
+            article = Article.objects.create(title=title, body_markdown=body, category=category, status="published")
+            if town:
+                article.towns.add(town)
+            return article
+
+        cls.harbour = make("Harbour ferry timetable cut", "Ferry sailings from the harbour pier are cut.", town=cls.town)
+        cls.ferry = make("Ferry operator defends harbour cuts", "The ferry operator says harbour pier sailings must fall.", town=cls.town)
+        cls.golf = make("Golf open qualifier", "Golfers tee off at the links course.", category="sport")
+        cls.links = make("Links course greens relaid", "Greenkeepers relay the links course for golfers.", category="sport")
+        cls.budget = make("Council budget vote", "Councillors debate the budget and council tax.")
+        cls.tax = make("Council tax rise approved", "Councillors approve the council tax budget.")
+        Article.objects.create(title="Harbour ferry draft", body_markdown="Ferry harbour pier.", status="draft")
+
+    def _related(self, article):
+        return list(article.related_links.values_list("related_id", flat=True))
+
+    def test_rebuild_ranks_text_and_town_neighbours_first(self):
+        from .related import rebuild_related
+
+        total, _ = rebuild_related(top_k=2)
+        self.assertEqual(total, 6)
+        self.assertEqual(self._related(self.harbour)[0], self.ferry.pk)
+        self.assertEqual(self._related(self.golf)[0], self.links.pk)
+        self.assertEqual(self._related(self.tax)[0], self.budget.pk)
+        self.assertEqual(len(self._related(self.tax)), 2)
+
+    def test_update_refreshes_changed_article_and_its_neighbours(self):
+        from .related import rebuild_related, update_related
+
+        rebuild_related(top_k=1)
+        Article.objects.filter(pk=self.tax.pk).update(
+            title="Golfers back links course", plain_text="Golfers and greenkeepers praise the links course.",
+            category="sport",
+        )
+        refreshed = update_related([self.tax.pk], top_k=1)
+
+        self.assertEqual(self._related(self.tax), [self.links.pk])
+        # budget listed tax, so it was rescored too
+        self.assertIn(self.budget.pk, refreshed)
+
+        Article.objects.filter(pk=self.ferry.pk).update(status="draft")
+        update_related([self.ferry.pk], top_k=1)
+        self.assertEqual(self._related(self.ferry), [])
+        self.assertNotIn(self.ferry.pk, self._related(self.harbour))
+
+    def test_update_from_a_saved_corpus_reads_only_the_changed_articles(self):
+        import pickle
+
+        from .related import build_corpus, rebuild_related, update_related
+
+        corpus = build_corpus()
+        rebuild_related(top_k=1, corpus=corpus)
+        saved = pickle.loads(pickle.dumps(corpus))
+        Article.objects.filter(pk=self.tax.pk).update(
+            title="Golfers back links course", plain_text="Golfers and greenkeepers praise the links course.",
+            category="sport",
+        )
+        with mock.patch("apps.articles.related.build_corpus") as rebuild:
+            refreshed = update_related([self.tax.pk], top_k=1, block_size=1, corpus=saved)
+        rebuild.assert_not_called()
+        # "greenkeepers" was below MIN_DF when the vocabulary was fitted, so
+        # golf and links tie until the next full build
+        self.assertIn(self._related(self.tax)[0], [self.golf.pk, self.links.pk])
+        self.assertIn(self.budget.pk, refreshed)
+
+        Article.objects.filter(pk=self.ferry.pk).update(status="draft")
+        update_related([self.ferry.pk], top_k=1, corpus=saved)
+        self.assertNotIn(self.ferry.pk, saved.rows)
+        self.assertNotIn(self.ferry.pk, self._related(self.harbour))
+
+    def test_queued_articles_are_refreshed_by_compute_related(self):
+        import tempfile
+        from pathlib import Path
+
+        from .invalidation import invalidate_articles
+        from .models import RelatedQueue
+
+        draft = Article.objects.get(title="Harbour ferry draft")
+        with tempfile.TemporaryDirectory() as root, self.settings(RELATED_CORPUS_PATH=Path(root, "corpus.pickle")):
+            call_command("compute_related", stdout=StringIO())
+            self.assertTrue(Path(root, "corpus.pickle").exists())
+            self.assertFalse(RelatedQueue.objects.exists())
+
+            # Bulk publishing bypasses Article.save, so the funnel queues it
+            Article.objects.filter(pk=draft.pk).update(status="published")
+            invalidate_articles([draft.pk])
+            self.assertTrue(RelatedQueue.objects.filter(article_id=draft.pk).exists())
+
+            out = StringIO()
+            call_command("compute_related", queued=True, stdout=out)
+            self.assertIn("Loaded 6 articles", out.getvalue())
+            self.assertTrue(self._related(draft))
+            self.assertFalse(RelatedQueue.objects.exists())
+
+    def test_detail_page_lists_related_stories(self):
+        from .related import rebuild_related
+
+        rebuild_related(top_k=2)
+        response = self.client.get(self.harbour.get_absolute_url())
+        self.assertEqual([card.pk for card in response.context["related"]][0], self.ferry.pk)
+        self.assertContains(response, "Related stories")
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from apps.core.models import SiteSettings
+
+        SiteSettings.load()
+        cls.author = Author.objects.create(name="Jo Reporter", slug="jo-reporter")
+        cls.town = Town.objects.create(name="Testtown", slug="testtown", council_area="south_ayrshire")
+        cls.article = Article.objects.create(
+            title="Harbour reopens", deck="Boats are back", category="news", status="published", author=cls.author,
+        )
+        cls.article.towns.add(cls.town)
+        Article.objects.create(title="Draft harbour plan", category="news", status="draft")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_feed_lists_published_cards(self):
+        for url in ("/feed/", "/news/feed/", "/towns/testtown/feed/", "/authors/jo-reporter/feed/"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, "<title>Harbour reopens</title>")
+                self.assertNotContains(response, "Draft harbour plan")
+        atom = self.client.get("/news/feed/atom/")
+        self.assertEqual(atom["Content-Type"], "application/atom+xml; charset=utf-8")
+        self.assertEqual(self.client.get("/nonsense/feed/").status_code, 404)
+
+    def test_polling_is_answered_from_the_cache(self):
+        first = self.client.get("/news/feed/")
+        with self.assertNumQueries(0):
+            not_modified = self.client.get("/news/feed/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        Article.objects.create(title="Council meets", category="news", status="published")
+        self.assertContains(self.client.get("/news/feed/", HTTP_IF_NONE_MATCH=first["ETag"]), "Council meets")
+
+
+class PlaceholderTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        from django.test import override_settings
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        overrides = override_settings(MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0, THUMBNAIL_CACHE_ALIAS="default")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _upload(self, name, size):
+        from io import BytesIO
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", size, "darkred").save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def test_uploaded_display_image_gets_size_and_placeholder(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(
+                title="Harbour", status="published", published_at=timezone.now(),
+                main_image=self._upload("main.jpg", (800, 600)),
+                hero_image=self._upload("hero.jpg", (1200, 400)),
+            )
+        article.refresh_from_db()
+        self.assertEqual((article.image_width, article.image_height), (800, 600))
+        self.assertTrue(article.image_placeholder.startswith("data:image/webp;base64,"))
+        self.assertLess(len(article.image_placeholder), 500)
+
+        card = cards(Article.objects.filter(pk=article.pk)).get()
+        self.assertEqual(card.image_placeholder, article.image_placeholder)
+
+        # Clearing main_image makes hero_image the display image
+        with self.captureOnCommitCallbacks(execute=True):
+            article.main_image = ""
+            article.save()
+        article.refresh_from_db()
+        self.assertEqual((article.image_width, article.image_height), (1200, 400))
+
+    def test_cards_render_placeholder_and_dimensions(self):
+        from django.urls import reverse
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(
+                title="Harbour", status="published", published_at=timezone.now(),
+                main_image=self._upload("main.jpg", (800, 600)),
+            )
+        html = self.client.get(reverse("search"), {"q": "Harbour"}).content.decode()
+        self.assertIn('width="600" height="400"', html)
+        self.assertIn("background: url(data:image/webp;base64,", html)
+
+
+class GenerateHeroImagesTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from pathlib import Path
+
+        from django.test import override_settings
+        from PIL import Image
+
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        overrides = override_settings(MEDIA_ROOT=self.root / "media", THUMBNAIL_WORKERS=0, THUMBNAIL_CACHE_ALIAS="default")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.images = self.root / "images"
+        self.images.mkdir()
+        for colour in ("navy", "olive"):
+            Image.new("RGB", (120, 68), colour).save(self.images / f"{colour}.jpg")
+        for i in range(3):
+            Article.objects.create(title=f"Story {i}", status="published", published_at=timezone.now())
+
+    def _run(self, **options):
+        out, err = StringIO(), StringIO()
+        call_command("generate_hero_images", workers=2, upload_workers=2, backoff=0, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_directory_source_and_resume(self):
+        checkpoint = self.root / "run.checkpoint"
+        out, _ = self._run(source=str(self.images), checkpoint=str(checkpoint))
+        self.assertIn("Saved 3 hero image(s)", out)
+        self.assertIn("fetch", out)
+        self.assertFalse(Article.objects.filter(hero_image="").exists())
+
+        # A rerun over the same checkpoint has nothing left, even with --replace
+        out, _ = self._run(source=str(self.images), checkpoint=str(checkpoint), replace=True)
+        self.assertIn("Resuming: 3 article(s)", out)
+        self.assertIn("No articles need a hero image.", out)
+
+    def test_http_source_retries_server_errors(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        body = (self.images / "navy.jpg").read_bytes()
+        seen = set()
+
+        class FlakyHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # The first request for each image fails
+                if self.path not in seen:
+                    seen.add(self.path)
+                    self.send_error(503)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        url = f"http://127.0.0.1:{server.server_port}/image/{{seed}}/{{width}}/{{height}}"
+        out, err = self._run(source=url)
+        self.assertIn("Saved 3 hero image(s)", out)
+        self.assertEqual(err, "")
+        self.assertRegex(out, r"fetch\s+3 ok\s+0 failed\s+3 retries")
+
+    def test_failed_fetches_are_checkpointed_and_the_run_continues(self):
+        import json
+
+        from .image_sources import DirectorySource
+
+        checkpoint = self.root / "run.checkpoint"
+        out, err = self._run(source="http://127.0.0.1:1/{nope}", checkpoint=str(checkpoint))
+        self.assertIn("Saved 0 hero image(s)", out)
+        self.assertIn("bad URL template", err)
+
+        real_fetch = DirectorySource.fetch
+        broken = Article.objects.order_by("pk").first()
+
+        def fetch(source, slug):
+            if slug == broken.slug:
+                raise RuntimeError("decoder crashed")
+            return real_fetch(source, slug)
+
+        with mock.patch.object(DirectorySource, "fetch", fetch):
+            out, err = self._run(source=str(self.images), checkpoint=str(checkpoint))
+        self.assertIn("Saved 2 hero image(s)", out)
+        self.assertIn("decoder crashed", err)
+        entries = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+        self.assertIn({"pk": broken.pk, "status": "failed", "error": "decoder crashed"}, entries)
@@ -0,0 +1,111 @@
+"""
+Town timelines — a denormalised (town, published_at, article) index.
+
+Town pages used to filter articles through the Article.towns join and sort
+the result by published_at; per-town counts ran a COUNT through the same
+join for every town. TownTimeline holds one row per town a published
+article is tagged with, carrying the article's published_at and the town's
+council_area, so:
+
+  - a town page is a range scan of town_timeline_idx, hydrated into cards
+    by primary key (TimelinePaginator, front_candidates());
+  - per-town counts (TownAdmin) and council_area_counts() are GROUP BYs
+    over this table alone.
+
+sync_timeline() rewrites the rows of a set of articles from their current
+state. It runs from Article.save (status or published_at changed), the
+m2m_changed receiver on Article.towns, and invalidate_articles() — which
+every bulk status change already calls.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+
+from apps.core.page_cache import invalidate_tags
+
+from .pagination import KeysetPaginator
+
+
+def sync_timeline(pks):
+    """Rewrite the timeline rows of articles ``pks``; return the town ids touched."""
+    from .models import Article, TownTimeline
+
+    pks = list(pks)
+    if not pks:
+        return set()
+
+    links = Article.towns.through.objects.filter(
+        article_id__in=pks,
+        article__status="published",
+        article__published_at__isnull=False,
+    ).values_list("town_id", "article_id", "article__published_at", "town__council_area")
+    entries = [
+        TownTimeline(town_id=town_id, article_id=article_id, published_at=published_at, council_area=area)
+        for town_id, article_id, published_at, area in links
+    ]
+    stale = TownTimeline.objects.filter(article_id__in=pks)
+    towns = set(stale.values_list("town_id", flat=True)) | {entry.town_id for entry in entries}
+
+    with transaction.atomic():
+        stale.delete()
+        TownTimeline.objects.bulk_create(entries)
+    return towns
+
+
+def towns_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed receiver for Article.towns: keep timelines and town pages current."""
+    from .models import TownTimeline
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        towns = sync_timeline([instance.pk])
+    elif action == "post_clear":
+        TownTimeline.objects.filter(town=instance).delete()
+        towns = {instance.pk}
+    else:
+        sync_timeline(pk_set)
+        towns = {instance.pk}
+    invalidate_tags(*(f"town:{pk}" for pk in towns))
+
+
+def front_candidates(town):
+    """The newest FRONT_WINDOW articles of ``town``, for build_front().
+
+    The LIMITed subquery is read off town_timeline_idx, so the outer query
+    only sorts that handful of rows.
+    """
+    from .fronts import FRONT_WINDOW
+    from .models import Article, TownTimeline
+
+    newest = (
+        TownTimeline.objects.filter(town=town)
+        .order_by("-published_at", "-article_id")
+        .values("article_id")[:FRONT_WINDOW]
+    )
+    return Article.objects.filter(pk__in=newest)
+
+
+class TimelinePaginator(KeysetPaginator):
+    """Keyset pages of a TownTimeline queryset, shown as article cards."""
+
+    pk_field = "article_id"
+
+    def hydrate(self, rows):
+        from .cards import cards
+        from .models import Article
+
+        by_pk = {card.pk: card for card in cards(Article.objects.filter(pk__in=[r.article_id for r in rows]))}
+        return [by_pk[row.article_id] for row in rows if row.article_id in by_pk]
+
+
+def council_area_counts():
+    """{council_area: published article count}; an article tagged with two
+    towns in one area counts once."""
+    from .models import TownTimeline
+
+    return dict(
+        TownTimeline.objects.values_list("council_area")
+        .annotate(count=Count("article", distinct=True))
+        .order_by()
+    )
@@ -1,8 +1,13 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator
-from django.http import HttpRequest, HttpResponse
+from django.db.models import F
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponsePermanentRedirect
 from django.shortcuts import get_object_or_404, redirect, render
 
+from apps.core.page_cache import add_tags, add_updated, cache_anonymous_page
+
+from .cards import cards
+from .fronts import GRID_PAGE_SIZE, front_grid_page, get_front
 from .models import (
     CATEGORY_CHOICES,
     SECTION_DESCRIPTIONS,
@@ -11,26 +16,86 @@ from .models import (
     Author,
     SlugRedirect,
     Town,
+    TownTimeline,
+)
+from .pagination import KeysetPaginator
+from .redirects import MISSING, UNKNOWN, resolve_slug
+from .search import search_articles
+from .timeline import TimelinePaginator, front_candidates
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_LENGTH = 200
+RELATED_COUNT = 4
+
+SECTION_LEAD_ORDERING = (
+    F("section_lead").desc(),
+    F("section_priority").desc(),
+    F("published_at").desc(),
 )
 
 
+def _legacy_page_redirect(request):
+    """Send legacy ?page=N URLs to the first page.
+
+    An offset has no stable position in a keyset timeline, and honouring it
+    would bring back the OFFSET scan.
+    """
+    if "page" not in request.GET:
+        return None
+    return HttpResponsePermanentRedirect(request.path)
+
+
+def _grid_page(request, queryset, count_key):
+    paginator = KeysetPaginator(queryset, GRID_PAGE_SIZE, count_key=count_key)
+    return paginator.get_page(
+        before=request.GET.get("before"),
+        after=request.GET.get("after"),
+    )
+
+
+def _front_grid_page(request, front, queryset, count_key, paginator_class=KeysetPaginator):
+    return front_grid_page(
+        front,
+        queryset,
+        count_key,
+        before=request.GET.get("before"),
+        after=request.GET.get("after"),
+        paginator_class=paginator_class,
+    )
+
+
+@cache_anonymous_page
 def article_detail(request: HttpRequest, slug: str) -> HttpResponse:
     """Public article detail page — published articles only."""
+    # Old slugs, and (with a shared page cache) slugs that never existed,
+    # are answered without a query
+    resolved = resolve_slug(slug)
+    if resolved == MISSING:
+        raise Http404
+    if resolved != UNKNOWN:
+        return redirect("articles:detail", slug=resolved, permanent=True)
+
     article = (
         Article.objects.filter(slug=slug, status="published")
         .select_related("author")
         .first()
     )
     if article:
-        return render(request, "articles/detail.html", {"article": article})
-
-    # Check for slug redirect (old URL → new slug)
+        # Precomputed by apps.articles.related: one lookup on the related_from index
+        related = list(cards(
+            Article.objects.filter(status="published", related_from__article=article)
+            .order_by("related_from__rank")
+        )[:RELATED_COUNT])
+        add_tags(request, *article.cache_tags(), *(f"article:{card.pk}" for card in related))
+        add_updated(request, article.updated)
+        return render(request, "articles/detail.html", {"article": article, "related": related})
+
+    # Slug map unavailable or a Bloom false positive: check redirects directly
     slug_redirect = SlugRedirect.objects.filter(old_slug=slug).select_related("article").first()
     if slug_redirect and slug_redirect.article.status == "published":
         return redirect(slug_redirect.article.get_absolute_url(), permanent=True)
 
-    # 404
-    get_object_or_404(Article, slug=slug, status="published")
+    raise Http404
 
 
 @staff_member_required
@@ -43,103 +108,92 @@ def article_preview(request: HttpRequest, slug: str) -> HttpResponse:
     })
 
 
+@cache_anonymous_page
 def section_page(request: HttpRequest, section: str) -> HttpResponse:
     """Section front page — curated layout mirroring homepage grammar."""
     if section not in VALID_SECTIONS:
-        from django.http import Http404
         raise Http404
 
-    section_display = dict(CATEGORY_CHOICES)[section]
-    section_description = SECTION_DESCRIPTIONS.get(section, "")
+    legacy = _legacy_page_redirect(request)
+    if legacy:
+        return legacy
 
-    articles = (
-        Article.objects.filter(category=section, status="published")
-        .select_related("author")
-        .order_by("-section_lead", "-section_priority", "-published_at")
-    )
+    tag = f"section:{section}"
+    add_tags(request, tag)
 
-    # Resolve lead story
-    lead = articles.first()
-    if not lead:
-        return render(request, "articles/section.html", {
-            "section_key": section,
-            "section_display": section_display,
-            "section_description": section_description,
-            "active_section": section,
-            "lead": None,
-            "secondaries": [],
-            "articles": None,
-        })
-
-    remaining = articles.exclude(pk=lead.pk)
-
-    # Secondary tier: next 3 articles
-    secondaries = list(remaining[:3])
-    secondary_pks = [a.pk for a in secondaries]
-
-    # Grid: everything else, paginated
-    grid_qs = remaining.exclude(pk__in=secondary_pks)
-    paginator = Paginator(grid_qs, 12)
-    page = paginator.get_page(request.GET.get("page"))
+    published = Article.objects.filter(category=section, status="published")
+    front = get_front(tag, published, lead_ordering=SECTION_LEAD_ORDERING)
+    page = None
+    if front.lead:
+        page = _front_grid_page(request, front, cards(published), tag)
 
     return render(request, "articles/section.html", {
         "section_key": section,
-        "section_display": section_display,
-        "section_description": section_description,
+        "section_display": dict(CATEGORY_CHOICES)[section],
+        "section_description": SECTION_DESCRIPTIONS.get(section, ""),
         "active_section": section,
-        "lead": lead,
-        "secondaries": secondaries,
+        "lead": front.lead,
+        "secondaries": front.secondaries,
         "articles": page,
     })
 
 
+@cache_anonymous_page
 def town_page(request: HttpRequest, slug: str) -> HttpResponse:
     """Town landing page — articles tagged with this town."""
-    town = get_object_or_404(Town, slug=slug)
-
-    articles = (
-        Article.objects.filter(towns=town, status="published")
-        .select_related("author")
-        .order_by("-published_at")
-    )
+    legacy = _legacy_page_redirect(request)
+    if legacy:
+        return legacy
 
-    lead = articles.first()
-    if not lead:
-        return render(request, "articles/town.html", {
-            "town": town,
-            "lead": None,
-            "secondaries": [],
-            "articles": None,
-            "active_section": None,
-        })
-
-    remaining = articles.exclude(pk=lead.pk)
-    secondaries = list(remaining[:3])
-    secondary_pks = [a.pk for a in secondaries]
+    town = get_object_or_404(Town, slug=slug)
+    tag = f"town:{town.pk}"
+    add_tags(request, tag)
 
-    grid_qs = remaining.exclude(pk__in=secondary_pks)
-    paginator = Paginator(grid_qs, 12)
-    page = paginator.get_page(request.GET.get("page"))
+    # Both read the town's timeline index rather than joining Article.towns
+    front = get_front(tag, front_candidates(town))
+    page = None
+    if front.lead:
+        timeline = TownTimeline.objects.filter(town=town)
+        page = _front_grid_page(request, front, timeline, tag, TimelinePaginator)
 
     return render(request, "articles/town.html", {
         "town": town,
-        "lead": lead,
-        "secondaries": secondaries,
+        "lead": front.lead,
+        "secondaries": front.secondaries,
         "articles": page,
         "active_section": None,
     })
 
 
+@cache_anonymous_page
 def author_detail(request: HttpRequest, slug: str) -> HttpResponse:
     """Author page with bio and paginated article list."""
+    legacy = _legacy_page_redirect(request)
+    if legacy:
+        return legacy
+
     author = get_object_or_404(Author, slug=slug)
-    articles_qs = (
+    add_tags(request, f"author:{author.pk}")
+    articles_qs = cards(
         Article.objects.filter(author=author, status="published")
         .order_by("-published_at")
     )
-    paginator = Paginator(articles_qs, 12)
-    page = paginator.get_page(request.GET.get("page"))
+    page = _grid_page(request, articles_qs, f"author:{author.pk}")
     return render(request, "articles/author.html", {
         "author": author,
         "articles": page,
     })
+
+
+def search(request: HttpRequest) -> HttpResponse:
+    """Reader search — ranked full-text matches, page-numbered."""
+    query = request.GET.get("q", "").strip()[:SEARCH_MAX_LENGTH]
+    results = None
+    if query:
+        matches = search_articles(Article.objects.filter(status="published"), query)
+        results = Paginator(cards(matches), SEARCH_PAGE_SIZE).get_page(request.GET.get("page"))
+    return render(request, "articles/search.html", {
+        "query": query,
+        "results": results,
+        "active_section": None,
+    })
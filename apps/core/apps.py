@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        from django.db.models.signals import post_save, pre_save
+        from easy_thumbnails.signal_handlers import find_uncommitted_filefields, signal_committed_filefields
+        from easy_thumbnails.signals import saved_file
+
+        from .thumbnails import eager_fields, file_saved
+
+        for model in {model for model, _, _ in eager_fields()}:
+            pre_save.connect(find_uncommitted_filefields, sender=model)
+            post_save.connect(signal_committed_filefields, sender=model)
+            saved_file.connect(file_saved, sender=model)
@@ -0,0 +1,577 @@
+"""Bulk-load a large, deterministic synthetic dataset for load and query-plan testing."""
+
+import io
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import UTC, date, datetime, timedelta
+from itertools import accumulate
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Max
+from django.utils.text import slugify
+
+from apps.advertising.models import AdCreative, AdCreativeStats, AdImpression, AdSlot
+from apps.articles.models import COUNCIL_AREA_CHOICES, Article, Author, SlugRedirect, Town, TownTimeline
+from apps.articles.redirects import invalidate_slug_map
+from apps.articles.rendering import meta_description_for
+from apps.articles.search import full_text_enabled, update_search_vectors
+from apps.core import synthetic
+from apps.core.page_cache import invalidate_tags
+from apps.newsletter.models import NewsletterEvent, NewsletterPlacement, Subscriber
+
+PROGRESS_EVERY = 100_000  # rows
+SITE = "https://loudounproud.com"
+REFERRER_SLUGS = 1000  # article slugs sampled as ad referrers
+IP_POOL = 50_000
+# Field types whose Python values COPY writes as text but SQLite needs adapted
+PREPARED_TYPES = {"DateTimeField", "UUIDField"}
+
+CATEGORY_WEIGHTS = {"news": 40, "community": 25, "sport": 15, "business": 10, "culture": 10}
+STATUS_WEIGHTS = {"published": 90, "draft": 5, "scheduled": 3, "archived": 2}
+TOWNS_PER_ARTICLE = {1: 70, 2: 22, 3: 8}
+PROVIDER_WEIGHTS = {"direct": 50, "house": 20, "sponsor": 20, "adsense": 10}
+NEWSLETTER_EVENT_WEIGHTS = {"impression": 94, "submission": 5, "confirmation": 1}
+CLICK_RATE = 0.015
+# Town popularity falls off with rank, so a few towns carry most articles
+TOWN_SKEW = 0.8
+
+USER_AGENTS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:127.0) Gecko/20100101 Firefox/127.0",
+]
+
+
+def weighted(weights):
+    """(choices, cum_weights) for rng.choices()."""
+    return list(weights), list(accumulate(weights.values()))
+
+
+def next_pk(model):
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+def ip_pool(rng):
+    """IP_POOL visitor addresses; events draw from these, so visitors repeat."""
+    return [f"{rng.randint(2, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(IP_POOL)]
+
+
+def copy_text(value):
+    """``value`` in COPY's text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class Writer:
+    """Appends rows to tables — COPY on PostgreSQL, executemany INSERTs elsewhere.
+
+    Rows are dicts of attname → value with explicit primary keys; a field a
+    row leaves out gets its default. Nothing goes through Model.save(), so
+    auto_now fields must be given too.
+    """
+
+    def __init__(self):
+        # The wrapper itself: every attribute read through the connection
+        # proxy costs a thread-local lookup, and there are millions of values
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.copy = self.connection.vendor == "postgresql"
+        self.models = []
+        self._columns = {}
+
+    def columns(self, model):
+        """[(attname, default, field if its values need get_db_prep_save)] for ``model``."""
+        if model not in self._columns:
+            self.models.append(model)
+            self._columns[model] = [
+                (f.attname, f.get_default(), f if not self.copy and f.get_internal_type() in PREPARED_TYPES else None)
+                for f in model._meta.concrete_fields
+            ]
+        return self._columns[model]
+
+    def write(self, model, rows):
+        if not rows:
+            return
+        columns = self.columns(model)
+        values = [[row.get(attname, default) for attname, default, _ in columns] for row in rows]
+        for index, (_, _, field) in enumerate(columns):
+            if field:
+                for row in values:
+                    row[index] = field.get_db_prep_save(row[index], self.connection)
+
+        qn = self.connection.ops.quote_name
+        table = qn(model._meta.db_table)
+        names = ", ".join(qn(f.column) for f in model._meta.concrete_fields)
+        with transaction.atomic(), self.connection.cursor() as cursor:
+            if self.copy:
+                buffer = io.StringIO()
+                for row in values:
+                    buffer.write("\t".join(map(copy_text, row)) + "\n")
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {table} ({names}) FROM STDIN", buffer)
+            else:
+                placeholders = ", ".join(["%s"] * len(columns))
+                cursor.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders})", values)
+
+    def finish(self):
+        """Move sequences past the explicit pks, and refresh planner statistics."""
+        with self.connection.cursor() as cursor:
+            for sql in self.connection.ops.sequence_reset_sql(no_style(), self.models):
+                cursor.execute(sql)
+            if self.copy:
+                for model in self.models:
+                    cursor.execute(f"ANALYZE {self.connection.ops.quote_name(model._meta.db_table)}")
+
+
+class Progress:
+    def __init__(self, stdout, label, total):
+        self.stdout = stdout
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.reported = 0
+        self.started = time.perf_counter()
+
+    def add(self, count):
+        self.done += count
+        if self.done - self.reported >= PROGRESS_EVERY and self.done < self.total:
+            self.reported = self.done
+            self.stdout.write(
+                f"  {self.label}: {self.done:,}/{self.total:,} ({100 * self.done // self.total}%)"
+                f" — {self.rate():,.0f} rows/s"
+            )
+
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.started, 1e-9)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return f"  {self.label:<12}{self.done:>12,} rows {elapsed:8.1f}s {self.rate():>10,.0f} rows/s"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load synthetic authors, towns, articles, ads, subscribers and events for load and query-plan "
+        "testing. On an empty database the same --seed and --end always produce the same data; on top of "
+        "existing rows the values repeat, but new rows take pks after the existing ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            help="Random seed (default: 1)",
+        )
+        parser.add_argument(
+            "--authors",
+            type=int,
+            default=50,
+            help="Authors to create (default: 50)",
+        )
+        parser.add_argument(
+            "--towns",
+            type=int,
+            default=20,
+            help="Towns to add to the existing ones (default: 20)",
+        )
+        parser.add_argument(
+            "--articles",
+            type=int,
+            default=10_000,
+            help="Articles to create (default: 10000)",
+        )
+        parser.add_argument(
+            "--redirect-rate",
+            type=float,
+            default=0.05,
+            help="Share of published articles given an old slug that redirects (default: 0.05)",
+        )
+        parser.add_argument(
+            "--creatives",
+            type=int,
+            default=50,
+            help="Ad creatives to create (default: 50)",
+        )
+        parser.add_argument(
+            "--impressions",
+            type=int,
+            default=100_000,
+            help="Ad impressions and clicks to record (default: 100000)",
+        )
+        parser.add_argument(
+            "--subscribers",
+            type=int,
+            default=10_000,
+            help="Newsletter subscribers to create (default: 10000)",
+        )
+        parser.add_argument(
+            "--events",
+            type=int,
+            default=100_000,
+            help="Newsletter placement events to record (default: 100000)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=730,
+            help="Days of history the timestamps are spread over (default: 730)",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            default=None,
+            metavar="YYYY-MM-DD",
+            help="Last day of that history (default: today)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per COPY or INSERT batch (default: 5000)",
+        )
+        parser.add_argument(
+            "--skip-search",
+            action="store_true",
+            help="Leave search_vector empty (the slowest step on PostgreSQL); backfill_article_text --all fills it later",
+        )
+
+    def handle(self, *args, **options):
+        counts = ("authors", "towns", "articles", "creatives", "impressions", "subscribers", "events")
+        if any(options[name] < 0 for name in counts) or options["days"] < 1:
+            raise CommandError("Counts must be zero or more, and --days at least 1.")
+        if not 0 <= options["redirect_rate"] <= 1:
+            raise CommandError("--redirect-rate must be between 0 and 1.")
+
+        self.seed = options["seed"]
+        self.batch_size = max(1, options["batch_size"])
+        self.end = datetime.combine(options["end"] or date.today(), datetime.min.time(), tzinfo=UTC)
+        self.start = self.end - timedelta(days=options["days"])
+        self.writer = Writer()
+        self.summaries = []
+        started = time.perf_counter()
+        method = "COPY" if self.writer.copy else "batched INSERTs"
+        self.stdout.write(f"Generating dataset with seed {self.seed} ({method}, {self.batch_size:,} rows per batch)…")
+
+        towns = self._towns(options["towns"])
+        authors = self._authors(options["authors"])
+        article_pks, referrers = self._articles(options["articles"], towns, authors, options["redirect_rate"])
+        self._ads(options["creatives"], options["impressions"], referrers)
+        self._newsletter(options["subscribers"], options["events"])
+        self.writer.finish()
+
+        if full_text_enabled() and article_pks and not options["skip_search"]:
+            self._search_vectors(article_pks)
+        # Every cached page carries the towns tag (page_cache.BASE_TAGS)
+        invalidate_tags("towns")
+        invalidate_slug_map()
+
+        for line in self.summaries:
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Generated dataset in {time.perf_counter() - started:.1f}s."))
+        if article_pks:
+            self.stdout.write("Run `manage.py compute_related` to fill related stories for the new articles.")
+
+    def _rng(self, stage):
+        # One stream per stage, so changing one count leaves the other tables' rows alone
+        return random.Random(f"{self.seed}:{stage}")
+
+    def _moment(self, rng, index, total):
+        """A timestamp in the window; ascending with ``index``, as rows would arrive."""
+        span = (self.end - self.start).total_seconds()
+        return self.start + timedelta(seconds=span * (index + rng.random()) / max(total, 1))
+
+    def _fill(self, label, model, total, make_row, after_batch=None):
+        """Write ``total`` rows of ``model``; make_row(index, pk) builds each.
+
+        Returns the first pk written.
+        """
+        first = next_pk(model)
+        progress = Progress(self.stdout, label, total)
+        batch = []
+        for index in range(total):
+            batch.append(make_row(index, first + index))
+            if len(batch) == self.batch_size or index == total - 1:
+                self.writer.write(model, batch)
+                if after_batch:
+                    after_batch()
+                progress.add(len(batch))
+                batch = []
+        if total:
+            self.summaries.append(progress.summary())
+        return first
+
+    def _towns(self, count):
+        """Add ``count`` towns; return (pk, name, council_area) for every town."""
+        rng = self._rng("towns")
+        areas = [key for key, _ in COUNCIL_AREA_CHOICES]
+
+        def town(index, pk):
+            name = synthetic.town_name(rng)
+            return {
+                "id": pk,
+                "name": name,
+                "slug": f"{slugify(name)}-{pk}",
+                "council_area": rng.choice(areas),
+                "sort_order": 100 + index,
+            }
+
+        self._fill("towns", Town, count, town)
+        return list(Town.objects.order_by("pk").values_list("pk", "name", "council_area"))
+
+    def _authors(self, count):
+        """Add ``count`` authors; return the pks articles are credited to."""
+        rng = self._rng("authors")
+
+        def author(index, pk):
+            first, last = rng.choice(synthetic.FIRST_NAMES), rng.choice(synthetic.LAST_NAMES)
+            name = f"{first} {last}"
+            return {
+                "id": pk,
+                "name": name,
+                "slug": f"{slugify(name)}-{pk}",
+                "role_title": rng.choice(synthetic.ROLE_TITLES),
+                "bio": f"{first} covers Ayrshire for Loudoun Proud.",
+                "location": "Ayrshire",
+                "email": f"{first}.{last}.{pk}@example.com".lower(),
+                "is_staff_writer": rng.random() < 0.6,
+                "created": self.start,
+                "updated": self.start,
+            }
+
+        first = self._fill("authors", Author, count, author)
+        if count:
+            return list(range(first, first + count))
+        return list(Author.objects.values_list("pk", flat=True))
+
+    def _articles(self, count, towns, authors, redirect_rate):
+        """Articles with their town tags, timelines and redirects.
+
+        Returns (pk range, sample of slugs for ad referrers).
+        """
+        rng = self._rng("articles")
+        if count:
+            self.stdout.write("Rendering the Markdown block bank…")
+        bank = synthetic.BodyBank(self._rng("bank"), [name for _, name, _ in towns]) if count else None
+        town_pks = [pk for pk, _, _ in towns]
+        town_weights = list(accumulate(1 / rank**TOWN_SKEW for rank in range(1, len(towns) + 1)))
+        town_info = {pk: (name, area) for pk, name, area in towns}
+        categories, category_weights = weighted(CATEGORY_WEIGHTS)
+        statuses, status_weights = weighted(STATUS_WEIGHTS)
+        tag_counts, tag_weights = weighted(TOWNS_PER_ARTICLE)
+        # Towns are shuffled so the busiest ones aren't simply the oldest
+        rng.shuffle(town_pks)
+
+        Link = Article.towns.through
+        pending = {Link: [], TownTimeline: [], SlugRedirect: []}
+        next_pks = {model: next_pk(model) for model in pending}
+        referrers = []
+        every = max(count // REFERRER_SLUGS, 1)
+
+        def add(model, row):
+            row["id"] = next_pks[model]
+            next_pks[model] += 1
+            pending[model].append(row)
+
+        def article(index, pk):
+            category = rng.choices(categories, cum_weights=category_weights)[0]
+            tagged = []
+            if town_pks:
+                wanted = rng.choices(tag_counts, cum_weights=tag_weights)[0]
+                tagged = list(dict.fromkeys(rng.choices(town_pks, cum_weights=town_weights, k=wanted)))
+            place = town_info[tagged[0]][0] if tagged else "Ayrshire"
+            title = synthetic.headline(rng, category, place)
+            slug = f"{slugify(title)[:280]}-{pk}"
+            deck = synthetic.deck(rng, place)
+            body = bank.body(rng)
+
+            status = rng.choices(statuses, cum_weights=status_weights)[0]
+            moment = self._moment(rng, index, count)
+            published_at = None
+            if status == "scheduled":
+                published_at = self.end + timedelta(hours=rng.randint(1, 24 * 30))
+            elif status != "draft":
+                published_at = moment
+            sponsored = rng.random() < 0.02
+
+            for town_pk in tagged:
+                add(Link, {"article_id": pk, "town_id": town_pk})
+                if status == "published":
+                    add(TownTimeline, {
+                        "town_id": town_pk,
+                        "article_id": pk,
+                        "published_at": published_at,
+                        "council_area": town_info[town_pk][1],
+                    })
+            if status == "published" and rng.random() < redirect_rate:
+                old_slug = f"{slugify(synthetic.headline(rng, category, place))[:280]}-{pk}"
+                if old_slug != slug:
+                    add(SlugRedirect, {"old_slug": old_slug, "article_id": pk, "created": moment})
+            if status == "published" and index % every == 0:
+                referrers.append(slug)
+
+            return {
+                "id": pk,
+                "title": title,
+                "slug": slug,
+                "deck": deck,
+                **body,
+                "meta_description": meta_description_for(deck, body["plain_text"]),
+                "category": category,
+                "author_id": rng.choice(authors) if authors else None,
+                "status": status,
+                "published_at": published_at,
+                "created": moment - timedelta(minutes=rng.randint(10, 600)),
+                "updated": moment,
+                "is_featured": rng.random() < 0.001,
+                "homepage_secondary": rng.random() < 0.005,
+                "section_lead": rng.random() < 0.002,
+                "is_sponsored": sponsored,
+                "sponsor_name": synthetic.fill(rng, "{Org_cap}", place) if sponsored else "",
+            }
+
+        def flush_related():
+            # Written after each article batch, so foreign keys always resolve
+            for model, rows in pending.items():
+                self.writer.write(model, rows)
+                rows.clear()
+
+        starts = dict(next_pks)
+        first = self._fill("articles", Article, count, article, flush_related)
+        for model, label in ((Link, "town tags"), (TownTimeline, "timelines"), (SlugRedirect, "redirects")):
+            if next_pks[model] > starts[model]:
+                self.summaries.append(f"  {label:<12}{next_pks[model] - starts[model]:>12,} rows")
+        return range(first, first + count), referrers
+
+    def _ads(self, creative_count, impression_count, referrers):
+        """Creatives across the ad slots, their impressions and clicks, and the running totals."""
+        rng = self._rng("ads")
+        if (creative_count or impression_count) and not AdSlot.objects.exists():
+            call_command("seed_ad_slots", stdout=self.stdout)
+        slots = list(AdSlot.objects.order_by("pk").values_list("pk", "name"))
+        providers, provider_weights = weighted(PROVIDER_WEIGHTS)
+
+        def creative(index, pk):
+            provider = rng.choices(providers, cum_weights=provider_weights)[0]
+            advertiser = synthetic.fill(rng, "{Org_cap}", "Ayrshire")
+            starts = self._moment(rng, index, creative_count)
+            row = {
+                "id": pk,
+                "slot_id": rng.choice(slots)[0],
+                "name": f"{advertiser} — {rng.choice(synthetic.MONTHS)} campaign",
+                "provider": provider,
+                "creative_type": "text",
+                "target_url": f"https://example.com/{slugify(advertiser)}",
+                "start_datetime": starts,
+                "end_datetime": starts + timedelta(days=rng.randint(30, 365)),
+                "priority": rng.randint(0, 100),
+                "weight": rng.randint(1, 100),
+                "created": starts,
+                "updated": starts,
+            }
+            if provider == "adsense":
+                row["creative_type"] = "html"
+                row["markup"] = f'<div class="ad-html" data-ad="{pk}"></div>'
+            return row
+
+        first = self._fill("creatives", AdCreative, creative_count, creative)
+        creatives = list(range(first, first + creative_count)) or list(AdCreative.objects.values_list("pk", flat=True))
+        if not creatives:
+            return
+        weights = list(accumulate(rng.randint(1, 100) for _ in creatives))
+        addresses = ip_pool(rng)
+        pages = [f"{SITE}{Article(slug=slug).get_absolute_url()}" for slug in referrers] or [f"{SITE}/"]
+        totals = Counter()
+
+        def impression(index, pk):
+            creative_id = rng.choices(creatives, cum_weights=weights)[0]
+            event_type = "click" if rng.random() < CLICK_RATE else "impression"
+            totals[creative_id, event_type] += 1
+            return {
+                "id": pk,
+                "creative_id": creative_id,
+                "event_type": event_type,
+                "timestamp": self._moment(rng, index, impression_count),
+                "user_agent": rng.choice(USER_AGENTS),
+                "ip_address": rng.choice(addresses),
+                "referrer": rng.choice(pages),
+            }
+
+        self._fill("impressions", AdImpression, impression_count, impression)
+
+        # AdCreativeStats.record() keeps these totals as events arrive; these
+        # events never went through it, so add theirs in one pass
+        # Keyed by creative (its primary key), so there are no pks to allocate
+        existing = set(AdCreativeStats.objects.filter(creative_id__in=creatives).values_list("creative_id", flat=True))
+        fresh = []
+        for creative_id in creatives:
+            impressions, clicks = totals[creative_id, "impression"], totals[creative_id, "click"]
+            if not impressions and not clicks:
+                continue
+            if creative_id in existing:
+                AdCreativeStats.objects.filter(creative_id=creative_id).update(
+                    impressions=F("impressions") + impressions, clicks=F("clicks") + clicks
+                )
+            else:
+                fresh.append(
+                    {"creative_id": creative_id, "impressions": impressions, "clicks": clicks, "updated": self.end}
+                )
+        self.writer.write(AdCreativeStats, fresh)
+        invalidate_tags(*(f"adslot:{name}" for _, name in slots))
+
+    def _newsletter(self, subscriber_count, event_count):
+        rng = self._rng("newsletter")
+        if (subscriber_count or event_count) and not NewsletterPlacement.objects.exists():
+            call_command("seed_newsletter_placements", stdout=self.stdout)
+        placements = list(NewsletterPlacement.objects.order_by("pk").values_list("pk", "key"))
+        keys = [key for _, key in placements] or [""]
+
+        def subscriber(index, pk):
+            first, last = rng.choice(synthetic.FIRST_NAMES), rng.choice(synthetic.LAST_NAMES)
+            return {
+                "id": pk,
+                "email": f"{first}.{last}.{pk}@example.com".lower(),
+                "first_name": first if rng.random() < 0.7 else "",
+                "date_subscribed": self._moment(rng, index, subscriber_count),
+                "is_active": rng.random() < 0.95,
+                "is_confirmed": rng.random() < 0.7,
+                "confirmation_token": uuid.UUID(int=rng.getrandbits(128), version=4),
+                "source_placement": rng.choice(keys),
+            }
+
+        self._fill("subscribers", Subscriber, subscriber_count, subscriber)
+        if not placements:
+            return
+
+        placement_pks = [pk for pk, _ in placements]
+        placement_weights = list(accumulate(rng.randint(1, 20) for _ in placements))
+        event_types, event_weights = weighted(NEWSLETTER_EVENT_WEIGHTS)
+        ip_hashes = [NewsletterEvent.hash_ip(ip) for ip in ip_pool(rng)]
+
+        def event(index, pk):
+            return {
+                "id": pk,
+                "placement_id": rng.choices(placement_pks, cum_weights=placement_weights)[0],
+                "event_type": rng.choices(event_types, cum_weights=event_weights)[0],
+                "ip_hash": rng.choice(ip_hashes),
+                "created": self._moment(rng, index, event_count),
+            }
+
+        self._fill("events", NewsletterEvent, event_count, event)
+
+    def _search_vectors(self, pks):
+        progress = Progress(self.stdout, "search", len(pks))
+        for offset in range(0, len(pks), self.batch_size):
+            batch = pks[offset:offset + self.batch_size]
+            update_search_vectors(batch)
+            progress.add(len(batch))
+        self.summaries.append(progress.summary())
@@ -0,0 +1,83 @@
+"""Generate eager thumbnail aliases (and article placeholders) for existing images (see apps.core.thumbnails)."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.core.thumbnails import eager_fields, generate_thumbnails
+
+BATCH_SIZE = 200
+
+
+def _generate(job):
+    fieldfile, aliases = job
+    try:
+        return generate_thumbnails(fieldfile, aliases), None
+    except Exception as exc:
+        return 0, f"{fieldfile.name}: {exc}"
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Generate every THUMBNAIL_EAGER_ALIASES alias for existing images; existing thumbnails are kept."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            default=[],
+            metavar="APP_LABEL.MODEL",
+            help="Only this model's image fields, e.g. articles.Article (repeatable)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(1, getattr(settings, "THUMBNAIL_WORKERS", 2)),
+            help="Images processed in parallel; 0 runs inline (default: THUMBNAIL_WORKERS)",
+        )
+
+    def handle(self, *args, **options):
+        fields = eager_fields()
+        if options["model"]:
+            wanted = {label.lower() for label in options["model"]}
+            fields = [entry for entry in fields if entry[0]._meta.label_lower in wanted]
+            if not fields:
+                raise CommandError(f"No eager thumbnail fields on {', '.join(options['model'])}")
+
+        started = time.perf_counter()
+        images = thumbnails = 0
+        workers = options["workers"]
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        try:
+            for model, field_name, aliases in fields:
+                jobs = self._jobs(model, field_name, aliases)
+                done = 0
+                while batch := list(islice(jobs, BATCH_SIZE)):
+                    results = pool.map(_generate, batch) if pool else map(_generate, batch)
+                    for count, error in results:
+                        thumbnails += count
+                        if error:
+                            self.stderr.write(self.style.ERROR(f"  FAIL {error}"))
+                    done += len(batch)
+                    images += len(batch)
+                self.stdout.write(f"{model._meta.label}.{field_name}: {done} image(s)")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {thumbnails} thumbnail(s) for {images} image(s) in {time.perf_counter() - started:.1f}s."
+            )
+        )
+
+    def _jobs(self, model, field_name, aliases):
+        field = model._meta.get_field(field_name)
+        rows = model.objects.exclude(**{field_name: ""}).values_list("pk", field_name).order_by("pk")
+        for pk, name in rows.iterator():
+            yield field.attr_class(model(pk=pk), field, name), aliases
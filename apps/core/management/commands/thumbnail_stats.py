@@ -0,0 +1,68 @@
+"""Report the bytes of each thumbnail alias and picture variant, from the URL cache (see apps.core.thumbnails)."""
+
+from collections import defaultdict
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from apps.core.thumbnails import (
+    eager_fields,
+    lookup_thumbnails,
+    picture_densities,
+    picture_formats,
+    variant_key,
+    variant_keys,
+)
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = "Summarise thumbnail file sizes per alias, format and density, compared with the alias's JPEG."
+
+    def handle(self, *args, **options):
+        # (alias, format, density) -> [files, bytes, missing]
+        totals = defaultdict(lambda: [0, 0, 0])
+        for model, field_name, aliases in eager_fields():
+            field = model._meta.get_field(field_name)
+            variants = [
+                (alias, fmt, density)
+                for alias in aliases
+                for fmt in (None, *picture_formats())
+                for density in picture_densities()
+                if variant_key(alias, fmt, density) in variant_keys(alias)
+            ]
+            names = model.objects.exclude(**{field_name: ""}).values_list(field_name, flat=True).order_by("pk").iterator()
+            while batch := list(islice(names, BATCH_SIZE)):
+                images = [field.attr_class(model(), field, name) for name in batch]
+                found = lookup_thumbnails([(image, variant_key(*v)) for image in images for v in variants])
+                for image in images:
+                    for variant in variants:
+                        info = found.get((image.name, variant_key(*variant)))
+                        row = totals[variant]
+                        if info is None or info.bytes is None:
+                            row[2] += 1
+                        else:
+                            row[0] += 1
+                            row[1] += info.bytes
+
+        rows = sorted(totals.items(), key=_order)
+        if not rows:
+            self.stdout.write(self.style.WARNING("No images in the THUMBNAIL_EAGER_ALIASES fields."))
+            return
+
+        self.stdout.write(f"{'alias':<24}{'files':>8}{'missing':>9}{'total KB':>12}{'avg KB':>9}{'vs JPEG':>9}")
+        for (alias, fmt, density), (files, size, missing) in rows:
+            jpeg_files, jpeg_size, _ = totals[(alias, None, density)]
+            label = variant_key(alias, fmt or "jpg", density)
+            average = size / files if files else 0
+            jpeg_average = jpeg_size / jpeg_files if jpeg_files else 0
+            ratio = f"{average / jpeg_average:.0%}" if fmt and jpeg_average else ""
+            self.stdout.write(
+                f"{label:<24}{files:>8}{missing:>9}{size / 1024:>12.1f}{average / 1024:>9.1f}{ratio:>9}"
+            )
+
+
+def _order(item):
+    (alias, fmt, density), _ = item
+    return alias, density, fmt or ""
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .page_cache import invalidate_tags
+
 
 class SiteSettings(models.Model):
     """Singleton model for site-wide configuration."""
@@ -40,6 +42,7 @@ class SiteSettings(models.Model):
     def save(self, *args, **kwargs):
         self.pk = 1
         super().save(*args, **kwargs)
+        invalidate_tags("settings")
 
     @classmethod
     def load(cls):
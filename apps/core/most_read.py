@@ -103,15 +103,16 @@ def get_most_read(window="24h", count=5):
 
         card_ids = [int(cid) for cid in raw_ids]
 
+        from apps.articles.cards import cards
         from apps.articles.models import Article
 
         cards_by_id = {
             c.pk: c
-            for c in Article.objects.filter(
+            for c in cards(Article.objects.filter(
                 pk__in=card_ids,
                 status="published",
                 exclude_from_most_read=False,
-            )
+            ))
         }
 
         # Preserve Redis ordering
@@ -0,0 +1,342 @@
+"""
+Full-page cache for anonymous GET requests, with tag-based invalidation.
+
+While a cached view renders, everything it depends on registers a tag on
+the request — the view itself ("article:12", "section:news", "town:4",
+"author:3", "home") and the ad_slot template tag ("adslot:leaderboard").
+Every page also depends on "settings" and "towns" via base.html. The page
+is stored together with the current version of each of its tags.
+
+Invalidating a tag gives it a new version, so every page that recorded the
+old one misses on its next request. Nothing is scanned or deleted, and
+unrelated pages stay cached.
+
+The same tags guard smaller fragments too: get_or_set_tagged() memoises
+any value alongside its tag versions, so a section front assembled once is
+reused until one of its articles changes.
+
+Keys (in the PAGE_CACHE_ALIAS cache):
+  page:{sha1(host + full path)}       — (content, headers, {tag: version})
+  pagevalid:{sha1(host + full path)}  — (ETag, Last-Modified, {tag: version})
+  pagetag:{tag}                       — current version (ns timestamp)
+
+Cached pages also carry weak validators (the body differs per reader by
+its CSRF token). The ETag digests the page's tag versions — so it changes
+when the article is saved, or an ad slot or the site settings change — and
+the `updated` a view records with add_updated(). Last-Modified is the
+newest of those. Nothing time-based goes in, so a client revalidating
+hours later still gets a 304 if nothing changed; time-dependent output
+(the news sitemap's window) may be that stale, which crawlers tolerate.
+The validators outlive the body by PAGE_CACHE_VALIDATOR_TIMEOUT, so a
+matching revalidation is answered 304 from the cache alone — no rendering,
+no queries — even after the body has expired.
+
+"Anonymous" means no session cookie, so staff and anyone with flash
+messages always get a fresh render. CSRF tokens are swapped for a fresh
+token on every hit. All operations fail open — a cache error just means the
+page is rendered normally.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+logger = logging.getLogger(__name__)
+
+CSRF_TOKEN_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b"__PAGE_CACHE_CSRF__"
+
+# Tags every cached page depends on (base.html context)
+BASE_TAGS = ("settings", "towns")
+
+SKIP_HEADERS = {"set-cookie", "vary"}
+
+# Backends private to one process: tag versions set in one worker are
+# invisible to every other
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def _cache():
+    return caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")]
+
+
+def is_shared():
+    """Whether invalidations reach every process, i.e. PAGE_CACHE_ALIAS isn't LocMem or dummy."""
+    try:
+        return not isinstance(_cache(), PROCESS_LOCAL_BACKENDS)
+    except Exception:
+        logger.exception("Page cache unavailable")
+        return False
+
+
+def _timeout():
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 300)
+
+
+def _tag_key(tag):
+    return f"pagetag:{tag}"
+
+
+def _validator_timeout():
+    return getattr(settings, "PAGE_CACHE_VALIDATOR_TIMEOUT", 7 * 24 * 3600)
+
+
+def _page_key(request):
+    raw = f"{request.get_host()}{request.get_full_path()}"
+    return "page:" + hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def _validator_key(page_key):
+    return "pagevalid:" + page_key.removeprefix("page:")
+
+
+def add_tags(request, *tags):
+    """Record that the page being rendered for ``request`` depends on ``tags``.
+
+    No-op outside a cached view, so callers never need to check.
+    """
+    collected = getattr(request, "_page_cache_tags", None)
+    if collected is not None:
+        collected.update(tags)
+
+
+def add_updated(request, updated):
+    """Record a last-change time (e.g. ``article.updated``) for the page's validators."""
+    if getattr(request, "_page_cache_tags", None) is None or updated is None:
+        return
+    previous = getattr(request, "_page_cache_updated", None)
+    if previous is None or updated > previous:
+        request._page_cache_updated = updated
+
+
+def invalidate_tags(*tags):
+    """Expire every cached page that depends on any of ``tags``."""
+    if not tags:
+        return
+    version = time.time_ns()
+    try:
+        _cache().set_many({_tag_key(tag): version for tag in set(tags)}, timeout=None)
+    except Exception:
+        logger.exception("Failed to invalidate page cache tags %s", tags)
+
+
+def _current_versions(cache, tags):
+    """Current version of each tag, initialising any that have none yet.
+
+    A tag with no version yet gets a unique negative one: distinct from any
+    version it had before the cache was cleared, yet older than every render
+    so initialising it never reads as an invalidation. add() rather than
+    set() so a concurrent invalidation is never overwritten.
+    """
+    tag_keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(list(tag_keys))
+    missing = [k for k in tag_keys if k not in versions]
+    for k in missing:
+        cache.add(k, -time.time_ns(), timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return {tag: versions.get(k, 0) for k, tag in tag_keys.items()}
+
+
+def get_tag_version(tag):
+    """Current version of ``tag``, or None if the cache is down."""
+    try:
+        return _current_versions(_cache(), [tag])[tag]
+    except Exception:
+        logger.exception("Failed to read page cache tag %s", tag)
+        return None
+
+
+def get_or_set_tagged(key, tags, compute, timeout, lock_timeout=None):
+    """Return ``compute()``, memoised under ``key`` until any of ``tags`` is invalidated.
+
+    With ``lock_timeout`` (seconds), only one caller at a time computes a
+    missing or stale value; the others get None rather than all computing
+    it at once. Fails open: on a cache error the value is simply computed.
+    """
+    cache = _cache()
+    try:
+        entry = cache.get(key)
+        if entry is not None:
+            tag_versions, value = entry
+            current = cache.get_many([_tag_key(tag) for tag in tag_versions])
+            if all(current.get(_tag_key(tag)) == v for tag, v in tag_versions.items()):
+                return value
+    except Exception:
+        logger.exception("Tagged cache lookup failed for %s", key)
+
+    lock_key = f"{key}:lock"
+    if lock_timeout:
+        try:
+            if not cache.add(lock_key, 1, timeout=lock_timeout):
+                return None
+        except Exception:
+            logger.exception("Tagged cache lock failed for %s", key)
+    try:
+        started = time.time_ns()
+        value = compute()
+        try:
+            versions = _current_versions(cache, tags)
+            if not any(v > started for v in versions.values()):
+                cache.set(key, (versions, value), timeout=timeout)
+        except Exception:
+            logger.exception("Tagged cache store failed for %s", key)
+        return value
+    finally:
+        if lock_timeout:
+            try:
+                cache.delete(lock_key)
+            except Exception:
+                logger.exception("Tagged cache unlock failed for %s", key)
+
+
+def _is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD") or _timeout() <= 0:
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or "messages" in request.COOKIES:
+        return False
+    return True
+
+
+def _is_cacheable_response(response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    cache_control = response.get("Cache-Control", "")
+    return "private" not in cache_control and "no-store" not in cache_control
+
+
+def _validators(tag_versions, updated=None):
+    """(weak ETag, Last-Modified timestamp) for a page with these tag versions.
+
+    A tag never invalidated has a negative version (see _current_versions);
+    its magnitude is still the time it was first seen.
+    """
+    raw = ";".join(f"{tag}={version}" for tag, version in sorted(tag_versions.items()))
+    stamps = [abs(version) // 1_000_000_000 for version in tag_versions.values()]
+    if updated is not None:
+        raw += f";updated={updated.isoformat()}"
+        stamps.append(int(updated.timestamp()))
+    etag = hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{etag}"', max(stamps, default=0)
+
+
+def _conditional(request, response):
+    """A 304 for ``response`` if the request's validators match, else None."""
+    last_modified = parse_http_date_safe(response.get("Last-Modified", ""))
+    conditional = get_conditional_response(
+        request, etag=response.get("ETag"), last_modified=last_modified, response=response
+    )
+    return None if conditional is response else conditional
+
+
+def _lookup(request, key):
+    cache = _cache()
+    found = cache.get_many([key, _validator_key(key)])
+    entry, validators = found.get(key), found.get(_validator_key(key))
+    if entry is None and validators is None:
+        return None
+
+    tag_versions = entry[2] if entry is not None else validators[2]
+    current = cache.get_many([_tag_key(tag) for tag in tag_versions])
+    for tag, version in tag_versions.items():
+        if current.get(_tag_key(tag)) != version:
+            return None
+
+    if entry is None:
+        # The body expired but nothing it depends on changed: a matching
+        # revalidation still needs no render
+        etag, last_modified, _ = validators
+        response = HttpResponse()
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        not_modified = _conditional(request, response)
+        if not_modified is not None:
+            not_modified["X-Page-Cache"] = "revalidated"
+        return not_modified
+
+    content, headers, _ = entry
+
+    response = HttpResponse()
+    for header, value in headers:
+        response[header] = value
+    response["X-Page-Cache"] = "hit"
+
+    not_modified = _conditional(request, response)
+    if not_modified is not None:
+        return not_modified
+
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+    response.content = content
+    return response
+
+
+def _store(request, key, response, started):
+    cache = _cache()
+    tag_versions = _current_versions(cache, request._page_cache_tags)
+
+    # A tag invalidated while we were rendering means this content may
+    # already be stale — serve it, but don't cache it.
+    if any(v > started for v in tag_versions.values()):
+        return False
+
+    etag, last_modified = _validators(tag_versions, getattr(request, "_page_cache_updated", None))
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+
+    content = CSRF_TOKEN_RE.sub(rb"\1" + CSRF_PLACEHOLDER + rb"\2", response.content)
+    headers = [(h, v) for h, v in response.items() if h.lower() not in SKIP_HEADERS]
+    cache.set(key, (content, headers, tag_versions), timeout=_timeout())
+    cache.set(
+        _validator_key(key), (etag, last_modified, tag_versions),
+        timeout=max(_timeout(), _validator_timeout()),
+    )
+    return True
+
+
+def cache_anonymous_page(view_func):
+    """Serve ``view_func`` from the page cache for anonymous GET requests."""
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = _page_key(request)
+        try:
+            cached = _lookup(request, key)
+        except Exception:
+            logger.exception("Page cache lookup failed for %s", request.path)
+            cached = None
+        if cached is not None:
+            return cached
+
+        started = time.time_ns()
+        request._page_cache_tags = set(BASE_TAGS)
+        response = view_func(request, *args, **kwargs)
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+
+        if _is_cacheable_response(response):
+            try:
+                stored = _store(request, key, response, started)
+            except Exception:
+                logger.exception("Page cache store failed for %s", request.path)
+                stored = False
+            response["X-Page-Cache"] = "miss"
+            if stored:
+                return _conditional(request, response) or response
+        return response
+
+    return wrapper
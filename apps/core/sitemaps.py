@@ -1,8 +1,29 @@
+"""
+Sitemaps.
+
+/sitemap.xml is an index. The small, article-independent sitemaps (static
+pages, sections, towns) are ordinary Django Sitemap classes served as
+/sitemap-<section>.xml. Articles are split into fixed pk ranges of
+SITEMAP_CHUNK_SIZE, one /sitemap-articles-<chunk>.xml each: a chunk reads
+two columns over one pk range and is cached until an article in that range
+changes (its sitemap:<chunk> tag), so a crawl of the whole archive is a run
+of cache hits. /sitemap-news.xml is the Google News sitemap of the last
+NEWS_SITEMAP_HOURS.
+"""
+
+from datetime import timedelta
+
 from django.contrib.sitemaps import Sitemap
+from django.db.models import F, Max
 from django.urls import reverse
+from django.utils import timezone
 
+from apps.articles.invalidation import SITEMAP_CHUNK_SIZE
 from apps.articles.models import Article, CATEGORY_CHOICES, Town
 
+NEWS_SITEMAP_HOURS = 48
+NEWS_SITEMAP_LIMIT = 1000  # Google News reads at most this many
+
 
 class StaticViewSitemap(Sitemap):
     changefreq = "weekly"
@@ -26,17 +47,6 @@ class SectionSitemap(Sitemap):
         return reverse("section_page", kwargs={"section": item})
 
 
-class ArticleSitemap(Sitemap):
-    changefreq = "daily"
-    priority = 0.9
-
-    def items(self):
-        return Article.objects.filter(status="published")
-
-    def lastmod(self, obj):
-        return obj.updated
-
-
 class TownSitemap(Sitemap):
     changefreq = "daily"
     priority = 0.7
@@ -46,3 +56,37 @@ class TownSitemap(Sitemap):
 
     def location(self, item):
         return item.get_absolute_url()
+
+
+def article_chunks():
+    """[(chunk, lastmod)] for every pk range holding a published article."""
+    return list(
+        Article.objects.filter(status="published")
+        .annotate(chunk=F("pk") / SITEMAP_CHUNK_SIZE)
+        .values_list("chunk")
+        .annotate(lastmod=Max("updated"))
+        .order_by("chunk")
+    )
+
+
+def article_chunk_entries(chunk):
+    """(slug, updated) of the published articles in pk range ``chunk``."""
+    return (
+        Article.objects.filter(
+            status="published",
+            pk__gte=chunk * SITEMAP_CHUNK_SIZE,
+            pk__lt=(chunk + 1) * SITEMAP_CHUNK_SIZE,
+        )
+        .order_by("pk")
+        .values_list("slug", "updated")
+    )
+
+
+def news_entries():
+    """Articles for the Google News sitemap, newest first."""
+    since = timezone.now() - timedelta(hours=NEWS_SITEMAP_HOURS)
+    return (
+        Article.objects.filter(status="published", published_at__gte=since)
+        .order_by("-published_at")
+        .values("slug", "title", "published_at")[:NEWS_SITEMAP_LIMIT]
+    )
@@ -0,0 +1,285 @@
+"""
+Deterministic synthetic content for `manage.py generate_dataset`.
+
+Everything here is drawn from a random.Random the caller seeds, so the same
+seed always yields the same names, headlines and bodies.
+
+Rendering a million Markdown bodies one by one would take longer than
+writing them, so BodyBank renders a few thousand blocks — paragraphs,
+headings, lists, quotes — once, and composes each article from them. A body
+joined from blocks with blank lines renders to the blocks' HTML joined with
+newlines, so the composed fields (body_html, body_hash, plain_text,
+word_count, reading_time) are exactly what rendered_fields() would store
+and `rerender_articles` finds nothing to redo. Two things would break that
+and composition avoids both: adjacent lists (Markdown merges them) and a
+repeated heading (toc suffixes the second id).
+"""
+
+import math
+
+import markdown
+from django.utils.text import slugify
+
+from apps.articles.rendering import MARKDOWN_EXTENSIONS, WORDS_PER_MINUTE, body_hash, text_fields
+
+FIRST_NAMES = [
+    "Alison", "Andrew", "Callum", "Catriona", "Craig", "David", "Eilidh", "Elaine", "Euan", "Fiona",
+    "Fraser", "Gillian", "Gordon", "Graeme", "Hamish", "Iain", "Isla", "Jamie", "Janet", "Kirsty",
+    "Lorna", "Malcolm", "Margaret", "Morag", "Morven", "Neil", "Niamh", "Rhona", "Ross", "Ruaridh",
+    "Ryan", "Sandra", "Scott", "Shona", "Stuart", "Tom", "Una", "Wendy",
+]
+
+LAST_NAMES = [
+    "Anderson", "Boyd", "Brown", "Cameron", "Campbell", "Craig", "Cunningham", "Docherty", "Fergusson",
+    "Fraser", "Gibson", "Hamilton", "Henderson", "Kennedy", "Kerr", "Lindsay", "MacDonald", "McBride",
+    "McCulloch", "McKenzie", "McLean", "Miller", "Montgomerie", "Morrison", "Muir", "Murray", "Reid",
+    "Robertson", "Shaw", "Sinclair", "Smith", "Stewart", "Thomson", "Wallace", "Watson", "Wilson",
+]
+
+ROLE_TITLES = ["Reporter", "Senior Reporter", "Sports Reporter", "Contributor", "Features Writer", "Editor"]
+
+TOWN_PREFIXES = [
+    "Auchen", "Bal", "Barr", "Craig", "Dal", "Drum", "Dun", "Glen", "Inver", "Kil", "Kin", "Knock",
+    "Lang", "Loch", "Mont", "Newton", "Pit", "Strath", "Tor", "West",
+]
+
+TOWN_SUFFIXES = [
+    "bank", "brae", "burn", "craig", "dale", "ford", "gate", "glen", "hall", "head", "hill", "holm",
+    "kirk", "law", "lee", "mains", "mill", "moss", "muir", "side", "ton", "wood",
+]
+
+ORGANISATIONS = [
+    "the community council", "East Ayrshire Council", "North Ayrshire Council", "South Ayrshire Council",
+    "the local development trust", "the parish church", "the rugby club", "the Rotary Club",
+    "the primary school parent council", "the bowling club", "a group of volunteers", "the health board",
+    "the heritage society", "the youth football club", "the tenants' association", "local businesses",
+]
+
+VENUES = [
+    "the town hall", "the community centre", "the Main Street car park", "the old library",
+    "the primary school", "the leisure centre", "the parish church hall", "the railway station",
+    "the public park", "the high street", "the village green", "the harbour",
+]
+
+SUBJECTS = {
+    "news": [
+        "road repairs", "a new housing development", "the school estate review", "bus service cuts",
+        "a planning application", "flood defences", "the council budget", "a bin collection change",
+    ],
+    "business": [
+        "a new cafe", "a family butcher", "the farmers' market", "a craft brewery", "a bike workshop",
+        "a bakery expansion", "a new retail park", "a hotel refurbishment",
+    ],
+    "community": [
+        "a charity fundraiser", "the gala day", "a litter pick", "a food bank appeal",
+        "a men's shed", "a community garden", "a lunch club", "a toddler group",
+    ],
+    "sport": [
+        "the junior football final", "a charity 10k", "the curling league", "a cricket cup run",
+        "the swimming gala", "a golf open", "the boxing club", "a cycling sportive",
+    ],
+    "culture": [
+        "a Burns supper", "the pipe band", "an art exhibition", "a folk festival", "the drama club",
+        "a book festival", "a heritage walk", "a choir concert",
+    ],
+}
+
+HEADLINES = [
+    "{Town} residents back plans for {subject}",
+    "{subject_cap} given the go-ahead in {Town}",
+    "Questions raised over {subject} in {Town}",
+    "{Town} celebrates as {subject} returns",
+    "Work to start on {subject} in {Town} this {month}",
+    "{Person} leads push for {subject} in {Town}",
+    "{Town} group wins £{amount} for {subject}",
+    "Date set for {subject} at {venue_in_town}",
+    "What {subject} means for {Town}",
+    "{Town}'s {subject} draws record crowd",
+]
+
+DECKS = [
+    "{Org_cap} says the move will make a real difference to families across {Town}.",
+    "More than {number} people had their say before the decision was taken on {day}.",
+    "The scheme, costing £{amount}, is expected to be finished by {month}.",
+    "Organisers hope to build on last year's success with an even bigger turnout.",
+    "{Person}, who has lived in {Town} for {small} years, says it has been a long time coming.",
+]
+
+SENTENCES = [
+    "{Org_cap} confirmed the news on {day}, saying the work would begin in {month}.",
+    "More than {number} people attended a public meeting at {venue} to hear the proposals.",
+    "The project is expected to cost around £{amount}, with funding from {org}.",
+    "\"It's been a long time coming,\" said {person}, who has lived in {Town} for {small} years.",
+    "Local councillor {person} said the decision was \"good news for the whole area\".",
+    "Residents have been asked to share their views before the end of {month}.",
+    "The plans include new seating, better lighting and improved access at {venue}.",
+    "Organisers say {number} tickets were sold within a week of going on sale.",
+    "A spokesperson for {org} said further details would be announced *in due course*.",
+    "Volunteers from {Town} and the surrounding villages have given up {small} weekends to help.",
+    "The group meets every {day} evening at {venue} and welcomes new members.",
+    "According to {org}, demand has risen by {small} per cent over the past year.",
+    "Full details are available on [the council website](https://www.example.gov.uk/{slug}).",
+    "Parking will be limited on the day, and visitors are encouraged to walk or take the bus.",
+    "The scheme was first proposed {small} years ago but stalled during the pandemic.",
+    "**Update:** {org} has since confirmed that the timetable is unchanged.",
+    "Those who cannot attend can watch online -- the session will be streamed live.",
+    "{Person} thanked everyone involved, adding that {Town} had \"pulled together brilliantly\".",
+    "The money will also pay for {small} new jobs, most of them filled locally.",
+    "Entry is free, although donations to {org} are welcome.",
+]
+
+HEADINGS = [
+    "What happens next", "Background", "How to get involved", "What residents say", "The cost",
+    "Timeline", "Why it matters", "What the council says", "Getting there", "Key dates",
+    "Funding", "Reaction", "Previous plans", "Opening hours", "Who is affected", "The numbers",
+    "Road closures", "History of the site", "Tickets", "A word from the organisers",
+    "Concerns raised", "Next steps", "In pictures", "Results", "How to have your say",
+]
+
+LIST_ITEMS = [
+    "Free parking at {venue}", "Family activities from 10am", "A drop-in session on {day}",
+    "Consultation closes at the end of {month}", "Funding of £{amount}", "{number} new homes",
+    "Stalls from {small} local producers", "Refreshments from {org}", "Accessible toilets on site",
+    "Live music through the afternoon", "Road closures from 8am", "Bus diversions via {Town}",
+]
+
+QUOTES = [
+    "\"We've waited {small} years for this, and it's finally happening,\" said {person}.",
+    "\"It's a real boost for {Town} -- people here deserve nothing less.\"",
+    "\"The response has been overwhelming. We couldn't have done it without {org}.\"",
+    "\"This is about making sure {Town} has a future as well as a past.\"",
+]
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+PARAGRAPHS = 1500
+LISTS = 120
+QUOTE_BLOCKS = 120
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def town_name(rng):
+    return rng.choice(TOWN_PREFIXES) + rng.choice(TOWN_SUFFIXES)
+
+
+def _capitalise(text):
+    return text[:1].upper() + text[1:]
+
+
+class _Placeholders(dict):
+    """Template values, each drawn from ``rng`` only if the template uses it."""
+
+    def __init__(self, rng, town, subject):
+        super().__init__(Town=town, subject=subject, subject_cap=_capitalise(subject))
+        self.rng = rng
+
+    def __missing__(self, key):
+        rng = self.rng
+        if key in ("person", "Person"):
+            value = person_name(rng)
+        elif key == "org":
+            value = rng.choice(ORGANISATIONS)
+        elif key == "Org_cap":
+            value = _capitalise(rng.choice(ORGANISATIONS))
+        elif key == "venue":
+            value = rng.choice(VENUES)
+        elif key == "venue_in_town":
+            value = f"{rng.choice(VENUES)} in {self['Town']}"
+        elif key == "day":
+            value = rng.choice(DAYS)
+        elif key == "month":
+            value = rng.choice(MONTHS)
+        elif key == "amount":
+            value = f"{rng.randint(5, 950) * 1000:,}"
+        elif key == "number":
+            value = rng.randint(20, 900)
+        elif key == "small":
+            value = rng.randint(2, 30)
+        elif key == "slug":
+            value = slugify(self["subject"] or self["Town"])
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+
+def fill(rng, template, town, subject=""):
+    """``template`` with its placeholders drawn from ``rng``."""
+    return template.format_map(_Placeholders(rng, town, subject))
+
+
+def headline(rng, category, town):
+    subject = rng.choice(SUBJECTS[category])
+    return fill(rng, rng.choice(HEADLINES), town, subject)
+
+
+def deck(rng, town):
+    return fill(rng, rng.choice(DECKS), town)
+
+
+class Block:
+    __slots__ = ("markdown", "html", "plain", "words")
+
+    def __init__(self, renderer, text):
+        self.markdown = text
+        self.html = renderer.reset().convert(text)
+        fields = text_fields(self.html)
+        self.plain = fields["plain_text"]
+        self.words = fields["word_count"]
+
+
+class BodyBank:
+    """Pre-rendered Markdown blocks, and article bodies composed from them."""
+
+    def __init__(self, rng, towns):
+        # One renderer for the whole bank; render_markdown() builds one per call
+        renderer = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        self.paragraphs = [
+            Block(renderer, " ".join(fill(rng, rng.choice(SENTENCES), rng.choice(towns)) for _ in range(rng.randint(2, 5))))
+            for _ in range(PARAGRAPHS)
+        ]
+        self.headings = [Block(renderer, f"## {text}") for text in HEADINGS]
+        self.lists = []
+        for _ in range(LISTS):
+            marker = rng.choice(("-", "1."))
+            items = rng.sample(LIST_ITEMS, rng.randint(3, 5))
+            town = rng.choice(towns)
+            self.lists.append(Block(renderer, "\n".join(f"{marker} {fill(rng, item, town)}" for item in items)))
+        self.quotes = [
+            Block(renderer, f"> {fill(rng, rng.choice(QUOTES), rng.choice(towns))}") for _ in range(QUOTE_BLOCKS)
+        ]
+
+    def blocks(self, rng):
+        """A body's blocks: a few opening paragraphs, then 0–3 headed sections."""
+        blocks = rng.sample(self.paragraphs, rng.randint(2, 4))
+        for heading in rng.sample(self.headings, rng.randint(0, 3)):
+            blocks.append(heading)
+            blocks.extend(rng.sample(self.paragraphs, rng.randint(1, 3)))
+            extra = rng.random()
+            if extra < 0.2:
+                # Always followed by a paragraph, so two lists never touch
+                blocks += [rng.choice(self.lists), rng.choice(self.paragraphs)]
+            elif extra < 0.35:
+                blocks.append(rng.choice(self.quotes))
+        return blocks
+
+    def body(self, rng):
+        """body_markdown and every field rendered_fields() derives from it."""
+        blocks = self.blocks(rng)
+        body_markdown = "\n\n".join(block.markdown for block in blocks)
+        word_count = sum(block.words for block in blocks)
+        return {
+            "body_markdown": body_markdown,
+            "body_html": "\n".join(block.html for block in blocks),
+            "body_hash": body_hash(body_markdown),
+            "plain_text": " ".join(block.plain for block in blocks),
+            "word_count": word_count,
+            "reading_time": math.ceil(word_count / WORDS_PER_MINUTE),
+        }
@@ -0,0 +1,169 @@
+from django import template
+
+register = template.Library()
+
+# Where prefetch_thumbnails finds an item's image, in order
+IMAGE_ATTRS = ("display_image", "image", "photo", "hero_image")
+
+# When {% picture %} switches to its ``mobile`` alias
+MOBILE_MEDIA = "(max-width: 799px)"
+
+
+def _stash(context):
+    """Per-request {(file name, variant key): ThumbnailInfo or None}; a
+    throwaway dict outside a request."""
+    request = context.get("request")
+    if request is None:
+        return {}
+    stash = getattr(request, "_thumbnails", None)
+    if stash is None:
+        stash = request._thumbnails = {}
+    return stash
+
+
+def _is_fieldfile(value):
+    return hasattr(value, "field") and hasattr(value, "instance")
+
+
+def _images(values):
+    """The image FieldFile of each item in ``values``, flattening lists and pages."""
+    for value in values:
+        if not value:
+            continue
+        if _is_fieldfile(value):
+            yield value
+            continue
+        attr = next((attr for attr in IMAGE_ATTRS if hasattr(value, attr)), None)
+        if attr:
+            image = getattr(value, attr)
+            if image:
+                yield image
+        elif hasattr(value, "__iter__") and not isinstance(value, str):
+            yield from _images(value)
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_thumbnails(context, *items, aliases="card"):
+    """
+    Look up the thumbnail URLs of every item's image in one cache read.
+
+    Usage: {% prefetch_thumbnails lead secondaries cards aliases="hero,hero_mobile,card" %}
+    Items may be cards, models, FieldFiles, lists or pages. Picture aliases
+    include their format and density variants. Later cached_thumbnail and
+    picture tags in the same request read the results, and images an
+    earlier prefetch already covered are not looked up again.
+    """
+    from apps.core.thumbnails import lookup_thumbnails, variant_keys
+
+    request = context.get("request")
+    if request is None:
+        return ""
+    stash = _stash(context)
+    names = [key for alias in aliases.split(",") if alias.strip() for key in variant_keys(alias.strip())]
+    # Anything an earlier prefetch on this page already covered is skipped
+    pairs = [
+        (image, alias)
+        for image in _images(items)
+        for alias in names
+        if (image.name, alias) not in stash
+    ]
+    if pairs:
+        stash.update(lookup_thumbnails(pairs))
+    return ""
+
+
+@register.simple_tag(takes_context=True)
+def cached_thumbnail(context, fieldfile, alias):
+    """
+    The URL of ``alias`` for ``fieldfile`` — a cache-backed {% thumbnail %}.
+
+    Usage: <img src="{% cached_thumbnail card.display_image 'card' %}">
+       or: {% cached_thumbnail card.display_image 'card' as thumb %}{{ thumb.width }}
+    Uses prefetch_thumbnails results when there are any; otherwise one
+    cache read, then easy_thumbnails on a miss.
+    """
+    from apps.core.thumbnails import resolve_thumbnail, thumbnail_info
+
+    if not fieldfile:
+        return ""
+    stash = getattr(context.get("request"), "_thumbnails", None)
+    key = (fieldfile.name, alias)
+    if stash is None or key not in stash:
+        return thumbnail_info(fieldfile, alias) or ""
+    if stash[key] is None:
+        stash[key] = resolve_thumbnail(fieldfile, alias)
+    return stash[key] or ""
+
+
+@register.inclusion_tag("includes/_picture.html", takes_context=True)
+def picture(context, fieldfile, alias, mobile=None, alt="", loading=None, placeholder=""):
+    """
+    A <picture> for ``alias`` of ``fieldfile``: AVIF and WebP <source>s and
+    a JPEG <img>, each with a 1x/2x srcset, from the precomputed variants.
+
+    Usage: {% picture card.display_image 'hero' mobile='hero_mobile' alt=card.title loading='lazy' %}
+    ``mobile`` adds the same sources for screens matching MOBILE_MEDIA.
+    The <img> carries the thumbnail's width and height, and ``placeholder``
+    (a data: URI) as its background until the image has loaded.
+    Variants missing from the cache are left out and queued for the pool
+    (at most once per THUMBNAIL_RETRY_AFTER per file); only the plain JPEG
+    is ever rendered on the request path.
+    """
+    from apps.core.thumbnails import (
+        MIME_TYPES,
+        aliases_for,
+        lookup_thumbnails,
+        picture_densities,
+        picture_formats,
+        resolve_thumbnail,
+        submit_from_render,
+        variant_key,
+        variant_keys,
+    )
+
+    if not fieldfile:
+        return {}
+    stash = _stash(context)
+    renditions = [(mobile, MOBILE_MEDIA), (alias, None)] if mobile else [(alias, None)]
+    keys = [key for name, _ in renditions for key in variant_keys(name)]
+    unseen = [(fieldfile, key) for key in keys if (fieldfile.name, key) not in stash]
+    if unseen:
+        stash.update(lookup_thumbnails(unseen))
+    found = {key: stash.get((fieldfile.name, key)) for key in keys}
+
+    for name, _ in renditions:
+        if found[name] is None:
+            found[name] = stash[(fieldfile.name, name)] = resolve_thumbnail(fieldfile, name)
+    if found[alias] is None:
+        return {}
+    if not all(found.values()):
+        submit_from_render(fieldfile, aliases_for(fieldfile.instance.__class__, fieldfile.field.name) or [alias])
+
+    def srcset(name, fmt):
+        base = found.get(variant_key(name, fmt))
+        if base is None:
+            return ""
+        parts = [f"{base.url} 1x"]
+        for density in picture_densities():
+            info = found.get(variant_key(name, fmt, density))
+            # A source too small to upscale yields no sharper file
+            if density != 1 and info and info.width > base.width:
+                parts.append(f"{info.url} {density}x")
+        return ", ".join(parts)
+
+    sources = []
+    for name, media in renditions:
+        for fmt in picture_formats():
+            if candidates := srcset(name, fmt):
+                sources.append({"media": media, "type": MIME_TYPES.get(fmt), "srcset": candidates})
+        if media:
+            sources.append({"media": media, "type": None, "srcset": srcset(name, None)})
+    img_srcset = srcset(alias, None)
+    return {
+        "img": found[alias],
+        "img_srcset": img_srcset if "," in img_srcset else "",
+        "sources": sources,
+        "alt": alt,
+        "loading": loading,
+        "placeholder": placeholder,
+    }
@@ -0,0 +1,386 @@
+"""
+Eager thumbnails — every alias a template renders, generated when the
+image is saved rather than by the first reader to request it.
+
+THUMBNAIL_EAGER_ALIASES maps "app_label.Model.field" to the aliases the
+templates use for that field. When a save commits a new file to one of
+those fields (easy_thumbnails' saved_file signal), queue_thumbnails()
+hands the aliases to a small thread pool once the transaction commits, so
+the admin request that uploaded the image returns straight away.
+
+The pool is bounded twice: THUMBNAIL_WORKERS threads, and at most
+THUMBNAIL_QUEUE_SIZE files waiting or in progress. A save that finds the
+queue full is logged and skipped — the template tags still render the
+alias on first view, and `manage.py generate_thumbnails` catches up.
+THUMBNAIL_WORKERS = 0 generates inline, which the backfill command and
+tests rely on.
+
+Rendering a thumbnail through easy_thumbnails looks up its source and
+thumbnail rows and may stat the file on remote storage. Instead, every
+generated alias is recorded in the THUMBNAIL_CACHE_ALIAS cache as a
+ThumbnailInfo (final URL, width, height) and templates read it back with
+the tags in thumbnail_tags:
+
+  {% prefetch_thumbnails lead secondaries cards aliases="hero,card" %}
+      one get_many for every card on the page
+  {% cached_thumbnail card.display_image "card" %}
+      the prefetched URL; a miss falls back to easy_thumbnails once and
+      records the result
+
+Keys (in the THUMBNAIL_CACHE_ALIAS cache):
+  thumb:{version}:{sha1(file name)}:{alias}  — ThumbnailInfo
+  thumbqueued:{sha1(file name)}              — queued by a render lately
+
+The version digests the alias and picture settings and MEDIA_URL, so
+changing an alias's size or moving the CDN orphans every old entry instead
+of serving stale URLs. Cache errors fail open to easy_thumbnails, logged
+once a minute at most, and renders stop queueing files until it is back.
+
+Aliases in THUMBNAIL_PICTURE_ALIASES are also generated in each
+THUMBNAIL_PICTURE_FORMATS format (AVIF, WebP) at each density (1x, 2x),
+plus a 2x JPEG; variant_key() names them ("card@2x.webp"). The {% picture %}
+tag emits them as <source>/srcset. Variants are never encoded on the
+request path: a page that finds one missing renders without it and queues
+the file's eager aliases for the pool — at most once per
+THUMBNAIL_RETRY_AFTER seconds per file, so a variant that keeps failing
+doesn't requeue the file on every render. `manage.py thumbnail_stats`
+reports their bytes.
+
+Once an image's thumbnails exist, thumbnails_generated is sent (from the
+pool, or the backfill command) so apps can derive more from the same file
+— apps.articles.placeholders stores each article's blur placeholder.
+"""
+
+import base64
+import hashlib
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from easy_thumbnails.alias import aliases as thumbnail_aliases
+from easy_thumbnails.exceptions import InvalidImageFormatError
+from easy_thumbnails.files import get_thumbnailer
+from PIL import ExifTags, Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CACHE_TIMEOUT = 30 * 24 * 3600  # seconds
+THUMBNAIL_RETRY_AFTER = 10 * 60  # seconds between render-time submits of a file
+# While the cache is down every render fails the same way: log it this often
+CACHE_WARNING_INTERVAL = 60  # seconds
+# Bumped when ThumbnailInfo changes shape, so old pickles are never read
+INFO_SCHEMA = 2
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg"}
+
+# Longest side of a placeholder, in pixels; the browser scales it up blurred
+PLACEHOLDER_SIZE = 16
+
+# Sent with sender=model class and fieldfile once generate_thumbnails() is done
+thumbnails_generated = Signal()
+
+# easy_thumbnails passes JPEG's numeric chroma subsampling to every encoder
+JPEG_SUBSAMPLING = {0: "4:4:4", 1: "4:2:2", 2: "4:2:0"}
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+_pending = set()
+_last_cache_warning = 0.0
+
+
+def _cache_failed(action, exc):
+    """Log a cache failure once per CACHE_WARNING_INTERVAL, without the traceback."""
+    global _last_cache_warning
+    now = time.monotonic()
+    with _lock:
+        if now - _last_cache_warning < CACHE_WARNING_INTERVAL:
+            return
+        _last_cache_warning = now
+    logger.warning("Thumbnail cache %s failed: %r", action, exc)
+
+
+def eager_fields():
+    """[(model, field_name, aliases)] for every configured field."""
+    fields = []
+    for label, aliases in getattr(settings, "THUMBNAIL_EAGER_ALIASES", {}).items():
+        model_label, field_name = label.rsplit(".", 1)
+        fields.append((apps.get_model(model_label), field_name, list(aliases)))
+    return fields
+
+
+def aliases_for(model, field_name):
+    label = f"{model._meta.label}.{field_name}"
+    return list(getattr(settings, "THUMBNAIL_EAGER_ALIASES", {}).get(label, ()))
+
+
+def picture_formats():
+    """THUMBNAIL_PICTURE_FORMATS, less any this Pillow build cannot write."""
+    return [fmt for fmt in getattr(settings, "THUMBNAIL_PICTURE_FORMATS", ()) if features.check(fmt)]
+
+
+def picture_densities():
+    return list(getattr(settings, "THUMBNAIL_PICTURE_DENSITIES", (1,)))
+
+
+def variant_key(alias, fmt=None, density=1):
+    """Cache name of one variant of ``alias``; the plain 1x JPEG is just ``alias``."""
+    key = alias if density == 1 else f"{alias}@{density}x"
+    return f"{key}.{fmt}" if fmt else key
+
+
+def variant_keys(alias):
+    """Every cache name rendering ``alias`` can use, the plain alias first."""
+    if alias not in getattr(settings, "THUMBNAIL_PICTURE_ALIASES", ()):
+        return [alias]
+    return [
+        variant_key(alias, fmt, density)
+        for fmt in (None, *picture_formats())
+        for density in picture_densities()
+    ]
+
+
+class ThumbnailInfo(namedtuple("ThumbnailInfo", "url width height bytes")):
+    """A rendered alias; prints as its URL so it can stand in for {% thumbnail %}.
+
+    ``bytes`` is only known for entries recorded at generation time.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.url
+
+
+def _cache():
+    return caches[getattr(settings, "THUMBNAIL_CACHE_ALIAS", "default")]
+
+
+def cache_version():
+    raw = repr((
+        settings.MEDIA_URL,
+        getattr(settings, "THUMBNAIL_SUBDIR", ""),
+        INFO_SCHEMA,
+        getattr(settings, "THUMBNAIL_PICTURE_ALIASES", ()),
+        picture_formats(),
+        picture_densities(),
+        sorted(getattr(settings, "THUMBNAIL_PICTURE_QUALITY", {}).items()),
+        sorted((target, sorted(aliases.items())) for target, aliases in settings.THUMBNAIL_ALIASES.items()),
+    ))
+    return hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def thumbnail_key(name, alias, version=None):
+    digest = hashlib.sha1(name.encode(), usedforsecurity=False).hexdigest()
+    return f"thumb:{version or cache_version()}:{digest}:{alias}"
+
+
+def _info(thumbnail, with_bytes=False):
+    # Reading the size can be a storage round trip, so only generation does
+    return ThumbnailInfo(thumbnail.url, thumbnail.width, thumbnail.height, thumbnail.size if with_bytes else None)
+
+
+def _remember(entries):
+    """Store {(name, alias): ThumbnailInfo}; fails open."""
+    if not entries:
+        return
+    version = cache_version()
+    try:
+        _cache().set_many(
+            {thumbnail_key(name, alias, version): info for (name, alias), info in entries.items()},
+            THUMBNAIL_CACHE_TIMEOUT,
+        )
+    except Exception as exc:
+        _cache_failed("write", exc)
+
+
+def _install_avif_encoder():
+    """Have Pillow's AVIF encoder accept easy_thumbnails' numeric subsampling."""
+    Image.init()
+    save = Image.SAVE.get("AVIF")
+    if save is None or getattr(save, "numeric_subsampling", False):
+        return
+
+    def save_avif(im, fp, filename):
+        subsampling = im.encoderinfo.get("subsampling")
+        if isinstance(subsampling, int):
+            im.encoderinfo["subsampling"] = JPEG_SUBSAMPLING.get(subsampling, "4:2:0")
+        save(im, fp, filename)
+
+    save_avif.numeric_subsampling = True
+    Image.register_save("AVIF", save_avif)
+
+
+def _variant(fieldfile, alias, fmt, density):
+    thumbnailer = get_thumbnailer(fieldfile)
+    options = dict(thumbnail_aliases.get(alias, target=thumbnailer.alias_target))
+    if fmt == "avif":
+        _install_avif_encoder()
+    if fmt:
+        # The file extension picks the encoder; both formats keep alpha
+        thumbnailer.thumbnail_extension = thumbnailer.thumbnail_transparency_extension = fmt
+        thumbnailer.thumbnail_preserve_extensions = ()
+        quality = getattr(settings, "THUMBNAIL_PICTURE_QUALITY", {}).get(fmt)
+        if quality:
+            options["quality"] = min(quality, options.get("quality", quality))
+    if density != 1:
+        options["size"] = tuple(side * density for side in options["size"])
+    return thumbnailer.get_thumbnail(options)
+
+
+def generate_thumbnails(fieldfile, aliases):
+    """Generate (or find already generated) each alias of ``fieldfile`` and
+    its picture variants; return the number of files.
+
+    Each file's URL, dimensions and size are recorded for the template tags.
+    """
+    thumbnailer = get_thumbnailer(fieldfile)
+    entries = {}
+    for alias in aliases:
+        # Indexing by alias generates the thumbnail only when it is missing
+        entries[(fieldfile.name, alias)] = _info(thumbnailer[alias], with_bytes=True)
+        if alias not in getattr(settings, "THUMBNAIL_PICTURE_ALIASES", ()):
+            continue
+        for fmt in (None, *picture_formats()):
+            for density in picture_densities():
+                if fmt or density != 1:
+                    thumbnail = _variant(fieldfile, alias, fmt, density)
+                    entries[(fieldfile.name, variant_key(alias, fmt, density))] = _info(thumbnail, with_bytes=True)
+    _remember(entries)
+    for receiver, error in thumbnails_generated.send_robust(sender=type(fieldfile.instance), fieldfile=fieldfile):
+        if isinstance(error, Exception):
+            logger.error("%r failed for %s", receiver, fieldfile.name, exc_info=error)
+    return len(entries)
+
+
+def image_placeholder(fieldfile):
+    """(width, height, data URI) of ``fieldfile``: its full size, and a
+    PLACEHOLDER_SIZE-pixel WebP of it to show while the real image loads."""
+    with fieldfile.open("rb") as fp, Image.open(fp) as image:
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8):
+            width, height = height, width  # shown rotated a quarter turn
+        # JPEGs decode straight to a fraction of their size
+        image.draft("RGB", (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        buffer = BytesIO()
+        image.save(buffer, "WEBP", quality=40)
+    return width, height, "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def lookup_thumbnails(pairs):
+    """{(name, alias): ThumbnailInfo or None} for (fieldfile, alias) ``pairs``, in one cache read.
+
+    None marks an entry the cache does not have; nothing is generated here.
+    """
+    version = cache_version()
+    keys = {thumbnail_key(ff.name, alias, version): (ff.name, alias) for ff, alias in pairs if ff}
+    found = {}
+    if keys:
+        try:
+            found = _cache().get_many(list(keys))
+        except Exception as exc:
+            _cache_failed("read", exc)
+    return {pair: found.get(key) for key, pair in keys.items()}
+
+
+def resolve_thumbnail(fieldfile, alias):
+    """ThumbnailInfo for one alias through easy_thumbnails (generating it if
+    missing, like {% thumbnail %}), then recorded; None if the image is unusable."""
+    try:
+        info = _info(get_thumbnailer(fieldfile)[alias])
+    except (InvalidImageFormatError, OSError, KeyError):
+        logger.warning("Could not render %r for %s", alias, fieldfile.name, exc_info=True)
+        return None
+    _remember({(fieldfile.name, alias): info})
+    return info
+
+
+def thumbnail_info(fieldfile, alias):
+    """ThumbnailInfo for ``alias`` of ``fieldfile``: the cache first, then easy_thumbnails."""
+    if not fieldfile:
+        return None
+    return lookup_thumbnails([(fieldfile, alias)])[(fieldfile.name, alias)] or resolve_thumbnail(fieldfile, alias)
+
+
+def _run(fieldfile, aliases):
+    try:
+        generate_thumbnails(fieldfile, aliases)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", fieldfile.name)
+    finally:
+        with _lock:
+            _pending.discard(fieldfile.name)
+        close_old_connections()
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = getattr(settings, "THUMBNAIL_WORKERS", 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+            _slots = threading.BoundedSemaphore(getattr(settings, "THUMBNAIL_QUEUE_SIZE", 64))
+    return _executor, _slots
+
+
+def submit(fieldfile, aliases):
+    """Generate ``aliases`` of ``fieldfile`` on the pool; False if it was full.
+
+    A file already queued is not queued again.
+    """
+    if not getattr(settings, "THUMBNAIL_WORKERS", 2):
+        _run(fieldfile, aliases)
+        return True
+    executor, slots = _pool()
+    with _lock:
+        if fieldfile.name in _pending:
+            return True
+        if not slots.acquire(blocking=False):
+            logger.warning("Thumbnail queue full; %s will be generated on first view", fieldfile.name)
+            return False
+        _pending.add(fieldfile.name)
+    future = executor.submit(_run, fieldfile, aliases)
+    future.add_done_callback(lambda _: slots.release())
+    return True
+
+
+def submit_from_render(fieldfile, aliases):
+    """submit(), unless a render already queued ``fieldfile`` in the last THUMBNAIL_RETRY_AFTER seconds.
+
+    Nothing is queued while the cache is down: without the marker every
+    render would queue the file again, and the generated entries couldn't
+    be stored anyway.
+    """
+    digest = hashlib.sha1(fieldfile.name.encode(), usedforsecurity=False).hexdigest()
+    timeout = getattr(settings, "THUMBNAIL_RETRY_AFTER", THUMBNAIL_RETRY_AFTER)
+    try:
+        if not _cache().add(f"thumbqueued:{digest}", 1, timeout=timeout):
+            return True
+    except Exception as exc:
+        _cache_failed("write", exc)
+        return False
+    return submit(fieldfile, aliases)
+
+
+def queue_thumbnails(fieldfile):
+    """Queue the eager aliases of ``fieldfile`` to run after the current transaction commits."""
+    if not fieldfile:
+        return
+    aliases = aliases_for(fieldfile.instance.__class__, fieldfile.field.name)
+    if aliases:
+        transaction.on_commit(lambda: submit(fieldfile, aliases))
+
+
+def file_saved(sender, fieldfile, **kwargs):
+    """saved_file receiver — see CoreConfig.ready()."""
+    queue_thumbnails(fieldfile)
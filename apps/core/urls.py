@@ -6,6 +6,7 @@ app_name = "core"
 
 urlpatterns = [
     path("", views.home, name="home"),
+    path("api/latest/", views.home_more, name="home_more"),
     path("about/", views.about, name="about"),
     path("api/track-view/", views.track_view, name="track_view"),
     path("robots.txt", views.robots_txt, name="robots_txt"),
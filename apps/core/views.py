@@ -1,13 +1,26 @@
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.contrib.sitemaps.views import SitemapIndexItem, sitemap, x_robots_tag
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import escape
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
+from apps.articles.cards import cards
 from apps.articles.models import Article
+from apps.articles.pagination import KeysetPaginator
 
+from .page_cache import add_tags, cache_anonymous_page, get_or_set_tagged
+from .sitemaps import article_chunk_entries, article_chunks, news_entries
 
-def home(request: HttpRequest) -> HttpResponse:
-    all_articles = Article.objects.filter(status="published").select_related("author")
+
+HOME_PAGE_SIZE = 20
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24  # seconds; chunks are purged by tag anyway
+
+
+def _home_front(all_articles):
+    """Resolve the lead story and secondary band shown above the grid."""
     exclude_pks = []
 
     # Lead story
@@ -22,18 +35,112 @@ def home(request: HttpRequest) -> HttpResponse:
         .order_by("-secondary_priority", "-published_at")[:4]
     )
     exclude_pks.extend(a.pk for a in secondaries)
+    return featured, secondaries, exclude_pks
+
+
+def _home_grid(all_articles, exclude_pks, before):
+    """One keyset page of the remaining grid — most recent first."""
+    paginator = KeysetPaginator(all_articles.exclude(pk__in=exclude_pks), HOME_PAGE_SIZE)
+    return paginator.get_page(before=before)
 
-    # Remaining grid — most recent first
-    cards = all_articles.exclude(pk__in=exclude_pks).order_by("-published_at")
+
+@cache_anonymous_page
+def home(request: HttpRequest) -> HttpResponse:
+    add_tags(request, "home")
+    all_articles = cards(Article.objects.filter(status="published"))
+    featured, secondaries, exclude_pks = _home_front(all_articles)
+    grid = _home_grid(all_articles, exclude_pks, request.GET.get("before"))
 
     return render(request, "core/home.html", {
         "featured": featured,
         "secondaries": secondaries,
-        "cards": cards,
+        "cards": grid,
         "active_section": None,
     })
 
 
+@cache_anonymous_page
+def home_more(request: HttpRequest) -> HttpResponse:
+    """Next batch of homepage grid cards as an HTML fragment (infinite scroll)."""
+    add_tags(request, "home")
+    all_articles = cards(Article.objects.filter(status="published"))
+    _, _, exclude_pks = _home_front(all_articles)
+    grid = _home_grid(all_articles, exclude_pks, request.GET.get("before"))
+    return render(request, "core/_home_cards.html", {"cards": grid})
+
+
+@x_robots_tag
+@cache_anonymous_page
+def sitemap_index(request: HttpRequest, sitemaps) -> HttpResponse:
+    """sitemap.xml — the index, with each article chunk's lastmod.
+
+    Expired by any article change (they all bump "home").
+    """
+    add_tags(request, "home")
+    items = [
+        SitemapIndexItem(request.build_absolute_uri(reverse("sitemap_section", kwargs={"section": section})))
+        for section in sitemaps
+    ]
+    items.append(SitemapIndexItem(request.build_absolute_uri(reverse("sitemap_news"))))
+    items += [
+        SitemapIndexItem(request.build_absolute_uri(reverse("sitemap_articles", kwargs={"chunk": chunk})), lastmod)
+        for chunk, lastmod in article_chunks()
+    ]
+    return TemplateResponse(request, "sitemap_index.xml", {"sitemaps": items}, content_type="application/xml")
+
+
+@cache_anonymous_page
+def sitemap_xml(request: HttpRequest, sitemaps, section) -> HttpResponse:
+    """One of the small sitemaps in ``sitemaps`` (static pages, sections, towns)."""
+    return sitemap(request, sitemaps, section=section)
+
+
+def _article_urlset(origin, chunk):
+    """The <urlset> for article pk range ``chunk``, or None if it is empty."""
+    urls = [
+        f"<url><loc>{escape(origin + reverse('articles:detail', kwargs={'slug': slug}))}</loc>"
+        f"<lastmod>{updated.isoformat(timespec='seconds')}</lastmod></url>"
+        for slug, updated in article_chunk_entries(chunk).iterator()
+    ]
+    if not urls:
+        return None
+    return "\n".join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        *urls,
+        "</urlset>",
+    ])
+
+
+@x_robots_tag
+@cache_anonymous_page
+def article_sitemap(request: HttpRequest, chunk: int) -> HttpResponse:
+    """Articles in one pk range, memoised until one of them changes."""
+    tag = f"sitemap:{chunk}"
+    add_tags(request, tag)
+    origin = f"{request.scheme}://{request.get_host()}"
+    xml = get_or_set_tagged(
+        f"sitemap:articles:{origin}:{chunk}",
+        [tag],
+        lambda: _article_urlset(origin, chunk),
+        SITEMAP_CACHE_TIMEOUT,
+    )
+    if xml is None:
+        raise Http404
+    return HttpResponse(xml, content_type="application/xml")
+
+
+@x_robots_tag
+@cache_anonymous_page
+def news_sitemap(request: HttpRequest) -> HttpResponse:
+    """Google News sitemap — articles published in the last 48 hours."""
+    add_tags(request, "home")
+    return render(request, "core/sitemap_news.xml", {
+        "articles": news_entries(),
+        "origin": f"{request.scheme}://{request.get_host()}",
+    }, content_type="application/xml")
+
+
 def about(request: HttpRequest) -> HttpResponse:
     return render(request, "core/about.html")
 
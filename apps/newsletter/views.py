@@ -6,6 +6,7 @@ from django.core.mail import send_mail
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
+from django.views.decorators.csrf import csrf_exempt
 
 from .forms import SubscribeForm
 from .models import NewsletterEvent, NewsletterPlacement, Subscriber
@@ -50,6 +51,10 @@ def _send_confirmation_email(subscriber, request):
         logger.exception("Failed to send confirmation email to %s", subscriber.email)
 
 
+# Signup forms are baked into pages served from the page cache and the
+# static export, where no per-reader token can exist. Double opt-in already
+# stops a forged signup from subscribing anyone.
+@csrf_exempt
 def subscribe(request: HttpRequest) -> HttpResponse:
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
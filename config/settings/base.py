@@ -125,6 +125,13 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Output of `manage.py export_static` (pre-rendered public pages)
+STATIC_EXPORT_ROOT = Path(os.getenv("STATIC_EXPORT_ROOT", BASE_DIR / "export"))
+
+# Fitted related-stories corpus saved by `manage.py compute_related`, so
+# incremental runs only re-read the articles that changed
+RELATED_CORPUS_PATH = Path(os.getenv("RELATED_CORPUS_PATH", BASE_DIR / "var" / "related_corpus.pickle"))
+
 # DigitalOcean Spaces (S3-compatible)
 DO_SPACES_KEY = os.getenv("DO_KEY", "")
 DO_SPACES_SECRET = os.getenv("DO_SECRET", "")
@@ -168,6 +175,27 @@ CACHES = {
     },
 }
 
+# Full-page cache for anonymous readers (apps.core.page_cache). Point
+# PAGE_CACHE_ALIAS at "redis" when running more than one worker so that
+# invalidations reach every process. A timeout of 0 disables the cache.
+PAGE_CACHE_ALIAS = os.getenv("PAGE_CACHE_ALIAS", "default")
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "300"))
+# How long a page's ETag/Last-Modified outlive its body, so revalidations
+# keep getting 304s without a render
+PAGE_CACHE_VALIDATOR_TIMEOUT = int(os.getenv("PAGE_CACHE_VALIDATOR_TIMEOUT", str(7 * 24 * 3600)))
+
+# Full-text search (apps.articles.search). ADMIN_FULLTEXT_SEARCH switches the
+# article changelist from ILIKE over search_fields to the same GIN index.
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+ADMIN_FULLTEXT_SEARCH = get_bool(os.getenv("ADMIN_FULLTEXT_SEARCH"), default=True)
+
+# Scheduled publishing. Run `manage.py publish_scheduled` as a process of
+# its own and set DJANGO_PUBLISH_IN_REQUEST=false to stop reader requests
+# checking for due articles. The command refuses to start unless
+# PAGE_CACHE_ALIAS is a shared backend (e.g. "redis"): with the default
+# per-process LocMemCache its invalidations would never reach the web workers.
+PUBLISH_IN_REQUEST = get_bool(os.getenv("DJANGO_PUBLISH_IN_REQUEST"), default=True)
+
 # Email (MXroute SMTP)
 EMAIL_HOST = os.getenv("EMAIL_HOST", "")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
@@ -191,3 +219,35 @@ THUMBNAIL_ALIASES = {
     },
 }
 THUMBNAIL_SUBDIR = "thumbs"
+
+# Eager thumbnails (apps.core.thumbnails): the aliases generated for each
+# image field when a new file is saved, on THUMBNAIL_WORKERS background
+# threads with at most THUMBNAIL_QUEUE_SIZE files pending. Keep these lists
+# in step with the {% thumbnail %} tags that render each field.
+# `manage.py generate_thumbnails` backfills existing images.
+_ARTICLE_IMAGE_ALIASES = ["card", "hero", "hero_mobile", "og_image"]
+THUMBNAIL_EAGER_ALIASES = {
+    "articles.Article.main_image": _ARTICLE_IMAGE_ALIASES,
+    "articles.Article.hero_image": _ARTICLE_IMAGE_ALIASES,
+    "articles.Author.photo": ["thumbnail"],
+    "advertising.AdCreative.image": ["thumbnail"],
+    "core.SiteSettings.hero_image": ["hero", "hero_mobile"],
+    "core.ContentCard.image": ["hero", "card"],
+}
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUEUE_SIZE = int(os.getenv("THUMBNAIL_QUEUE_SIZE", "64"))
+# A page missing a file's variants queues it at most once per this many seconds
+THUMBNAIL_RETRY_AFTER = int(os.getenv("THUMBNAIL_RETRY_AFTER", "600"))
+# Rendered thumbnail URLs and sizes are read from this cache rather than
+# easy_thumbnails' tables and storage. Every worker and the backfill
+# command must share it, hence Redis.
+THUMBNAIL_CACHE_ALIAS = os.getenv("THUMBNAIL_CACHE_ALIAS", "redis")
+THUMBNAIL_CACHE_DIMENSIONS = True
+# Aliases rendered with {% picture %} are also generated in these formats
+# (most preferred first) at each density; the alias's JPEG is the fallback.
+# THUMBNAIL_PICTURE_QUALITY caps each format's quality below the alias's,
+# since AVIF and WebP hold up at lower settings than JPEG.
+THUMBNAIL_PICTURE_ALIASES = ["card", "hero", "hero_mobile", "thumbnail"]
+THUMBNAIL_PICTURE_FORMATS = ["avif", "webp"]
+THUMBNAIL_PICTURE_DENSITIES = [1, 2]
+THUMBNAIL_PICTURE_QUALITY = {"avif": 60, "webp": 75}
@@ -15,3 +15,6 @@ DATABASES["default"].update({  # noqa: F405
 })
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+# One process and usually no Redis: keep thumbnail URLs in the local cache
+THUMBNAIL_CACHE_ALIAS = os.getenv("THUMBNAIL_CACHE_ALIAS", "default")  # noqa: F405
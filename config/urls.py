@@ -1,18 +1,18 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.contrib.sitemaps.views import sitemap
 from django.urls import include, path
 
 from apps.advertising.views import advertise
-from apps.articles.views import author_detail, section_page, town_page
-from apps.core.sitemaps import ArticleSitemap, SectionSitemap, StaticViewSitemap, TownSitemap
+from apps.articles import feeds
+from apps.articles.views import author_detail, search, section_page, town_page
+from apps.core.sitemaps import SectionSitemap, StaticViewSitemap, TownSitemap
+from apps.core.views import article_sitemap, news_sitemap, sitemap_index, sitemap_xml
 from apps.core.views_admin import cdn_browser
 
 sitemaps = {
     "static": StaticViewSitemap,
     "sections": SectionSitemap,
-    "articles": ArticleSitemap,
     "towns": TownSitemap,
 }
 
@@ -24,14 +24,21 @@ urlpatterns = [
     path("ads/", include("apps.advertising.urls")),
     path("article/", include("apps.articles.urls")),
     path("authors/<slug:slug>/", author_detail, name="author_detail"),
+    path("authors/<slug:slug>/feed/", feeds.author_rss, name="author_feed"),
+    path("authors/<slug:slug>/feed/atom/", feeds.author_atom, name="author_feed_atom"),
     path("towns/<slug:slug>/", town_page, name="town_page"),
-    path(
-        "sitemap.xml",
-        sitemap,
-        {"sitemaps": sitemaps},
-        name="django.contrib.sitemaps.views.sitemap",
-    ),
+    path("towns/<slug:slug>/feed/", feeds.town_rss, name="town_feed"),
+    path("towns/<slug:slug>/feed/atom/", feeds.town_atom, name="town_feed_atom"),
+    path("feed/", feeds.site_rss, name="site_feed"),
+    path("feed/atom/", feeds.site_atom, name="site_feed_atom"),
+    path("search/", search, name="search"),
+    path("sitemap.xml", sitemap_index, {"sitemaps": sitemaps}, name="sitemap_index"),
+    path("sitemap-news.xml", news_sitemap, name="sitemap_news"),
+    path("sitemap-articles-<int:chunk>.xml", article_sitemap, name="sitemap_articles"),
+    path("sitemap-<slug:section>.xml", sitemap_xml, {"sitemaps": sitemaps}, name="sitemap_section"),
     path("<slug:section>/", section_page, name="section_page"),
+    path("<slug:section>/feed/", feeds.section_rss, name="section_feed"),
+    path("<slug:section>/feed/atom/", feeds.section_atom, name="section_feed_atom"),
     path("", include("apps.core.urls")),
 ]
 